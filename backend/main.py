@@ -1,20 +1,31 @@
+import logging
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI
-from routers import autocomplete_location, health, route_progress
+from routers import autocomplete_location, health, replan, route_progress
 from fastapi.exceptions import HTTPException
 from utils.error_handlers import (
     http_exception_handler,
     unhandled_exception_handler,
 )
 from fastapi.middleware.cors import CORSMiddleware
+from common.log import configure_logging
+from common.telemetry import setup_telemetry
+from services.plan_executor import plan_executor
+from services.maps.maps_client import maps_service
+
+configure_logging("backend")
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("🚀 Starting up app... 🚀")
+    logger.info("🚀 Starting up app... 🚀")
     load_dotenv()
     yield
-    print("🛑 App shutdown complete.")
+    await plan_executor.close()
+    await maps_service.aclose()
+    await autocomplete_location.nominatim.aclose()
+    logger.info("🛑 App shutdown complete.")
 
 app = FastAPI(
     title="Travel Assistant API",
@@ -31,11 +42,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+setup_telemetry(app, "backend")
+
 # Register custom handlers
 app.add_exception_handler(HTTPException, http_exception_handler)
 app.add_exception_handler(Exception, unhandled_exception_handler)
 
 app.include_router(autocomplete_location.router)
 app.include_router(route_progress.router)
+app.include_router(replan.router)
 
 app.include_router(health.router)
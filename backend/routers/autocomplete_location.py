@@ -1,13 +1,18 @@
 import logging
-from fastapi import APIRouter
+import os
 import httpx
+from fastapi import APIRouter, HTTPException
+from common.http import AsyncServiceClient, CircuitOpenError
 
 router = APIRouter()
 
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+
+nominatim = AsyncServiceClient("nominatim", NOMINATIM_URL)
+
 @router.get("/autocomplete")
 async def autocomplete(q: str):
-    logging.debug(f"Autocomplete request for: {q}")
-    url = "https://nominatim.openstreetmap.org/search"
+    logging.debug("Autocomplete request for: %s", q)
     params = {
         "q": q,
         "format": "json",
@@ -15,7 +20,10 @@ async def autocomplete(q: str):
         "addressdetails": 1,
     }
     headers = {"User-Agent": "travel-optimizer-backend"}
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, params=params, headers=headers)
+    try:
+        resp = await nominatim.request("GET", params=params, headers=headers, timeout=5)
         resp.raise_for_status()
-        return resp.json()
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        logging.error("Autocomplete request error: %s", e)
+        raise HTTPException(status_code=503, detail="Location search is unavailable.")
+    return resp.json()
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from services.maps.maps_client import (
+    call_add_stop_from_maps_service,
+    call_remove_stop_from_maps_service,
+    call_replan_from_maps_service,
+)
+from services.plan_cache import plan_cache
+from routers.routes_cache import plan_keys, routes_cache
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class ReplanRequest(BaseModel):
+    num_pois: Optional[int] = Field(None, ge=1)
+    travel_mode: Optional[str] = None
+
+
+class AddStopRequest(BaseModel):
+    route_index: int
+    poi_id: str
+
+
+def _session_id(route_id: str) -> str:
+    routes = routes_cache.get(route_id)
+    if not routes or not routes.get("session_id"):
+        logger.info("❌ No re-plannable routes for %s", route_id)
+        raise HTTPException(status_code=404, detail="Routes not found")
+    return routes["session_id"]
+
+
+async def _edit(route_id: str, call, *args, **kwargs) -> dict:
+    """
+    Run a maps_service session edit. A 404 there usually means the session
+    expired, so drop the cached plan that hands it out and let the next
+    request for it generate a fresh one.
+    """
+    session_id = _session_id(route_id)
+    try:
+        routes = await asyncio.to_thread(call, session_id, *args, **kwargs)
+    except HTTPException as e:
+        if e.status_code == 404 and route_id in plan_keys:
+            logger.info("Session for %s is gone, dropping its cached plan", route_id)
+            plan_cache.invalidate(plan_keys[route_id])
+        raise
+    return _store(route_id, routes)
+
+
+def _store(route_id: str, routes: dict) -> dict:
+    # Replace rather than mutate: the previous dict may be shared with the plan cache
+    routes_cache[route_id] = routes
+    return {"routes": routes}
+
+
+@router.post("/routes/{route_id}/replan")
+async def replan_routes(route_id: str, body: ReplanRequest):
+    """
+    Re-plan with a new num_pois and/or travel_mode without fetching POIs again.
+    """
+    return await _edit(
+        route_id,
+        call_replan_from_maps_service,
+        num_pois=body.num_pois,
+        travel_mode=body.travel_mode,
+    )
+
+
+@router.post("/routes/{route_id}/stops")
+async def add_stop(route_id: str, body: AddStopRequest):
+    """
+    Add a candidate POI to one of the routes.
+    """
+    return await _edit(route_id, call_add_stop_from_maps_service, body.route_index, body.poi_id)
+
+
+@router.delete("/routes/{route_id}/stops/{poi_id}")
+async def remove_stop(route_id: str, poi_id: str, route_index: int):
+    """
+    Remove a POI from one of the routes.
+    """
+    return await _edit(route_id, call_remove_stop_from_maps_service, route_index, poi_id)
@@ -2,18 +2,32 @@ import asyncio
 import json
 import logging
 import traceback
-from fastapi import APIRouter, HTTPException
-from services.maps.maps_client import call_optimized_routes_from_maps_service, call_pois_from_maps_service
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
+from services.plan_cache import HIT, STALE, canonical_plan_key, plan_cache, plan_seed
+from services.plan_executor import PLAN_CLIENT_HEADER, PlanLimitError, plan_executor
+from services.plan_jobs import NoPOIsFoundError
 from models.route_request import RouteGenerationRequest
 from sse_starlette.sse import EventSourceResponse
 import uuid
-from routers.routes_cache import routes_cache
+from routers.routes_cache import plan_keys, routes_cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def client_key(request: Request) -> str:
+    """
+    Who a stream counts against for PLAN_MAX_PER_CLIENT.
+    """
+    if PLAN_CLIENT_HEADER and request.headers.get(PLAN_CLIENT_HEADER):
+        return request.headers[PLAN_CLIENT_HEADER]
+    return request.client.host if request.client else "unknown"
 
 
 @router.get("/route-progress")
 async def route_progress(
+    request: Request,
     location: str,
     interests: str,
     radius_km: float,
@@ -21,7 +35,23 @@ async def route_progress(
     num_pois: int,
     travel_mode : str,
 ):
+    client_id = client_key(request)
+    plan: Optional[asyncio.Task] = None
+
     async def event_generator():
+        try:
+            with plan_executor.stream(client_id):
+                async for event in plan_events():
+                    yield event
+        except PlanLimitError as e:
+            yield {"event": "error", "data": json.dumps({"message": str(e)})}
+        finally:
+            # Client went away (or we failed): don't keep planning for nobody
+            if plan is not None and not plan.done():
+                plan.cancel()
+
+    async def plan_events():
+        nonlocal plan
         try:
             # Build request
             request_data = RouteGenerationRequest(
@@ -32,44 +62,65 @@ async def route_progress(
                 num_pois=num_pois,
                 travel_mode=travel_mode,
             )
+            key = canonical_plan_key(request_data)
+            request_data.seed = plan_seed(key)
 
-            yield {"event": "stage", "data": "Fetching POIs from maps_service"}
-            pois = call_pois_from_maps_service(request_data)
-            if not pois:
-                yield {
-                    "event": "error",
-                    "data": json.dumps(
-                        {
-                            "message": f"Only 0 POIs found for interests '{interests}' at '{location}' within {radius_km} km.",
-                            "suggestions": [
-                                "Try increasing the search radius.",
-                                "Try more general interests like 'parks, food, museums'.",
-                                "Make sure the location is specific and spelled correctly.",
-                            ],
-                        }
-                    ),
-                }
-                return
-
-            await asyncio.sleep(0.1)
-
-            yield {"event": "stage", "data": "Generating optimized routes"}
-            routes = call_optimized_routes_from_maps_service(request_data, pois)
-
-            await asyncio.sleep(0.1)
+            updates: asyncio.Queue = asyncio.Queue()
+            plan = asyncio.create_task(
+                plan_cache.get_or_compute(
+                    key,
+                    lambda report: plan_executor.submit(request_data, report),
+                    progress=lambda event, data: updates.put_nowait((event, data)),
+                )
+            )
+            # Forward stage and queue-position updates until the plan is ready
+            while not plan.done() or not updates.empty():
+                next_update = asyncio.ensure_future(updates.get())
+                try:
+                    await asyncio.wait({plan, next_update}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    if not next_update.done():
+                        next_update.cancel()
+                if next_update.done() and not next_update.cancelled():
+                    event, data = next_update.result()
+                    yield {"event": event, "data": data}
+
+            routes, outcome = plan.result()
+            if outcome in (HIT, STALE):
+                yield {"event": "stage", "data": "Loaded routes from cache"}
 
             route_id = str(uuid.uuid4())
             routes_cache[route_id] = routes
+            plan_keys[route_id] = key
 
             yield {"event": "complete", "data": route_id}
 
+        except NoPOIsFoundError:
+            yield {
+                "event": "error",
+                "data": json.dumps(
+                    {
+                        "message": f"Only 0 POIs found for interests '{interests}' at '{location}' within {radius_km} km.",
+                        "suggestions": [
+                            "Try increasing the search radius.",
+                            "Try more general interests like 'parks, food, museums'.",
+                            "Make sure the location is specific and spelled correctly.",
+                        ],
+                    }
+                ),
+            }
+            return
+
         except HTTPException as http_exc:
-            logging.exception("❌ HTTPException in route-progress")
-            yield {"event": "error", "data": json.dumps({"message": http_exc.detail})}
+            logger.exception("❌ HTTPException in route-progress")
+            yield {
+                "event": "error",
+                "data": json.dumps({"message": http_exc.detail, "status": http_exc.status_code}),
+            }
             return
 
         except Exception as e:
-            logging.exception("❌ Exception in route-progress")
+            logger.exception("❌ Exception in route-progress")
             message = str(e) or traceback.format_exc(limit=1).splitlines()[-1]
             yield {"event": "error", "data": json.dumps({"message": message})}
             return
@@ -79,12 +130,11 @@ async def route_progress(
 
 @router.get("/get-latest-routes/{route_id}")
 async def get_latest_routes(route_id: str):
-    print(f"📦 Requested route_id: {route_id}")
-    print(f"🧠 Available route cache keys: {list(routes_cache.keys())}")
+    logger.debug("📦 Requested route_id %s (%d cached)", route_id, len(routes_cache))
 
     routes = routes_cache.get(route_id)
     if not routes:
-        print(f"❌ Route ID not found: {route_id}")
+        logger.info("❌ Route ID not found: %s", route_id)
         raise HTTPException(status_code=404, detail="Routes not found")
-    print(f"✅ Returning {len(routes)} routes for {route_id}")
+    logger.debug("✅ Returning %d routes for %s", len(routes), route_id)
     return {"routes": routes}
@@ -1 +1,3 @@
-routes_cache = {}
\ No newline at end of file
+routes_cache = {}
+# route_id -> plan cache key the routes were generated (or served) from
+plan_keys = {}
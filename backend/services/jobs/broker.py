@@ -0,0 +1,391 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Gauge
+
+JOB_POLL_INTERVAL_S = float(os.getenv("JOB_POLL_INTERVAL_S", "0.05"))
+JOB_RETENTION_S = float(os.getenv("JOB_RETENTION_S", "3600"))
+PLAN_QUEUE_REPORT_S = float(os.getenv("PLAN_QUEUE_REPORT_S", "1.0"))
+# An unchanged queue position is sent again this often, so a long wait in the
+# queue never looks like a stalled job to the web tier (see JOB_TIMEOUT_S)
+PLAN_QUEUE_HEARTBEAT_S = float(os.getenv("PLAN_QUEUE_HEARTBEAT_S", "15"))
+
+PLANS_QUEUED = Gauge("travel_plans_queued", "Plan jobs waiting for a worker")
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+
+# Terminal events; a subscriber stops listening after one of these
+COMPLETE = "complete"
+ERROR = "error"
+
+logger = logging.getLogger(__name__)
+
+Event = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Job:
+    id: str
+    payload: Dict[str, Any]
+
+
+class Broker(ABC):
+    """
+    Carries plan jobs from the web tier to workers and their events back.
+
+    The web tier calls `submit` and reads (event, data) pairs from the
+    returned queue; while the job waits it also receives ("queued", position)
+    events. Workers call `claim`, `publish` and `finish`, and poll
+    `cancelled` to abandon jobs nobody is waiting for any more.
+    """
+
+    def __init__(
+        self,
+        report_interval: float = PLAN_QUEUE_REPORT_S,
+        heartbeat: float = PLAN_QUEUE_HEARTBEAT_S,
+    ):
+        self.report_interval = report_interval
+        self.heartbeat = heartbeat
+        self._subscribers: Dict[str, asyncio.Queue] = {}
+        # job ID -> (last position sent, when)
+        self._positions: Dict[str, Tuple[int, float]] = {}
+        self._background: List[asyncio.Task] = []
+
+    # Web tier
+
+    async def submit(self, job_id: str, payload: Dict[str, Any]) -> asyncio.Queue:
+        self._start_background()
+        events: asyncio.Queue = asyncio.Queue()
+        self._subscribers[job_id] = events
+        await self.enqueue(job_id, payload)
+        return events
+
+    async def forget(self, job_id: str) -> None:
+        """
+        Drop the subscription and the job's stored state.
+        """
+        self._subscribers.pop(job_id, None)
+        self._positions.pop(job_id, None)
+        await self.delete(job_id)
+
+    def _deliver(self, job_id: str, event: str, data: str) -> None:
+        events = self._subscribers.get(job_id)
+        if events is not None:
+            events.put_nowait((event, data))
+
+    def _start_background(self) -> None:
+        if not self._background:
+            self._background = [
+                asyncio.create_task(self._report_positions(), name="job-positions"),
+                *self._background_tasks(),
+            ]
+
+    def _background_tasks(self) -> List[asyncio.Task]:
+        return []
+
+    async def _report_positions(self) -> None:
+        # One listing per interval serves every waiting stream in this process
+        while True:
+            try:
+                queued = await self.queued_ids()
+                PLANS_QUEUED.set(len(queued))
+                now = time.monotonic()
+                for position, job_id in enumerate(queued, start=1):
+                    if job_id not in self._subscribers:
+                        continue
+                    last = self._positions.get(job_id)
+                    if last is None or last[0] != position or now - last[1] >= self.heartbeat:
+                        self._positions[job_id] = (position, now)
+                        self._deliver(job_id, "queued", str(position))
+            except Exception:
+                logger.exception("Failed to report queue positions")
+            await asyncio.sleep(self.report_interval)
+
+    async def close(self) -> None:
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._background = []
+
+    # Storage, implemented per backend
+
+    @abstractmethod
+    async def enqueue(self, job_id: str, payload: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    async def queued_ids(self) -> List[str]:
+        """
+        IDs of waiting jobs, oldest first.
+        """
+
+    @abstractmethod
+    async def cancel(self, job_id: str) -> None: ...
+
+    @abstractmethod
+    async def delete(self, job_id: str) -> None: ...
+
+    # Worker side
+
+    @abstractmethod
+    async def claim(self) -> Job:
+        """
+        Wait for the oldest queued job and mark it running.
+        """
+
+    @abstractmethod
+    async def publish(self, job_id: str, event: str, data: str) -> None: ...
+
+    @abstractmethod
+    async def finish(self, job_id: str) -> None: ...
+
+    @abstractmethod
+    async def cancelled(self, job_id: str) -> bool: ...
+
+
+class InMemoryBroker(Broker):
+    """
+    Single-process broker: the web tier and its workers share one event loop.
+    """
+
+    def __init__(
+        self,
+        report_interval: float = PLAN_QUEUE_REPORT_S,
+        heartbeat: float = PLAN_QUEUE_HEARTBEAT_S,
+    ):
+        super().__init__(report_interval, heartbeat)
+        self._queued: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._status: Dict[str, str] = {}
+        self._available = asyncio.Event()
+
+    async def enqueue(self, job_id: str, payload: Dict[str, Any]) -> None:
+        self._queued[job_id] = payload
+        self._status[job_id] = QUEUED
+        self._available.set()
+
+    async def queued_ids(self) -> List[str]:
+        return list(self._queued)
+
+    async def cancel(self, job_id: str) -> None:
+        self._queued.pop(job_id, None)
+        if job_id in self._status:
+            self._status[job_id] = CANCELLED
+
+    async def delete(self, job_id: str) -> None:
+        self._status.pop(job_id, None)
+
+    async def claim(self) -> Job:
+        while not self._queued:
+            self._available.clear()
+            await self._available.wait()
+        job_id, payload = self._queued.popitem(last=False)
+        self._status[job_id] = RUNNING
+        return Job(job_id, payload)
+
+    async def publish(self, job_id: str, event: str, data: str) -> None:
+        self._deliver(job_id, event, data)
+
+    async def finish(self, job_id: str) -> None:
+        if self._status.get(job_id) == RUNNING:
+            self._status[job_id] = DONE
+
+    async def cancelled(self, job_id: str) -> bool:
+        return self._status.get(job_id, CANCELLED) == CANCELLED
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, seq);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_job ON events (job_id);
+"""
+
+
+class SQLiteBroker(Broker):
+    """
+    Broker backed by one SQLite file, shared by the web tier and any number
+    of worker processes on the same host (or volume). Each process tails
+    the events table with a single cursor and hands events to its local
+    subscribers, so polling cost doesn't grow with the number of streams.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        poll_interval: float = JOB_POLL_INTERVAL_S,
+        report_interval: float = PLAN_QUEUE_REPORT_S,
+        heartbeat: float = PLAN_QUEUE_HEARTBEAT_S,
+        retention: float = JOB_RETENTION_S,
+    ):
+        super().__init__(report_interval, heartbeat)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _run(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._lock:
+            return operation(self._conn)
+
+    async def _call(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        return await asyncio.to_thread(self._run, operation)
+
+    async def enqueue(self, job_id: str, payload: Dict[str, Any]) -> None:
+        await self._call(
+            lambda c: c.execute(
+                "INSERT INTO jobs (id, payload, status, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, json.dumps(payload), QUEUED, time.time()),
+            )
+        )
+
+    async def queued_ids(self) -> List[str]:
+        rows = await self._call(
+            lambda c: c.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY seq", (QUEUED,)
+            ).fetchall()
+        )
+        return [row[0] for row in rows]
+
+    async def cancel(self, job_id: str) -> None:
+        await self._call(
+            lambda c: c.execute(
+                "UPDATE jobs SET status = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, job_id, QUEUED, RUNNING),
+            )
+        )
+
+    async def delete(self, job_id: str) -> None:
+        def delete(c: sqlite3.Connection) -> None:
+            c.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            c.execute("DELETE FROM events WHERE job_id = ?", (job_id,))
+
+        await self._call(delete)
+
+    async def claim(self) -> Job:
+        def claim(c: sqlite3.Connection) -> Optional[Job]:
+            # BEGIN IMMEDIATE takes the write lock, so two workers can't claim the same row
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                row = c.execute(
+                    "SELECT id, payload FROM jobs WHERE status = ? ORDER BY seq LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    c.execute("UPDATE jobs SET status = ? WHERE id = ?", (RUNNING, row[0]))
+                c.execute("COMMIT")
+            except BaseException:
+                c.execute("ROLLBACK")
+                raise
+            return Job(row[0], json.loads(row[1])) if row else None
+
+        while True:
+            job = await self._call(claim)
+            if job is not None:
+                return job
+            await asyncio.sleep(self.poll_interval)
+
+    async def publish(self, job_id: str, event: str, data: str) -> None:
+        await self._call(
+            lambda c: c.execute(
+                "INSERT INTO events (job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, event, data, time.time()),
+            )
+        )
+
+    async def finish(self, job_id: str) -> None:
+        await self._call(
+            lambda c: c.execute(
+                "UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (DONE, job_id, RUNNING)
+            )
+        )
+
+    async def cancelled(self, job_id: str) -> bool:
+        row = await self._call(
+            lambda c: c.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        )
+        return row is None or row[0] == CANCELLED
+
+    def _background_tasks(self) -> List[asyncio.Task]:
+        # Read before the first job is enqueued (this runs inside `submit`);
+        # reading it in the task could skip events a fast worker already wrote
+        row = self._run(lambda c: c.execute("SELECT MAX(seq) FROM events").fetchone())
+        return [
+            asyncio.create_task(self._tail_events(row[0] or 0), name="job-events"),
+            asyncio.create_task(self._purge(), name="job-purge"),
+        ]
+
+    async def _tail_events(self, cursor: int) -> None:
+        while True:
+            try:
+                if self._subscribers:
+                    rows = await self._call(
+                        lambda c: c.execute(
+                            "SELECT seq, job_id, event, data FROM events WHERE seq > ? ORDER BY seq LIMIT 500",
+                            (cursor,),
+                        ).fetchall()
+                    )
+                    for seq, job_id, event, data in rows:
+                        cursor = seq
+                        self._deliver(job_id, event, data)
+                    if len(rows) == 500:
+                        continue
+            except Exception:
+                logger.exception("Failed to read job events")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _purge(self) -> None:
+        # Jobs whose subscriber vanished without forgetting them (e.g. a crashed web process)
+        while True:
+            cutoff = time.time() - self.retention
+
+            def purge(c: sqlite3.Connection) -> None:
+                c.execute("DELETE FROM jobs WHERE created_at < ?", (cutoff,))
+                c.execute("DELETE FROM events WHERE created_at < ?", (cutoff,))
+
+            try:
+                await self._call(purge)
+            except Exception:
+                logger.exception("Failed to purge old jobs")
+            await asyncio.sleep(min(self.retention, 60))
+
+    async def close(self) -> None:
+        await super().close()
+        self._run(lambda c: c.close())
+
+
+def create_broker(url: str) -> Broker:
+    """
+    `memory://` or `sqlite:///relative/path.db` / `sqlite:////absolute/path.db`.
+    """
+    if url.startswith("memory://"):
+        return InMemoryBroker()
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported JOB_BROKER_URL '{url}'")
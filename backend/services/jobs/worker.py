@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from prometheus_client import Gauge
+
+from services.jobs.broker import ERROR, Broker, Job
+
+JOB_CANCEL_POLL_S = float(os.getenv("JOB_CANCEL_POLL_S", "0.25"))
+JOB_SHUTDOWN_GRACE_S = float(os.getenv("JOB_SHUTDOWN_GRACE_S", "30"))
+
+PLANS_RUNNING = Gauge("travel_plans_running", "Plan jobs being executed by this process")
+
+logger = logging.getLogger(__name__)
+
+Report = Callable[[str, str], Awaitable[None]]
+# Runs one job; returns the terminal (event, data) pair to publish
+Handler = Callable[[Dict[str, Any], Report], Awaitable[Tuple[str, str]]]
+
+
+class Worker:
+    """
+    Executes up to `concurrency` jobs at a time from a broker. A job is
+    cancelled as soon as the broker reports nobody is waiting for it.
+    """
+
+    def __init__(
+        self,
+        broker: Broker,
+        handler: Handler,
+        concurrency: int,
+        name: Optional[str] = None,
+        cancel_poll: float = JOB_CANCEL_POLL_S,
+    ):
+        self.broker = broker
+        self.handler = handler
+        self.concurrency = concurrency
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.cancel_poll = cancel_poll
+        self.running = 0
+        self._consumers: Set[asyncio.Task] = set()
+        self._idle: Set[asyncio.Task] = set()
+        self._jobs: Set[asyncio.Task] = set()
+        self._stopping = False
+        self._stopped = asyncio.Event()
+
+    def start(self) -> None:
+        for i in range(self.concurrency):
+            task = asyncio.create_task(self._consume(), name=f"{self.name}-{i}")
+            self._consumers.add(task)
+
+    async def run(self) -> None:
+        """
+        Start and block until `stop` is called.
+        """
+        self.start()
+        await self._stopped.wait()
+
+    async def stop(self, grace: float = JOB_SHUTDOWN_GRACE_S) -> None:
+        """
+        Stop claiming, give running jobs `grace` seconds, then cancel them.
+        """
+        self._stopping = True
+        for task in self._idle:
+            task.cancel()
+        if self._jobs:
+            logger.info("Waiting for %d running plan jobs", len(self._jobs))
+            await asyncio.wait(self._jobs, timeout=grace)
+        for task in self._jobs:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers.clear()
+        self._stopped.set()
+
+    async def _consume(self) -> None:
+        consumer = asyncio.current_task()
+        while not self._stopping:
+            self._idle.add(consumer)
+            try:
+                job = await self.broker.claim()
+            except Exception:
+                logger.exception("Failed to claim a plan job")
+                await asyncio.sleep(1)
+                continue
+            finally:
+                self._idle.discard(consumer)
+            await self._execute(job)
+
+    async def _execute(self, job: Job) -> None:
+        async def report(event: str, data: str) -> None:
+            await self.broker.publish(job.id, event, data)
+
+        self.running += 1
+        PLANS_RUNNING.inc()
+        task = asyncio.create_task(self.handler(job.payload, report))
+        self._jobs.add(task)
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.cancel_poll)
+                if not task.done() and await self.broker.cancelled(job.id):
+                    logger.debug("Plan job %s abandoned, cancelling", job.id)
+                    task.cancel()
+            try:
+                event, data = task.result()
+            except asyncio.CancelledError:
+                if not await self.broker.cancelled(job.id):
+                    # Shut down mid-job: tell the waiting stream instead of leaving it hanging
+                    await report(ERROR, json.dumps({"detail": "Plan worker shut down; please try again."}))
+                return
+            except Exception as e:
+                logger.exception("Plan job %s failed", job.id)
+                event, data = ERROR, json.dumps({"detail": str(e) or type(e).__name__})
+            await report(event, data)
+            await self.broker.finish(job.id)
+        finally:
+            if not task.done():
+                task.cancel()
+            self._jobs.discard(task)
+            self.running -= 1
+            PLANS_RUNNING.dec()
@@ -1,48 +1,125 @@
+import logging
+import os
+import httpx
 import requests
 from models.route_request import RouteGenerationRequest
 from models.llm_suggestion import LLMPOISuggestion
-from typing import List
+from typing import List, Optional
+from urllib.parse import quote
 from fastapi import HTTPException
+from common.http import AsyncServiceClient, CircuitOpenError, ServiceClient
+from common.telemetry import timed
 
-BASE_URL = "http://maps-service:8000"
+logger = logging.getLogger(__name__)
 
+BASE_URL = os.getenv("MAPS_SERVICE_URL", "http://maps-service:8000")
 
-def call_pois_from_maps_service(
+# Plans call maps_service asynchronously, the session endpoints from sync
+# handlers; both pools share one circuit breaker for maps_service
+maps_service = AsyncServiceClient("maps_service", BASE_URL)
+maps_service_sync = ServiceClient("maps_service", BASE_URL)
+
+
+def _unavailable(e: CircuitOpenError) -> HTTPException:
+    logger.error("maps_service unavailable: %s", e)
+    return HTTPException(
+        status_code=503, detail="Route planning is unavailable; please try again shortly."
+    )
+
+
+@timed("maps_pois")
+async def call_pois_from_maps_service(
     payload: RouteGenerationRequest,
 ) -> List[LLMPOISuggestion]:
-    print("🔍 Sending payload to maps_service /pois/:", payload)
+    logger.debug("🔍 Sending payload to maps_service /pois/: %s", payload)
     try:
-        response = requests.post(
-            f"{BASE_URL}/pois/", json=payload.model_dump(), timeout=30
+        # Read-only on the maps side, so safe to retry
+        response = await maps_service.request(
+            "POST", "/pois/", json=payload.model_dump(), idempotent=True, timeout=30
         )
         response.raise_for_status()
         pois_data = response.json()
         return [LLMPOISuggestion(**poi) for poi in pois_data]
-    except requests.HTTPError as http_err:
-        print(f"❌ maps_service /pois/ error response: {http_err.response.text}")
-        print("❗ Response content:", response.text)
+    except httpx.HTTPStatusError as http_err:
+        logger.error("❌ maps_service /pois/ error response: %s", http_err.response.text)
         raise HTTPException(
             status_code=response.status_code,
             detail=response.json().get("detail", "Unknown error from maps_service"),
         )
+    except CircuitOpenError as e:
+        raise _unavailable(e)
     except Exception as e:
-        print("❗ Response content:", response.text)
         raise Exception(f"Failed to fetch POIs from maps_service: {e}")
 
 
-def call_optimized_routes_from_maps_service(
+@timed("maps_routes")
+async def call_optimized_routes_from_maps_service(
     request: RouteGenerationRequest, pois: List[LLMPOISuggestion]
 ) -> dict:
     try:
-        response = requests.post(
-            f"{BASE_URL}/routes/optimized",
+        # Not retried: each call stores a new plan session on the maps side
+        response = await maps_service.request(
+            "POST",
+            "/routes/optimized",
             json={
                 "request": request.model_dump(),
                 "pois": [p.model_dump() for p in pois],
             },
+            idempotent=False,
             timeout=20,
         )
         response.raise_for_status()
         return response.json()
+    except CircuitOpenError as e:
+        raise _unavailable(e)
     except Exception as e:
         raise Exception(f"Failed to call maps_service for optimized routes: {e}")
+
+
+def _call_session_endpoint(method: str, path: str, body: Optional[dict] = None) -> dict:
+    """
+    Call one of maps_service's /sessions endpoints, passing its errors through
+    (a 404 means the session expired and the plan must be generated again).
+    """
+    try:
+        # Not retried: these edit the session, and a repeated stop removal would 404
+        response = maps_service_sync.request(
+            method, f"/sessions/{path}", json=body, idempotent=False, timeout=20
+        )
+    except (requests.RequestException, CircuitOpenError) as e:
+        logger.error("maps_service session call failed: %s", e)
+        raise HTTPException(
+            status_code=503, detail="Route editing is unavailable; please try again shortly."
+        )
+    if response.status_code >= 400:
+        try:
+            detail = response.json().get("detail", "Unknown error from maps_service")
+        except ValueError:
+            detail = response.text or "Unknown error from maps_service"
+        raise HTTPException(status_code=response.status_code, detail=detail)
+    return response.json()
+
+
+@timed("maps_replan")
+def call_replan_from_maps_service(
+    session_id: str, num_pois: Optional[int] = None, travel_mode: Optional[str] = None
+) -> dict:
+    return _call_session_endpoint(
+        "POST",
+        f"{session_id}/replan",
+        {"num_pois": num_pois, "travel_mode": travel_mode},
+    )
+
+
+@timed("maps_replan")
+def call_add_stop_from_maps_service(session_id: str, route_index: int, poi_id: str) -> dict:
+    return _call_session_endpoint(
+        "POST", f"{session_id}/routes/{route_index}/stops", {"poi_id": poi_id}
+    )
+
+
+@timed("maps_replan")
+def call_remove_stop_from_maps_service(session_id: str, route_index: int, poi_id: str) -> dict:
+    return _call_session_endpoint(
+        "DELETE", f"{session_id}/routes/{route_index}/stops/{quote(poi_id, safe='')}"
+    )
@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from models.route_request import RouteGenerationRequest
+
+PLAN_CACHE_TTL_S = float(os.getenv("PLAN_CACHE_TTL_S", "600"))
+PLAN_CACHE_STALE_TTL_S = float(os.getenv("PLAN_CACHE_STALE_TTL_S", "3600"))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "256"))
+
+logger = logging.getLogger(__name__)
+
+# Receives a computation's progress as (event, data)
+Progress = Callable[[str, str], None]
+
+# Cache lookup outcomes
+HIT = "hit"
+STALE = "stale"
+MISS = "miss"
+SHARED = "shared"
+
+
+def canonical_plan_key(request: RouteGenerationRequest) -> str:
+    """
+    Normalize a request so that trivially different spellings of the same
+    plan ("Tel Aviv " vs "tel aviv", "art, food" vs "food,art") share a key.
+    """
+    interests = sorted(
+        {term.strip().lower() for term in request.interests.split(",") if term.strip()}
+    )
+    return json.dumps(
+        {
+            "location": " ".join(request.location.lower().split()),
+            "interests": interests,
+            "radius_km": round(request.radius_km, 2),
+            "num_routes": request.num_routes,
+            "num_pois": request.num_pois,
+            "travel_mode": request.travel_mode.strip().lower(),
+        },
+        sort_keys=True,
+    )
+
+
+def plan_seed(key: str) -> int:
+    """
+    Stable 32-bit seed for a plan key, so refreshes reproduce the same variants.
+    """
+    return int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    # Also marks the exception as retrieved when every waiter has gone away
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Plan computation failed: %s", task.exception())
+
+
+@dataclass
+class _Entry:
+    value: Any
+    stored_at: float
+
+
+class PlanCache:
+    """
+    In-memory cache of full route plans with stale-while-revalidate.
+
+    Entries younger than `ttl` are served as-is. Entries younger than
+    `ttl + stale_ttl` are served immediately while a background refresh runs.
+    Concurrent misses for the same key share a single computation, which is
+    cancelled once every waiter has gone away (background refreshes are not).
+    Its progress reaches every waiter, including those that joined late.
+    """
+
+    def __init__(
+        self,
+        ttl: float = PLAN_CACHE_TTL_S,
+        stale_ttl: float = PLAN_CACHE_STALE_TTL_S,
+        max_entries: int = PLAN_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self._background: Set[str] = set()
+        self._listeners: Dict[str, List[Progress]] = {}
+        # Latest progress of each computation, replayed to waiters that join it
+        self._last_progress: Dict[str, Tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[Progress], Awaitable[Any]],
+        progress: Optional[Progress] = None,
+    ) -> Tuple[Any, str]:
+        """
+        Return `(value, outcome)` where outcome is one of HIT, STALE, MISS or SHARED.
+        Errors from `compute` are raised to every waiter and never cached.
+        `compute` reports through the callback it is given; that reaches the
+        `progress` of every caller waiting for it. Nobody hears a background
+        refresh, since its caller has already been answered.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._clock() - entry.stored_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                return entry.value, HIT
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self._refresh(key, compute)
+                return entry.value, STALE
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            return await self._join(key, task, progress), SHARED
+        return await self._join(key, self._start(key, compute), progress), MISS
+
+    async def _join(self, key: str, task: asyncio.Task, progress: Optional[Progress]) -> Any:
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        if progress is not None:
+            self._listeners.setdefault(key, []).append(progress)
+            if key in self._last_progress:
+                progress(*self._last_progress[key])
+        try:
+            # shield: one waiter going away must not cancel the shared work
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1 and key not in self._background and not task.done():
+                logger.debug("Last waiter left, cancelling plan computation")
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+            if progress is not None:
+                listeners = self._listeners[key]
+                listeners.remove(progress)
+                if not listeners:
+                    del self._listeners[key]
+
+    def _start(
+        self, key: str, compute: Callable[[Progress], Awaitable[Any]], background: bool = False
+    ) -> asyncio.Task:
+        def report(event: str, data: str) -> None:
+            self._last_progress[key] = (event, data)
+            for listener in list(self._listeners.get(key, ())):
+                listener(event, data)
+
+        async def run() -> Any:
+            try:
+                value = await compute(report)
+                self._store(key, value)
+                return value
+            finally:
+                self._inflight.pop(key, None)
+                self._background.discard(key)
+                self._last_progress.pop(key, None)
+
+        task = asyncio.create_task(run())
+        task.add_done_callback(_log_failure)
+        self._inflight[key] = task
+        if background:
+            self._background.add(key)
+        return task
+
+    def _refresh(self, key: str, compute: Callable[[Progress], Awaitable[Any]]) -> None:
+        if key not in self._inflight:
+            self._start(key, compute, background=True)
+
+    def _store(self, key: str, value: Any) -> None:
+        self._entries[key] = _Entry(value=value, stored_at=self._clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+plan_cache = PlanCache()
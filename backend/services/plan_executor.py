@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from prometheus_client import Gauge
+
+from models.route_request import RouteGenerationRequest
+from services.jobs.broker import COMPLETE, ERROR, Broker, create_broker
+from services.jobs.worker import Worker
+from services.plan_jobs import plan_job_error, plan_job_payload, run_plan_job
+
+JOB_BROKER_URL = os.getenv("JOB_BROKER_URL", "memory://")
+# Plans the web process runs itself; defaults to PLAN_MAX_CONCURRENT with the
+# in-memory broker and to 0 otherwise (separate `worker.py` processes do the work)
+PLAN_LOCAL_WORKERS = os.getenv("PLAN_LOCAL_WORKERS")
+PLAN_MAX_CONCURRENT = int(os.getenv("PLAN_MAX_CONCURRENT", "8"))
+PLAN_MAX_QUEUED = int(os.getenv("PLAN_MAX_QUEUED", "200"))
+PLAN_MAX_PER_CLIENT = int(os.getenv("PLAN_MAX_PER_CLIENT", "3"))
+# A client is its peer address, which behind a reverse proxy is the proxy for
+# everyone. Name a header the proxy overwrites with the real address (the
+# frontend's nginx sets X-Real-IP) to count per user instead; only set it when
+# the backend can't be reached around the proxy, or clients can pick their own
+PLAN_CLIENT_HEADER = os.getenv("PLAN_CLIENT_HEADER")
+# Give up on a job that has sent nothing for this long; waiting jobs re-send
+# their queue position every PLAN_QUEUE_HEARTBEAT_S, so this only fires once
+# a job is lost or stuck
+JOB_TIMEOUT_S = float(os.getenv("JOB_TIMEOUT_S", "120"))
+
+PLAN_STREAMS = Gauge("travel_plan_streams", "Open /route-progress streams")
+
+logger = logging.getLogger(__name__)
+
+
+class PlanLimitError(Exception):
+    """
+    Raised when a plan can't be accepted: the client has too many open
+    streams or the job queue is full.
+    """
+
+
+class PlanExecutor:
+    """
+    Hands plans to workers through a job broker and relays their progress.
+
+    With the default in-memory broker the workers run inside this process;
+    with a shared broker (JOB_BROKER_URL=sqlite:///...) they run as separate
+    `worker.py` processes and the web tier only waits on events. Each client
+    may hold a few open /route-progress streams, and the queue is bounded.
+    """
+
+    def __init__(
+        self,
+        broker_url: str = JOB_BROKER_URL,
+        local_workers: Optional[int] = None,
+        max_queued: int = PLAN_MAX_QUEUED,
+        max_per_client: int = PLAN_MAX_PER_CLIENT,
+        timeout: float = JOB_TIMEOUT_S,
+    ):
+        if local_workers is None:
+            local_workers = (
+                int(PLAN_LOCAL_WORKERS)
+                if PLAN_LOCAL_WORKERS is not None
+                else PLAN_MAX_CONCURRENT if broker_url.startswith("memory://") else 0
+            )
+        self.broker_url = broker_url
+        self.local_workers = local_workers
+        self.max_queued = max_queued
+        self.max_per_client = max_per_client
+        self.timeout = timeout
+        self.broker: Optional[Broker] = None
+        self.worker: Optional[Worker] = None
+        self._streams: Dict[str, int] = {}
+
+    @contextmanager
+    def stream(self, client_id: str) -> Iterator[None]:
+        """
+        Hold one of the client's stream slots for the lifetime of a stream.
+        """
+        open_streams = self._streams.get(client_id, 0)
+        if open_streams >= self.max_per_client:
+            raise PlanLimitError(
+                f"You already have {open_streams} route plans in progress; "
+                "wait for one to finish."
+            )
+        self._streams[client_id] = open_streams + 1
+        PLAN_STREAMS.inc()
+        try:
+            yield
+        finally:
+            PLAN_STREAMS.dec()
+            remaining = self._streams[client_id] - 1
+            if remaining:
+                self._streams[client_id] = remaining
+            else:
+                del self._streams[client_id]
+
+    def start(self) -> Broker:
+        """
+        Create the broker (and local workers) on first use, inside the running loop.
+        """
+        if self.broker is None:
+            self.broker = create_broker(self.broker_url)
+            if self.local_workers:
+                self.worker = Worker(self.broker, run_plan_job, self.local_workers)
+                self.worker.start()
+            logger.info(
+                "Plan jobs via %s with %d local workers", self.broker_url, self.local_workers
+            )
+        return self.broker
+
+    async def submit(
+        self, request_data: RouteGenerationRequest, report: Callable[[str, str], None]
+    ) -> dict:
+        """
+        Run one plan as a job and return its routes. Stage and queue-position
+        updates go to `report(event, data)`. Cancelling this call cancels the job.
+        """
+        broker = self.start()
+        if len(await broker.queued_ids()) >= self.max_queued:
+            raise PlanLimitError("The server is busy planning other routes; please try again shortly.")
+
+        job_id = uuid.uuid4().hex
+        events = await broker.submit(job_id, plan_job_payload(request_data))
+        finished = False
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(events.get(), self.timeout)
+                except asyncio.TimeoutError:
+                    raise PlanLimitError("Route planning timed out; please try again.")
+                if event == COMPLETE:
+                    finished = True
+                    return json.loads(data)
+                if event == ERROR:
+                    finished = True
+                    raise plan_job_error(json.loads(data))
+                report(event, data)
+        finally:
+            if not finished:
+                # Nobody is waiting any more: free the worker
+                await asyncio.shield(broker.cancel(job_id))
+            await asyncio.shield(broker.forget(job_id))
+
+    async def close(self) -> None:
+        if self.worker is not None:
+            await self.worker.stop()
+            self.worker = None
+        if self.broker is not None:
+            await self.broker.close()
+            self.broker = None
+
+
+plan_executor = PlanExecutor()
@@ -0,0 +1,77 @@
+import json
+import logging
+import traceback
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import HTTPException
+
+from common.telemetry import request_id_var
+from models.route_request import RouteGenerationRequest
+from services.jobs.broker import COMPLETE, ERROR
+from services.maps.maps_client import (
+    call_optimized_routes_from_maps_service,
+    call_pois_from_maps_service,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class NoPOIsFoundError(Exception):
+    pass
+
+
+class PlanJobError(Exception):
+    pass
+
+
+async def build_plan(
+    request_data: RouteGenerationRequest, report: Callable[[str], Awaitable[None]]
+) -> dict:
+    """
+    Run the full maps_service chain for one request, reporting each stage.
+    """
+    await report("Fetching POIs from maps_service")
+    pois = await call_pois_from_maps_service(request_data)
+    if not pois:
+        raise NoPOIsFoundError()
+
+    await report("Generating optimized routes")
+    return await call_optimized_routes_from_maps_service(request_data, pois)
+
+
+def plan_job_payload(request_data: RouteGenerationRequest) -> Dict[str, Any]:
+    return {"request": request_data.model_dump(), "request_id": request_id_var.get()}
+
+
+async def run_plan_job(
+    payload: Dict[str, Any], report: Callable[[str, str], Awaitable[None]]
+) -> Tuple[str, str]:
+    """
+    Worker-side handler: build the plan and encode the outcome as a terminal event.
+    """
+    # Keep the web request's ID on the upstream calls made by this job
+    request_id_var.set(payload.get("request_id"))
+    request_data = RouteGenerationRequest(**payload["request"])
+    try:
+        routes = await build_plan(request_data, lambda stage: report("stage", stage))
+        return COMPLETE, json.dumps(routes)
+    except NoPOIsFoundError:
+        return ERROR, json.dumps({"kind": "no_pois"})
+    except HTTPException as e:
+        return ERROR, json.dumps({"kind": "http", "status": e.status_code, "detail": e.detail})
+    except Exception as e:
+        logger.exception("❌ Plan job failed")
+        detail = str(e) or traceback.format_exc(limit=1).splitlines()[-1]
+        return ERROR, json.dumps({"kind": "error", "detail": detail})
+
+
+def plan_job_error(error: Dict[str, Any]) -> Exception:
+    """
+    Turn an error event back into the exception the plan raised.
+    """
+    kind = error.get("kind")
+    if kind == "no_pois":
+        return NoPOIsFoundError()
+    if kind == "http":
+        return HTTPException(status_code=error["status"], detail=error["detail"])
+    return PlanJobError(error.get("detail") or "Plan generation failed")
@@ -0,0 +1,10 @@
+import sys
+from pathlib import Path
+
+# Mirror the container layout: the backend root and the shared `models`
+# package must both be importable.
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+REPO_DIR = BACKEND_DIR.parent
+for path in (BACKEND_DIR, REPO_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,174 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from common.errors import UPSTREAM_ERROR_HEADER
+from common.http import (
+    AsyncServiceClient,
+    CircuitBreaker,
+    CircuitOpenError,
+    ServiceClient,
+    backoff_delays,
+)
+
+
+class Upstream:
+    """
+    Keep-alive HTTP server answering with scripted statuses (None: a slow 200;
+    "upstream-502": a 502 marked as an upstream's failure; plain 200 once the
+    script runs out), counting the connections it accepted.
+    """
+
+    def __init__(self):
+        self.statuses = []
+        self.connections = 0
+        self.calls = 0
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                upstream.connections += 1
+                super().setup()
+
+            def answer(self):
+                upstream.calls += 1
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status = upstream.statuses.pop(0) if upstream.statuses else 200
+                if status is None:  # too slow
+                    time.sleep(0.5)
+                    status = 200
+                marked = status == "upstream-502"
+                self.send_response(502 if marked else status)
+                if marked:
+                    self.send_header(UPSTREAM_ERROR_HEADER, "overpass")
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            do_GET = do_POST = answer
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def upstream():
+    server = Upstream()
+    yield server
+    server.close()
+
+
+def no_wait(monkeypatch):
+    monkeypatch.setattr("common.http.BACKOFF_BASE_S", 0)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_trial():
+    clock = Clock()
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout_s=10, clock=clock)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 10
+    breaker.before_call()  # the trial call
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.before_call()
+
+
+def test_backoff_is_jittered_under_an_exponential_cap():
+    delays = backoff_delays(base_s=0.1, cap_s=1, rng=lambda: 1.0)
+    assert [round(next(delays), 3) for _ in range(6)] == [0.1, 0.2, 0.4, 0.8, 1, 1]
+    assert next(backoff_delays(rng=lambda: 0.0)) == 0
+
+
+def test_sync_client_reuses_connections(upstream):
+    client = ServiceClient("pooled", upstream.url, breaker=CircuitBreaker("pooled"))
+    for _ in range(5):
+        assert client.request("GET", "/x").status_code == 200
+    assert upstream.connections == 1
+    client.close()
+
+
+def test_only_idempotent_calls_are_retried(upstream, monkeypatch):
+    no_wait(monkeypatch)
+    client = ServiceClient("retried", upstream.url, retries=2, breaker=CircuitBreaker("retried"))
+
+    upstream.statuses = [502, 504]
+    assert client.request("GET", "/x").status_code == 200
+    assert upstream.calls == 3
+
+    upstream.statuses = [502]
+    assert client.request("POST", "/x").status_code == 502
+    upstream.statuses = [503]
+    assert client.request("GET", "/x").status_code == 503
+    upstream.statuses = [None]
+    with pytest.raises(requests.ReadTimeout):
+        client.request("GET", "/x", timeout=0.1)
+    assert upstream.calls == 6
+
+
+def test_only_gateway_timeouts_count_against_the_breaker(upstream, monkeypatch):
+    no_wait(monkeypatch)
+    breaker = CircuitBreaker("statuses", failure_threshold=3)
+    client = ServiceClient("statuses", upstream.url, retries=2, breaker=breaker)
+
+    # The downstream is up: it is over budget, or one of its upstreams is down
+    upstream.statuses = [503, 503, "upstream-502", 503]
+    assert [client.request("GET", "/x").status_code for _ in range(4)] == [503, 503, 502, 503]
+    assert upstream.calls == 4  # the marked 502 wasn't retried either
+    assert not breaker.is_open
+
+    upstream.statuses = [504, 504, 504]
+    assert client.request("GET", "/x").status_code == 504
+    assert breaker.is_open
+
+
+def test_unreachable_downstream_opens_the_circuit(monkeypatch):
+    no_wait(monkeypatch)
+    breaker = CircuitBreaker("down", failure_threshold=2, reset_timeout_s=60)
+    # Nothing listens on port 9 (discard) locally
+    client = ServiceClient("down", "http://127.0.0.1:9", retries=1, breaker=breaker)
+    with pytest.raises(requests.ConnectionError):
+        client.request("GET", "/x", timeout=1)
+    with pytest.raises(CircuitOpenError):
+        client.request("GET", "/x", timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_async_client_pools_and_retries(upstream, monkeypatch):
+    no_wait(monkeypatch)
+    client = AsyncServiceClient("pooled_async", upstream.url, breaker=CircuitBreaker("pooled_async"))
+    upstream.statuses = [502]
+    for _ in range(5):
+        assert (await client.request("POST", "/x", json={}, idempotent=True)).status_code == 200
+    await client.aclose()
+
+    assert upstream.calls == 6
+    assert upstream.connections == 1
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from services.jobs.broker import COMPLETE, InMemoryBroker, SQLiteBroker
+from services.jobs.worker import Worker
+
+
+def make_handler(delay=0.05, started=None, cancelled=None):
+    async def handler(payload, report):
+        if started is not None:
+            started.append(payload["n"])
+        await report("stage", f"working on {payload['n']}")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.append(payload["n"])
+            raise
+        return COMPLETE, str(payload["n"] * 2)
+
+    return handler
+
+
+async def drain(events):
+    seen = []
+    while True:
+        event, data = await asyncio.wait_for(events.get(), 2)
+        seen.append((event, data))
+        if event == COMPLETE:
+            return seen
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def brokers(request, tmp_path):
+    # (web-side broker, worker-side broker); SQLite uses two connections like two processes
+    if request.param == "memory":
+        broker = InMemoryBroker(report_interval=0.01)
+        return broker, broker
+    path = str(tmp_path / "jobs.db")
+    return (
+        SQLiteBroker(path, poll_interval=0.01, report_interval=0.01),
+        SQLiteBroker(path, poll_interval=0.01),
+    )
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_and_report_progress(brokers):
+    web, remote = brokers
+    worker = Worker(remote, make_handler(), concurrency=2, cancel_poll=0.01)
+    worker.start()
+    try:
+        streams = [await web.submit(f"job-{n}", {"n": n}) for n in range(3)]
+        results = [await drain(events) for events in streams]
+    finally:
+        await worker.stop(grace=1)
+        await web.close()
+        await remote.close()
+
+    for n, seen in enumerate(results):
+        assert ("stage", f"working on {n}") in seen
+        assert seen[-1] == (COMPLETE, str(n * 2))
+    # Only two slots: the third job had to wait and was told so
+    assert ("queued", "1") in results[2]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_jobs_are_skipped_or_stopped(brokers):
+    web, remote = brokers
+    started, cancelled = [], []
+    worker = Worker(remote, make_handler(10, started, cancelled), concurrency=1, cancel_poll=0.01)
+    worker.start()
+    try:
+        await web.submit("running", {"n": 1})
+        await web.submit("waiting", {"n": 2})
+        await asyncio.sleep(0.1)
+        await web.cancel("waiting")
+        await web.cancel("running")
+        await asyncio.sleep(0.1)
+    finally:
+        await worker.stop(grace=1)
+        await web.close()
+        await remote.close()
+
+    assert started == [1]
+    assert cancelled == [1]
+    assert worker.running == 0
+
+
+@pytest.mark.asyncio
+async def test_waiting_jobs_resend_their_position():
+    broker = InMemoryBroker(report_interval=0.01, heartbeat=0.05)
+    try:
+        events = await broker.submit("waiting", {"n": 1})
+        await asyncio.sleep(0.2)
+    finally:
+        await broker.close()
+    seen = [events.get_nowait() for _ in range(events.qsize())]
+    # Nothing else happens while nobody claims it, so the position is repeated
+    assert len(seen) >= 3
+    assert set(seen) == {("queued", "1")}
+
+
+@pytest.mark.asyncio
+async def test_sqlite_stream_starts_at_submit(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    web, remote = SQLiteBroker(path, poll_interval=0.01), SQLiteBroker(path, poll_interval=0.01)
+    try:
+        await remote.publish("job", "stage", "from an earlier run")
+        events = await web.submit("job", {"n": 1})
+        # A worker fast enough to answer before the web tier's first poll
+        await remote.publish("job", COMPLETE, "2")
+        seen = await drain(events)
+        assert [e for e in seen if e[0] != "queued"] == [(COMPLETE, "2")]
+    finally:
+        await web.close()
+        await remote.close()
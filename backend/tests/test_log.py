@@ -0,0 +1,57 @@
+import io
+import json
+import logging
+
+import pytest
+
+from common.log import configure_logging, sample, shutdown_logging
+from common.telemetry import request_id_var
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    configure_logging("test_service", level="INFO", fmt="json", stream=stream)
+    yield stream
+    configure_logging("test_service", level="WARNING")
+
+
+def flushed_lines(stream):
+    shutdown_logging()  # stops the listener after draining the queue
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_carry_service_and_request_id(log_stream):
+    token = request_id_var.set("trace-42")
+    try:
+        logging.getLogger("demo").info("hello %s", "world")
+    finally:
+        request_id_var.reset(token)
+
+    [entry] = flushed_lines(log_stream)
+    assert entry["message"] == "hello world"
+    assert entry["service"] == "test_service"
+    assert entry["request_id"] == "trace-42"
+    assert entry["level"] == "INFO"
+
+
+def test_debug_is_filtered_before_formatting(log_stream):
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("formatted a disabled record")
+
+    logging.getLogger("demo").debug("value: %s", Exploding())
+    assert flushed_lines(log_stream) == []
+
+
+def test_arguments_are_captured_at_call_time(log_stream):
+    items = ["a"]
+    logging.getLogger("demo").warning("items: %s", items)
+    items.append("b")
+    [entry] = flushed_lines(log_stream)
+    assert entry["message"] == "items: ['a']"
+
+
+def test_sample_keeps_first_and_every_nth():
+    kept = [sample("test_sample_key", every=3) for _ in range(7)]
+    assert kept == [True, False, False, True, False, False, True]
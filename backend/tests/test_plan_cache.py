@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+from models.route_request import RouteGenerationRequest
+from services.plan_cache import (
+    HIT,
+    MISS,
+    SHARED,
+    STALE,
+    PlanCache,
+    canonical_plan_key,
+    plan_seed,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_request(**overrides):
+    fields = dict(
+        location="Tel Aviv",
+        interests="art, food",
+        radius_km=3,
+        num_routes=2,
+        num_pois=4,
+        travel_mode="walking",
+    )
+    fields.update(overrides)
+    return RouteGenerationRequest(**fields)
+
+
+def counting_compute(result="plan", delay=0.0):
+    calls = []
+
+    async def compute(report):
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return f"{result}-{len(calls)}"
+
+    return compute, calls
+
+
+def test_canonical_key_ignores_spelling_differences():
+    a = make_request(location="Tel Aviv", interests="art, food")
+    b = make_request(location="  tel   aviv ", interests="Food,ART,")
+    c = make_request(num_pois=5)
+    assert canonical_plan_key(a) == canonical_plan_key(b)
+    assert canonical_plan_key(a) != canonical_plan_key(c)
+    assert plan_seed(canonical_plan_key(a)) == plan_seed(canonical_plan_key(b))
+
+
+@pytest.mark.asyncio
+async def test_hit_after_miss():
+    cache = PlanCache(ttl=10, stale_ttl=10)
+    compute, calls = counting_compute()
+    assert await cache.get_or_compute("k", compute) == ("plan-1", MISS)
+    assert await cache.get_or_compute("k", compute) == ("plan-1", HIT)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_computation():
+    cache = PlanCache(ttl=10, stale_ttl=10)
+    compute, calls = counting_compute(delay=0.05)
+    results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(10)))
+    assert len(calls) == 1
+    assert {value for value, _ in results} == {"plan-1"}
+    assert sorted(outcome for _, outcome in results) == [MISS] + [SHARED] * 9
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_refreshing():
+    clock = FakeClock()
+    cache = PlanCache(ttl=10, stale_ttl=100, clock=clock)
+    compute, calls = counting_compute(delay=0.01)
+    await cache.get_or_compute("k", compute)
+
+    clock.now = 50
+    assert await cache.get_or_compute("k", compute) == ("plan-1", STALE)
+    await asyncio.sleep(0.05)
+    assert len(calls) == 2
+    assert await cache.get_or_compute("k", compute) == ("plan-2", HIT)
+
+    clock.now = 500  # past the stale window: recompute in the foreground
+    assert await cache.get_or_compute("k", compute) == ("plan-3", MISS)
+
+
+@pytest.mark.asyncio
+async def test_stale_refresh_does_not_report_to_the_caller():
+    clock = FakeClock()
+    cache = PlanCache(ttl=10, stale_ttl=100, clock=clock)
+    updates = []
+    compute, calls = counting_compute()
+
+    async def reporting(report):
+        report("stage", "working")
+        return await compute(report)
+
+    await cache.get_or_compute("k", reporting, progress=lambda *update: updates.append(update))
+    clock.now = 50
+    stale = await cache.get_or_compute("k", reporting, progress=lambda *update: updates.append(update))
+    assert stale == ("plan-1", STALE)
+    await asyncio.sleep(0.01)
+    assert await cache.get_or_compute("k", reporting) == ("plan-2", HIT)
+    assert updates == [("stage", "working")]
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached():
+    cache = PlanCache(ttl=10, stale_ttl=10)
+
+    async def failing(report):
+        raise RuntimeError("maps_service down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_compute("k", failing)
+    compute, _ = counting_compute()
+    assert await cache.get_or_compute("k", compute) == ("plan-1", MISS)
+
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used():
+    cache = PlanCache(ttl=10, stale_ttl=10, max_entries=2)
+    compute, _ = counting_compute()
+    for key in ("a", "b", "a", "c"):
+        await cache.get_or_compute(key, compute)
+    assert len(cache) == 2
+    assert (await cache.get_or_compute("a", compute))[1] == HIT
+    assert (await cache.get_or_compute("b", compute))[1] == MISS
+
+
+@pytest.mark.asyncio
+async def test_computation_cancelled_when_every_waiter_leaves():
+    cache = PlanCache(ttl=10, stale_ttl=10)
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def compute(report):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    first = asyncio.create_task(cache.get_or_compute("k", compute))
+    second = asyncio.create_task(cache.get_or_compute("k", compute))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()  # still wanted by the second waiter
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_progress_reaches_every_waiter():
+    cache = PlanCache(ttl=10, stale_ttl=10)
+    release = asyncio.Event()
+
+    async def compute(report):
+        report("queued", "2")
+        await release.wait()
+        report("stage", "routing")
+        return "plan"
+
+    first, second = [], []
+    leader = asyncio.create_task(
+        cache.get_or_compute("k", compute, progress=lambda *update: first.append(update))
+    )
+    await asyncio.sleep(0)
+    joiner = asyncio.create_task(
+        cache.get_or_compute("k", compute, progress=lambda *update: second.append(update))
+    )
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await leader == ("plan", MISS)
+    assert await joiner == ("plan", SHARED)
+    assert first == [("queued", "2"), ("stage", "routing")]
+    # The late joiner hears where the plan is, then what happens next
+    assert second == [("queued", "2"), ("stage", "routing")]
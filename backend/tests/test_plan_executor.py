@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from models.route_request import RouteGenerationRequest
+from services import plan_jobs
+from services.plan_executor import PlanExecutor, PlanLimitError
+from services.plan_jobs import NoPOIsFoundError
+
+REQUEST = RouteGenerationRequest(
+    location="Tel Aviv", interests="art", radius_km=3, num_routes=1, num_pois=2,
+    travel_mode="walking",
+)
+
+
+def test_per_client_stream_limit():
+    executor = PlanExecutor(max_per_client=2)
+    with executor.stream("1.2.3.4"), executor.stream("1.2.3.4"):
+        with pytest.raises(PlanLimitError):
+            with executor.stream("1.2.3.4"):
+                pass
+        with executor.stream("5.6.7.8"):
+            pass
+    with executor.stream("1.2.3.4"):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_submit_relays_stages_and_returns_routes(monkeypatch):
+    async def fake_pois(request):
+        return ["poi"]
+
+    async def fake_routes(request, pois):
+        return {"routes": [], "session_id": "s"}
+
+    monkeypatch.setattr(plan_jobs, "call_pois_from_maps_service", fake_pois)
+    monkeypatch.setattr(plan_jobs, "call_optimized_routes_from_maps_service", fake_routes)
+    executor = PlanExecutor(broker_url="memory://", local_workers=1)
+    updates = []
+    try:
+        result = await executor.submit(REQUEST, lambda *update: updates.append(update))
+    finally:
+        await executor.close()
+    assert result == {"routes": [], "session_id": "s"}
+    assert [event for event, _ in updates] == ["stage", "stage"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error, expected",
+    [(NoPOIsFoundError(), NoPOIsFoundError), (HTTPException(400, "bad"), HTTPException)],
+)
+async def test_worker_errors_are_raised_again(monkeypatch, error, expected):
+    async def failing(request):
+        raise error
+
+    monkeypatch.setattr(plan_jobs, "call_pois_from_maps_service", failing)
+    executor = PlanExecutor(broker_url="memory://", local_workers=1)
+    try:
+        with pytest.raises(expected):
+            await executor.submit(REQUEST, lambda *update: None)
+    finally:
+        await executor.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelling_submit_cancels_the_job_and_full_queue_is_rejected(monkeypatch):
+    cancelled = asyncio.Event()
+
+    async def slow(request):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(plan_jobs, "call_pois_from_maps_service", slow)
+    executor = PlanExecutor(broker_url="memory://", local_workers=1, max_queued=1)
+    executor.start()
+    executor.worker.cancel_poll = 0.01
+    try:
+        running = asyncio.create_task(executor.submit(REQUEST, lambda *update: None))
+        await asyncio.sleep(0.02)
+        queued = asyncio.create_task(executor.submit(REQUEST, lambda *update: None))
+        await asyncio.sleep(0.02)
+        with pytest.raises(PlanLimitError):
+            await executor.submit(REQUEST, lambda *update: None)
+
+        running.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        queued.cancel()
+        await asyncio.gather(running, queued, return_exceptions=True)
+    finally:
+        await executor.close()
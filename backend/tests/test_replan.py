@@ -0,0 +1,73 @@
+import httpx
+import pytest
+
+from common.http import CircuitOpenError
+from main import app
+from routers import replan
+from services.maps import maps_client
+from routers.routes_cache import routes_cache
+
+
+async def call(method, url, **kwargs):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, url, **kwargs)
+
+
+@pytest.fixture
+def maps_calls(monkeypatch):
+    calls = []
+
+    def fake(name):
+        def call_maps(session_id, *args, **kwargs):
+            calls.append((name, session_id, args, kwargs))
+            return {"routes": [], "stats": {"ors_calls": 1}, "session_id": f"{session_id}-{name}"}
+        return call_maps
+
+    monkeypatch.setattr(replan, "call_replan_from_maps_service", fake("replan"))
+    monkeypatch.setattr(replan, "call_add_stop_from_maps_service", fake("add"))
+    monkeypatch.setattr(replan, "call_remove_stop_from_maps_service", fake("remove"))
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_edits_update_the_cached_routes(maps_calls):
+    shared = {"routes": [], "session_id": "s1"}
+    routes_cache["r1"] = shared
+
+    response = await call("POST", "/routes/r1/replan", json={"travel_mode": "cycling"})
+    assert response.status_code == 200
+    assert routes_cache["r1"]["session_id"] == "s1-replan"
+    assert shared["session_id"] == "s1"
+
+    await call("POST", "/routes/r1/stops", json={"route_index": 0, "poi_id": "42"})
+    await call("DELETE", "/routes/r1/stops/42", params={"route_index": 0})
+    assert [c[0] for c in maps_calls] == ["replan", "add", "remove"]
+    assert maps_calls[-1][1:3] == ("s1-replan-add", (0, "42"))
+
+
+@pytest.mark.asyncio
+async def test_unknown_route_id_is_404(maps_calls):
+    response = await call("POST", "/routes/missing/replan", json={})
+    assert response.status_code == 404
+    assert maps_calls == []
+
+
+@pytest.mark.asyncio
+async def test_num_pois_must_be_positive(maps_calls):
+    routes_cache["r2"] = {"routes": [], "session_id": "s2"}
+    for num_pois in (0, -3):
+        response = await call("POST", "/routes/r2/replan", json={"num_pois": num_pois})
+        assert response.status_code == 422
+    assert maps_calls == []
+
+
+@pytest.mark.asyncio
+async def test_unavailable_maps_service_is_503(monkeypatch):
+    def circuit_open(*args, **kwargs):
+        raise CircuitOpenError("maps_service", 30)
+
+    monkeypatch.setattr(maps_client.maps_service_sync, "request", circuit_open)
+    routes_cache["r3"] = {"routes": [], "session_id": "s3"}
+    response = await call("POST", "/routes/r3/replan", json={"num_pois": 4})
+    assert response.status_code == 503
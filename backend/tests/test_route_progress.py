@@ -0,0 +1,159 @@
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from common.http import CircuitOpenError
+from fastapi import HTTPException
+from main import app
+from models.llm_suggestion import LLMPOISuggestion
+from routers import replan, route_progress
+from services import plan_jobs
+from services.maps import maps_client
+from routers.routes_cache import routes_cache
+from services.plan_cache import PlanCache
+from services.plan_executor import PlanExecutor
+from sse_starlette.sse import AppStatus
+
+PARAMS = {
+    "location": "Tel Aviv",
+    "interests": "museum, art",
+    "radius_km": 3,
+    "num_routes": 1,
+    "num_pois": 2,
+    "travel_mode": "walking",
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_sse_exit_event():
+    # sse-starlette binds this to the first event loop that streams
+    AppStatus.should_exit_event = None
+
+
+@pytest_asyncio.fixture
+async def executor(monkeypatch):
+    executor = PlanExecutor(broker_url="memory://", local_workers=2)
+    monkeypatch.setattr(route_progress, "plan_executor", executor)
+    yield executor
+    await executor.close()
+
+
+@pytest.fixture
+def maps_calls(monkeypatch, executor):
+    calls = []
+    pois = [
+        LLMPOISuggestion(id=str(i), name=f"POI {i}", latitude=32.0, longitude=34.7,
+                         categories=["museum"])
+        for i in range(3)
+    ]
+
+    async def fake_pois(request):
+        calls.append(("pois", request.seed))
+        return pois
+
+    async def fake_routes(request, pois):
+        calls.append(("routes", request.seed))
+        return {
+            "routes": [{"pois": [p.model_dump() for p in pois], "feature": None}],
+            "session_id": f"s{len(calls)}",
+        }
+
+    cache = PlanCache(ttl=60, stale_ttl=60)
+    monkeypatch.setattr(route_progress, "plan_cache", cache)
+    monkeypatch.setattr(replan, "plan_cache", cache)
+    monkeypatch.setattr(plan_jobs, "call_pois_from_maps_service", fake_pois)
+    monkeypatch.setattr(plan_jobs, "call_optimized_routes_from_maps_service", fake_routes)
+    return calls
+
+
+async def get_events(params):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/route-progress", params=params)
+    return [
+        (event.split("\r\n")[0].removeprefix("event: "), event.split("\r\n")[1].removeprefix("data: "))
+        for event in response.text.strip().split("\r\n\r\n")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_second_identical_plan_is_served_from_cache(maps_calls):
+    first = await get_events(PARAMS)
+    assert [name for name, _ in first] == ["stage", "stage", "complete"]
+    assert len(maps_calls) == 2
+
+    second = await get_events({**PARAMS, "location": "tel aviv", "interests": "Art,museum"})
+    assert second[-1][0] == "complete"
+    assert len(maps_calls) == 2
+    assert routes_cache[first[-1][1]] == routes_cache[second[-1][1]]
+    # Same canonical request -> same seed sent to maps_service
+    assert maps_calls[0][1] == maps_calls[1][1] is not None
+
+
+@pytest.mark.asyncio
+async def test_client_over_its_stream_limit_gets_an_error(maps_calls, executor):
+    executor.max_per_client = 0
+    events = await get_events(PARAMS)
+    assert [name for name, _ in events] == ["error"]
+    assert "in progress" in events[0][1]
+    assert maps_calls == []
+
+
+@pytest.mark.asyncio
+async def test_expired_session_drops_the_cached_plan(maps_calls, monkeypatch):
+    def session_expired(session_id, *args, **kwargs):
+        raise HTTPException(status_code=404, detail="Plan session expired")
+
+    monkeypatch.setattr(replan, "call_replan_from_maps_service", session_expired)
+    first = await get_events(PARAMS)
+    hit = await get_events(PARAMS)
+    assert len(maps_calls) == 2
+    assert routes_cache[hit[-1][1]]["session_id"] == "s2"
+
+    # maps_service forgot the session while the backend still caches its plan
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(f"/routes/{hit[-1][1]}/replan", json={"num_pois": 3})
+    assert response.status_code == 404
+
+    fresh = await get_events(PARAMS)
+    assert fresh[-1][0] == "complete"
+    assert len(maps_calls) == 4
+    assert routes_cache[fresh[-1][1]]["session_id"] == "s4"
+    assert first[-1][1] != fresh[-1][1]
+
+
+@pytest.mark.asyncio
+async def test_stream_limit_counts_the_forwarded_client(maps_calls, executor, monkeypatch):
+    monkeypatch.setattr(route_progress, "PLAN_CLIENT_HEADER", "X-Real-IP")
+    seen = []
+    stream = executor.stream
+    monkeypatch.setattr(executor, "stream", lambda client_id: seen.append(client_id) or stream(client_id))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/route-progress", params=PARAMS, headers={"X-Real-IP": "203.0.113.7"})
+        await client.get("/route-progress", params=PARAMS)
+    assert seen == ["203.0.113.7", "127.0.0.1"]
+
+
+@pytest.mark.asyncio
+async def test_open_maps_circuit_is_a_503_error_event(maps_calls, monkeypatch):
+    sent = []
+
+    async def circuit_open(method, path, **kwargs):
+        sent.append((path, kwargs["idempotent"]))
+        raise CircuitOpenError("maps_service", 30)
+
+    monkeypatch.setattr(maps_client.maps_service, "request", circuit_open)
+    monkeypatch.setattr(
+        plan_jobs, "call_optimized_routes_from_maps_service",
+        maps_client.call_optimized_routes_from_maps_service,
+    )
+    events = await get_events(PARAMS)
+    assert events[-1][0] == "error"
+    assert json.loads(events[-1][1])["status"] == 503
+    # Creates a plan session, so it must not be retried
+    assert sent == [("/routes/optimized", False)]
@@ -0,0 +1,74 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from common.telemetry import REQUEST_ID_HEADER, setup_telemetry, timed, trace_headers
+
+
+def stage_count(stage):
+    value = REGISTRY.get_sample_value(
+        "travel_stage_duration_seconds_count", {"service": "test_service", "stage": stage}
+    )
+    return value or 0
+
+
+def make_app():
+    app = FastAPI()
+    setup_telemetry(app, "test_service")
+
+    @app.get("/echo/{name}")
+    async def echo(name: str):
+        with timed("echo_stage"):
+            return {"outgoing": trace_headers()}
+
+    return app
+
+
+def test_request_id_is_adopted_and_propagated():
+    client = TestClient(make_app())
+    response = client.get("/echo/a", headers={REQUEST_ID_HEADER: "trace-123"})
+    assert response.headers[REQUEST_ID_HEADER] == "trace-123"
+    assert response.json()["outgoing"] == {REQUEST_ID_HEADER: "trace-123"}
+
+
+def test_request_id_is_generated_when_missing():
+    client = TestClient(make_app())
+    response = client.get("/echo/a")
+    generated = response.headers[REQUEST_ID_HEADER]
+    assert len(generated) == 32
+    assert response.json()["outgoing"] == {REQUEST_ID_HEADER: generated}
+    assert trace_headers() == {}
+
+
+def test_metrics_endpoint_reports_stages_and_route_templates():
+    client = TestClient(make_app())
+    before = stage_count("echo_stage")
+    client.get("/echo/a")
+    client.get("/echo/b")
+    assert stage_count("echo_stage") == before + 2
+
+    body = client.get("/metrics").text
+    assert 'travel_stage_duration_seconds_bucket{le="0.005",service="test_service",stage="echo_stage"}' in body
+    assert 'route="/echo/{name}"' in body
+
+
+def test_timed_decorates_sync_and_async_functions():
+    @timed("sync_stage")
+    def sync_work():
+        return 1
+
+    @timed("async_stage")
+    async def async_work():
+        raise ValueError("still recorded")
+
+    before_sync, before_async = stage_count("sync_stage"), stage_count("async_stage")
+    make_app()  # sets the service label used below
+    assert sync_work() == 1
+    try:
+        asyncio.run(async_work())
+    except ValueError:
+        pass
+    assert stage_count("sync_stage") == before_sync + 1
+    assert stage_count("async_stage") == before_async + 1
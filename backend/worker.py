@@ -0,0 +1,57 @@
+"""
+Plan worker: executes /route-progress jobs taken from the shared broker.
+
+    JOB_BROKER_URL=sqlite:////data/jobs.db python worker.py --concurrency 8
+
+Run as many of these as needed; throughput scales with their number.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+
+from dotenv import load_dotenv
+from prometheus_client import start_http_server
+
+from common.log import configure_logging
+from services.jobs.broker import create_broker
+from services.jobs.worker import Worker
+from services.maps.maps_client import maps_service
+from services.plan_executor import JOB_BROKER_URL
+from services.plan_jobs import run_plan_job
+
+configure_logging("plan_worker")
+logger = logging.getLogger(__name__)
+
+
+async def serve(broker_url: str, concurrency: int) -> None:
+    broker = create_broker(broker_url)
+    worker = Worker(broker, run_plan_job, concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, lambda: asyncio.ensure_future(worker.stop()))
+
+    logger.info("🚀 Plan worker %s started with %d slots on %s", worker.name, concurrency, broker_url)
+    await worker.run()
+    await broker.close()
+    await maps_service.aclose()
+    logger.info("🛑 Plan worker %s stopped", worker.name)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--broker", default=JOB_BROKER_URL)
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("PLAN_WORKER_CONCURRENCY", "8")))
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics")
+    args = parser.parse_args()
+    if args.broker.startswith("memory://"):
+        parser.error("a worker process needs a shared broker, e.g. sqlite:////data/jobs.db")
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+    asyncio.run(serve(args.broker, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Downstream cost of the POI candidate set with and without grid sampling.
+
+Dense synthetic Overpass responses (every element matches) go through
+matching, then either straight to thinning (no sampling) or through
+`sample_candidates` first. Reports thinning time, route selection time
+(distance matrix + diverse selection) and the JSON payload sent to the backend.
+
+    python benchmarks/bench_candidate_sampling.py --elements 2000 10000 50000
+"""
+import argparse
+import json
+import random
+
+from bench_utils import time_calls, use_service
+
+use_service("maps_service")
+
+from app.services.maps.overpass_service import (  # noqa: E402
+    POIMatcher,
+    match_features,
+    sample_candidates,
+    thin_pois_by_min_distance,
+)
+from app.services.maps.poi_features import build_features  # noqa: E402
+from app.services.route_selection import distance_matrix, select_diverse_routes  # noqa: E402
+from models.overpass import OverpassTag  # noqa: E402
+from models.route_request import RouteGenerationRequest  # noqa: E402
+
+TAGS = [
+    OverpassTag(key="tourism", value="museum"),
+    OverpassTag(key="tourism", value="gallery"),
+    OverpassTag(key="amenity", value="cafe"),
+    OverpassTag(key="amenity", value="restaurant"),
+    OverpassTag(key="leisure", value="park"),
+]
+SHAPES = [(3, 4, 3.0), (3, 10, 5.0)]  # (num_routes, num_pois, radius_km)
+
+
+def dense_elements(count: int, radius_km: float, seed: int = 1):
+    """All within `radius_km` of Tel Aviv, all named, addressed and matching."""
+    rng = random.Random(seed)
+    pairs = [(t.key, t.value) for t in TAGS]
+    span = radius_km / 111.32
+    elements = []
+    for i in range(count):
+        key, value = rng.choice(pairs)
+        tags = {key: value, "name": f"Place {i}", "addr:street": "Dizengoff", "addr:housenumber": str(i % 300)}
+        if rng.random() < 0.3:
+            tags["description"] = rng.choice(["street art", "vegan bistro", "history walk"])
+        elements.append({"id": i, "type": "node", "tags": tags,
+                         "lat": 32.08 + rng.uniform(-span, span) * 0.7,
+                         "lon": 34.78 + rng.uniform(-span, span) * 0.7})
+    return elements
+
+
+def downstream(pois, request):
+    matrix = distance_matrix([(p.latitude, p.longitude) for p in pois])
+    select_diverse_routes(matrix, [set(p.categories) for p in pois], request.num_routes, request.num_pois, seed=1)
+
+
+def measure(elements, request, sampled: bool, repeat: int) -> dict:
+    matcher = POIMatcher(TAGS, request.interests)
+    matched = match_features(build_features(elements), matcher)
+    kept = sample_candidates(matched, request) if sampled else matched
+    candidates = [c.to_suggestion() for c in kept]
+    min_dist = request.radius_km * 1000 / request.num_pois
+    pois = thin_pois_by_min_distance(candidates, min_dist)
+    sample_s = min(time_calls(lambda: sample_candidates(matched, request), repeat)) if sampled else 0.0
+    thin_s = min(time_calls(lambda: thin_pois_by_min_distance(candidates, min_dist), repeat))
+    select_s = min(time_calls(lambda: downstream(pois, request), repeat))
+    payload = len(json.dumps([p.model_dump() for p in pois]))
+    return {
+        "candidates": len(candidates),
+        "pois": len(pois),
+        "sample_ms": round(sample_s * 1000, 1),
+        "thin_ms": round(thin_s * 1000, 1),
+        "selection_ms": round(select_s * 1000, 1),
+        "payload_bytes": payload,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--elements", type=int, nargs="+", default=[2000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for num_routes, num_pois, radius_km in SHAPES:
+        request = RouteGenerationRequest(
+            location="Tel Aviv", interests="street art, vegan food, history", radius_km=radius_km,
+            num_routes=num_routes, num_pois=num_pois, travel_mode="walking",
+        )
+        print(f"num_routes={num_routes} num_pois={num_pois} radius_km={radius_km}")
+        for count in args.elements:
+            elements = dense_elements(count, radius_km)
+            for sampled in (False, True):
+                r = measure(elements, request, sampled, args.repeat)
+                label = "sampled" if sampled else "all"
+                print(f"  {count:>6} {label:<8} candidates={r['candidates']:<6} pois={r['pois']:<4} "
+                      f"sample={r['sample_ms']:7.1f}ms thin={r['thin_ms']:8.1f}ms "
+                      f"selection={r['selection_ms']:6.1f}ms payload={r['payload_bytes'] / 1024:6.1f}KiB")
+
+
+if __name__ == "__main__":
+    main()
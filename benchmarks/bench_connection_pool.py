@@ -0,0 +1,105 @@
+"""
+Inter-service connections and plan latency under a burst of concurrent plans.
+
+Starts the stub stack, runs --plans distinct /route-progress plans at once and
+counts the TCP connections opened on each hop: backend -> maps_service,
+maps_service -> llm_service and maps_service -> the upstream stubs. Closed
+connections linger in TIME_WAIT for a minute, so sampling /proc/net/tcp sees
+every one of them (Linux only). Run against a worktree of an older commit with
+--repo for the "before" numbers.
+
+    python benchmarks/bench_connection_pool.py --plans 200 --latency overpass=0.5
+    git worktree add /tmp/before HEAD~1 && python benchmarks/bench_connection_pool.py --repo /tmp/before
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Set
+
+import httpx
+
+from bench_utils import REPO_DIR
+from run_e2e import RESULTS_DIR, Recorder, Stack, drive, request_variant, route_progress_once
+from stubs import parse_latency
+
+HOPS = {"backend -> maps": "maps_service", "maps -> llm": "llm_service", "maps -> upstreams": "stubs"}
+
+
+def client_ports(server_ports: Dict[int, str]) -> Dict[str, Set[int]]:
+    """
+    Ephemeral client ports of every loopback connection, in any state, to
+    each of `server_ports`.
+    """
+    seen: Dict[str, Set[int]] = {name: set() for name in server_ports.values()}
+    with open("/proc/net/tcp") as f:
+        next(f)
+        for line in f:
+            local, remote = line.split()[1:3]
+            local_port, remote_port = int(local.split(":")[1], 16), int(remote.split(":")[1], 16)
+            if remote_port in server_ports:
+                seen[server_ports[remote_port]].add(local_port)
+            elif local_port in server_ports and remote_port:
+                seen[server_ports[local_port]].add(remote_port)
+    return seen
+
+
+async def sample_connections(server_ports, seen, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        for name, ports in client_ports(server_ports).items():
+            seen[name] |= ports
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stop.wait(), 0.05)
+
+
+async def run(stack: Stack, args) -> dict:
+    server_ports = {int(stack.urls[name].rsplit(":", 1)[1]): name for name in HOPS.values()}
+    seen: Dict[str, Set[int]] = {name: set() for name in HOPS.values()}
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_connections(server_ports, seen, stop))
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=args.plans, max_keepalive_connections=args.plans)
+    async with httpx.AsyncClient(base_url=stack.urls["backend"], limits=limits, timeout=args.timeout) as backend:
+        wall = await drive(args.plans, args.plans, lambda i: route_progress_once(backend, request_variant(i, True), rec))
+    stop.set()
+    await sampler
+    summary = rec.summary(wall)
+    summary["connections"] = {hop: len(seen[name]) for hop, name in HOPS.items()}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", type=Path, default=REPO_DIR)
+    parser.add_argument("--plans", type=int, default=200, help="plans started at once")
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=SECONDS")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "connection_pool.json")
+    args = parser.parse_args()
+
+    # Run the whole burst at once rather than queueing it behind the default 8 plan slots
+    stack = Stack(parse_latency(args.latency), args.jitter, RESULTS_DIR / "logs", repo=args.repo,
+                  env={"PLAN_MAX_CONCURRENT": str(args.plans)})
+    try:
+        stack.start()
+        started = time.perf_counter()
+        summary = asyncio.run(run(stack, args))
+        summary["elapsed_s"] = round(time.perf_counter() - started, 2)
+    finally:
+        stack.stop()
+
+    lat = summary["latency_ms"]
+    print(f"repo={args.repo} plans={args.plans} ok={summary['count']} errors={summary['errors']}")
+    print(f"plan latency p50={lat['p50']:.0f}ms p95={lat['p95']:.0f}ms p99={lat['p99']:.0f}ms")
+    for hop, count in summary["connections"].items():
+        print(f"{hop:<18} {count:5d} connections")
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(summary, indent=2))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Cost of the telemetry layer: the `timed` wrapper and the ASGI middleware,
+compared with the time one route plan takes.
+
+    python benchmarks/bench_instrumentation.py --plan-ms 1500
+"""
+import argparse
+import asyncio
+import time
+
+from bench_utils import use_service
+
+use_service("backend")
+
+from fastapi import FastAPI  # noqa: E402
+
+from common.telemetry import setup_telemetry, timed  # noqa: E402
+
+# Per plan: route-progress, /pois/, /generate-tags, /routes/optimized
+HTTP_HOPS = 4
+# geocode, tags, overpass, parse, thinning, selection, maps_pois, maps_routes,
+# groq_completion plus one ors_route per route (3)
+TIMED_STAGES = 12
+
+
+def per_call_us(func, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    if instrumented:
+        setup_telemetry(app, "bench")
+
+    @app.get("/ping/{name}")
+    async def ping(name: str):
+        return {"ok": True}
+
+    return app
+
+
+async def asgi_us(app, calls: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/ping/x", "raw_path": b"/ping/x",
+        "root_path": "", "query_string": b"", "headers": [(b"x-request-id", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(dict(scope), receive, send)  # build the middleware stack
+    started = time.perf_counter()
+    for _ in range(calls):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--plan-ms", type=float, default=1500,
+                        help="reference end-to-end plan time (fastest stubbed plan)")
+    args = parser.parse_args()
+
+    def plain():
+        return None
+
+    wrapped = timed("bench_stage")(plain)
+
+    def with_block():
+        with timed("bench_stage"):
+            return None
+
+    base = per_call_us(plain, args.calls)
+    decorator = per_call_us(wrapped, args.calls) - base
+    block = per_call_us(with_block, args.calls) - base
+
+    bare = asyncio.run(asgi_us(make_app(False), args.requests))
+    instrumented = asyncio.run(asgi_us(make_app(True), args.requests))
+    middleware = instrumented - bare
+
+    per_plan_us = HTTP_HOPS * middleware + TIMED_STAGES * max(decorator, block)
+    print(f"timed decorator overhead:   {decorator:6.2f} us/call")
+    print(f"timed block overhead:       {block:6.2f} us/call")
+    print(f"middleware overhead:        {middleware:6.2f} us/request "
+          f"({bare:.1f} -> {instrumented:.1f} us for a trivial endpoint)")
+    print(f"per plan ({HTTP_HOPS} hops, {TIMED_STAGES} stages): {per_plan_us:6.1f} us "
+          f"= {per_plan_us / (args.plan_ms * 1000) * 100:.4f}% of a {args.plan_ms:.0f} ms plan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Throughput of request threads emitting the maps_service log pattern under the
+old setup (root logger at DEBUG, synchronous stream handler, eager f-strings)
+and the queue-based setup at INFO and at DEBUG.
+
+    python benchmarks/bench_logging.py --threads 16 --requests 2000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from bench_utils import use_service
+
+use_service("backend")
+
+from common.log import configure_logging, sample, shutdown_logging  # noqa: E402
+
+NOMINATIM_RESPONSE = [{"place_id": 1, "lat": "32.08", "lon": "34.78", "display_name": "Tel Aviv-Yafo, Israel " * 5}]
+OVERPASS_QUERY = "\n".join(f'node["tourism"~"museum|gallery"](around:3000,32.08,34.78);' for _ in range(18))
+POI_NAMES = [f"Place {i}" for i in range(12)]
+
+log = logging.getLogger("bench")
+
+
+def legacy_request():
+    logging.debug(f"Sending request to url with params: {{'q': 'Tel Aviv'}}")
+    logging.debug(f"Response JSON: {NOMINATIM_RESPONSE}")
+    logging.debug(f"Overpass query:\n{OVERPASS_QUERY}\n")
+    for step in range(len(POI_NAMES)):
+        logging.debug(f"Route selected POIs: {[p for p in POI_NAMES[:step]]}")
+        logging.debug(f"Route had categories: {set(POI_NAMES[:step])}")
+
+
+def current_request():
+    log.debug("Geocoding %r via %s", "Tel Aviv", "url")
+    log.debug("Overpass query for %d tags within %d m", 6, 3000)
+    for step in range(len(POI_NAMES)):
+        if log.isEnabledFor(logging.DEBUG) and sample("bench_route", every=20):
+            log.debug("Route selected POIs: %s", [p for p in POI_NAMES[:step]])
+
+
+def run(threads: int, requests: int, func) -> float:
+    def worker():
+        for _ in range(requests):
+            func()
+            time.sleep(0)  # yield like a request thread waiting on I/O would
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return threads * requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "legacy.log"), "w") as sink:
+            root = logging.getLogger()
+            handler = logging.StreamHandler(sink)
+            root.handlers[:] = [handler]
+            root.setLevel(logging.DEBUG)
+            results["legacy (DEBUG, sync handler)"] = run(args.threads, args.requests, legacy_request)
+
+        for level in ("INFO", "DEBUG"):
+            with open(os.path.join(tmp, f"queue-{level}.log"), "w") as sink:
+                configure_logging("bench", level=level, stream=sink)
+                results[f"queue handler ({level})"] = run(args.threads, args.requests, current_request)
+                shutdown_logging()
+
+    base = results["legacy (DEBUG, sync handler)"]
+    for name, rps in results.items():
+        print(f"{name:30s} {rps:12,.0f} req/s  ({rps / base:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Route selection throughput: in the request thread versus a process pool.
+
+Drives `RouteOptimizer.select` from concurrent request threads, as
+/routes/optimized does, for each worker count (0 = inline, GIL-bound).
+Also reports what one task would pickle if the inputs were sent as
+Python objects instead of through shared memory.
+
+    python benchmarks/bench_optimizer_pool.py --workers 0 1 2 4 --pois 600
+"""
+import argparse
+import os
+import pickle
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import use_service
+
+use_service("maps_service")
+
+from app.services.route_optimizer import RouteOptimizer  # noqa: E402
+from app.services.route_selection import distance_matrix  # noqa: E402
+
+CATEGORIES = ["museum", "cafe", "park", "gallery", "bar", "restaurant"]
+
+
+def make_pool(rng, size):
+    coords = [(32.05 + rng.random() / 20, 34.75 + rng.random() / 20) for _ in range(size)]
+    return coords, [{rng.choice(CATEGORIES)} for _ in range(size)]
+
+
+def run(workers: int, tasks: list, args) -> dict:
+    optimizer = RouteOptimizer(workers=workers, cpu_budget_s=600)
+    optimizer.start()
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as clients:
+            list(clients.map(lambda t: optimizer.select(*t, args.routes, args.stops, seed=1), tasks))
+        wall = time.perf_counter() - started
+    finally:
+        optimizer.shutdown()
+    return {"wall_s": wall, "throughput": len(tasks) / wall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--tasks", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent request threads")
+    parser.add_argument("--pois", type=int, default=600)
+    parser.add_argument("--routes", type=int, default=5)
+    parser.add_argument("--stops", type=int, default=25)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    tasks = [make_pool(rng, args.pois) for _ in range(args.tasks)]
+    coords, categories = tasks[0]
+    as_objects = len(pickle.dumps((distance_matrix(coords), coords, categories)))
+    print(f"cores={os.cpu_count()} pois={args.pois} tasks={args.tasks} concurrency={args.concurrency}")
+    print(f"pickled per task: {as_objects / 1024:.0f} KiB as Python objects, "
+          f"{len(pickle.dumps(('psm_0123456789', args.pois, args.pois, 5, 25, 1, 5.0)))} B via shared memory")
+
+    base = None
+    for workers in args.workers:
+        r = run(workers, tasks, args)
+        base = base or r["throughput"]
+        print(f"workers={workers:<3d} {r['throughput']:6.2f} selections/s  wall={r['wall_s']:6.2f}s  "
+              f"x{r['throughput'] / base:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Cold vs. cached latency of /route-progress with maps_service stubbed out.
+
+    python benchmarks/bench_plan_cache.py --upstream-latency 0.5 --requests 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from bench_utils import percentiles, use_service
+
+use_service("backend")
+
+from main import app  # noqa: E402
+from models.llm_suggestion import LLMPOISuggestion  # noqa: E402
+from routers import route_progress  # noqa: E402
+
+PARAMS = {
+    "location": "Tel Aviv",
+    "interests": "museum, art",
+    "radius_km": 3,
+    "num_routes": 2,
+    "num_pois": 3,
+    "travel_mode": "walking",
+}
+
+
+def stub_maps_service(latency: float):
+    pois = [
+        LLMPOISuggestion(id=str(i), name=f"POI {i}", latitude=32 + i / 100,
+                         longitude=34.7, categories=["museum"])
+        for i in range(5)
+    ]
+
+    def fake_pois(request):
+        time.sleep(latency)
+        return pois
+
+    def fake_routes(request, pois):
+        time.sleep(latency)
+        return {"routes": [{"pois": [p.model_dump() for p in pois[:3]], "feature": None}]}
+
+    route_progress.call_pois_from_maps_service = fake_pois
+    route_progress.call_optimized_routes_from_maps_service = fake_routes
+
+
+async def run_plan(client: httpx.AsyncClient, params: dict) -> float:
+    started = time.perf_counter()
+    response = await client.get("/route-progress", params=params)
+    assert "event: complete" in response.text, response.text
+    return time.perf_counter() - started
+
+
+async def bench(args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cold = []
+        for i in range(args.cold):
+            cold.append(await run_plan(client, {**PARAMS, "num_pois": 3 + i}))
+        hits = [await run_plan(client, PARAMS) for _ in range(args.requests)]
+        burst_started = time.perf_counter()
+        await asyncio.gather(
+            *(run_plan(client, {**PARAMS, "radius_km": 4}) for _ in range(args.requests))
+        )
+        burst = time.perf_counter() - burst_started
+    return cold, hits, burst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--upstream-latency", type=float, default=0.5,
+                        help="seconds per maps_service call")
+    parser.add_argument("--cold", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    stub_maps_service(args.upstream_latency)
+    cold, hits, burst = asyncio.run(bench(args))
+    hit_ms = {k: v * 1000 for k, v in percentiles(hits).items()}
+    print(f"cold plan (median of {len(cold)}): {statistics.median(cold) * 1000:8.1f} ms")
+    print(f"cache hit p50/p95/p99:        {hit_ms['p50']:.2f} / {hit_ms['p95']:.2f} / {hit_ms['p99']:.2f} ms")
+    print(f"{args.requests} identical concurrent cold requests (single-flight): {burst * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
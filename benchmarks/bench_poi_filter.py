@@ -0,0 +1,138 @@
+"""
+Compare the precompiled POI matcher against the original per-element loop.
+Per request, the matcher runs over features the POI cache built once per
+Overpass fetch; building them is timed separately.
+
+    python benchmarks/bench_poi_filter.py --elements 50000
+"""
+import argparse
+import random
+
+from bench_utils import time_calls, use_service
+
+use_service("maps_service")
+
+from app.services.maps.overpass_service import POIMatcher, match_features  # noqa: E402
+from app.services.maps.poi_features import build_features, extract_address  # noqa: E402
+from models.llm_suggestion import LLMPOISuggestion  # noqa: E402
+from models.overpass import OverpassElement, OverpassTag  # noqa: E402
+from models.route_request import RouteGenerationRequest  # noqa: E402
+
+TAGS = [
+    OverpassTag(key="tourism", value="museum"),
+    OverpassTag(key="tourism", value="gallery"),
+    OverpassTag(key="amenity", value="cafe"),
+    OverpassTag(key="amenity", value="restaurant"),
+    OverpassTag(key="leisure", value="park"),
+]
+
+
+def make_elements(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    pairs = [(t.key, t.value) for t in TAGS] + [("shop", "bakery"), ("amenity", "bar")]
+    elements = []
+    for i in range(count):
+        key, value = rng.choice(pairs)
+        tags = {key: value, "wheelchair": "yes", "opening_hours": "Mo-Fr 09:00-17:00"}
+        if rng.random() < 0.8:
+            tags["name"] = f"Place {i}"
+        if rng.random() < 0.6:
+            tags["addr:street"] = "Dizengoff"
+            tags["addr:housenumber"] = str(i % 300)
+        if rng.random() < 0.3:
+            tags["description"] = rng.choice(["street art", "vegan bistro", "quiet"])
+        el = {"id": i, "type": rng.choice(["node", "way"]), "tags": tags}
+        coords = {"lat": 32 + rng.random() / 10, "lon": 34.7 + rng.random() / 10}
+        if el["type"] == "node":
+            el.update(coords)
+        else:
+            el["center"] = coords
+        elements.append(el)
+    return elements
+
+
+def legacy_primary_category(tags: dict, overpass_tags) -> str:
+    valid_set = {(t.key, t.value) for t in overpass_tags}
+    for k, v in tags.items():
+        if (k, v) in valid_set:
+            return v
+    for key in ("amenity", "shop", "tourism", "cuisine", "leisure"):
+        if key in tags:
+            return tags[key]
+    for k, v in tags.items():
+        if isinstance(v, str) and k != "name":
+            return v
+    return "unknown"
+
+
+def legacy_match(raw_elements, request, tags):
+    """The loop as it was before the precompiled matcher, including model parsing."""
+    elements = [OverpassElement(**e) for e in raw_elements]
+    pois = []
+    for el in elements:
+        tags_el = el.tags or {}
+        name = tags_el.get("name")
+        if not name:
+            continue
+        category = legacy_primary_category(tags_el, tags)
+        if not category:
+            continue
+        lat_el = el.lat if el.type == "node" else (el.center or {}).get("lat")
+        lon_el = el.lon if el.type == "node" else (el.center or {}).get("lon")
+        if lat_el is None or lon_el is None:
+            continue
+        address = extract_address(tags_el)
+        if not address or address.startswith("Near "):
+            continue
+        desc = tags_el.get("description") or tags_el.get("note") or f"{name} - {address}"
+        if not (
+            any(interest.lower() in desc.lower() for interest in request.interests)
+            or any(tag.key in tags_el and tags_el[tag.key] == tag.value for tag in tags)
+        ):
+            continue
+        pois.append(
+            LLMPOISuggestion(
+                id=str(el.id),
+                name=name,
+                description=desc,
+                latitude=lat_el,
+                longitude=lon_el,
+                address=address,
+                categories=[category],
+            )
+        )
+    return pois
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    elements = make_elements(args.elements)
+    request = RouteGenerationRequest(
+        location="Tel Aviv",
+        interests="street art, vegan food, history",
+        radius_km=3,
+        num_routes=3,
+        num_pois=5,
+        travel_mode="walking",
+    )
+
+    def match():
+        matcher = POIMatcher(TAGS, request.interests)
+        return [c.to_suggestion() for c in match_features(features, matcher)]
+
+    features = build_features(elements)
+    legacy = min(time_calls(lambda: legacy_match(elements, request, TAGS), args.repeat))
+    build = min(time_calls(lambda: build_features(elements), args.repeat))
+    current = min(time_calls(match, args.repeat))
+    print(f"elements:          {args.elements}")
+    print(f"legacy loop:       {legacy * 1000:8.1f} ms")
+    print(f"precompiled match: {current * 1000:8.1f} ms  (+{build * 1000:.1f} ms once per fetch for features)")
+    print(f"speedup:           {legacy / current:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
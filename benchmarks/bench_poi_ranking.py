@@ -0,0 +1,103 @@
+"""
+Per-request CPU of turning cached Overpass results into POIs.
+
+Stores one area's elements in a POICache, then serves a stream of requests
+with different interests and stop counts from it, the way /pois/ does on a
+cache hit: `filter_pois(poi_cache.lookup(...))`. Reports the one-off cost of
+storing, the CPU time per request, and the same again with distance thinning
+swapped out (it is unchanged between versions and dominates the total) to
+isolate matching and ranking. Run against a worktree of an older commit with
+--repo to compare.
+
+    python benchmarks/bench_poi_ranking.py --elements 1000 5000
+    git worktree add /tmp/before HEAD~1 && python benchmarks/bench_poi_ranking.py --repo /tmp/before
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+from bench_utils import REPO_DIR, use_service
+
+CENTER = (32.08, 34.78)
+RADIUS_M = 3000
+INTERESTS = ["art, museums", "coffee, food", "parks, nature", "history, culture", "street art, vegan food"]
+
+
+def make_elements(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    pairs = [("tourism", "museum"), ("tourism", "gallery"), ("amenity", "cafe"),
+             ("amenity", "restaurant"), ("leisure", "park"), ("shop", "bakery"), ("amenity", "bar")]
+    elements = []
+    for i in range(count):
+        key, value = rng.choice(pairs)
+        tags = {key: value, "wheelchair": "yes", "opening_hours": "Mo-Fr 09:00-17:00"}
+        if rng.random() < 0.85:
+            tags["name"] = f"Place {i}"
+        if rng.random() < 0.7:
+            tags["addr:street"] = "Dizengoff"
+            tags["addr:housenumber"] = str(i % 300)
+        if rng.random() < 0.3:
+            tags["description"] = rng.choice(["street art", "vegan bistro", "quiet", "local history"])
+        if rng.random() < 0.15:
+            tags.update(wikidata=f"Q{i}", website="https://example.org")
+        coords = {"lat": CENTER[0] + (rng.random() - 0.5) / 20, "lon": CENTER[1] + (rng.random() - 0.5) / 20}
+        el = {"id": i, "type": rng.choice(["node", "way"]), "tags": tags}
+        if el["type"] == "node":
+            el.update(coords)
+        else:
+            el["center"] = coords
+        elements.append(el)
+    return elements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", type=Path, default=REPO_DIR)
+    parser.add_argument("--elements", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    use_service("maps_service", args.repo)
+    from app.services.maps import overpass_service
+    from app.services.maps.overpass_service import filter_pois
+    from app.services.maps.poi_cache import POICache
+    from models.overpass import OverpassTag
+    from models.route_request import RouteGenerationRequest
+
+    tags = [OverpassTag(key=k, value=v) for k, v in
+            [("tourism", "museum"), ("tourism", "gallery"), ("amenity", "cafe"), ("leisure", "park")]]
+    print(f"repo={args.repo}")
+    for count in args.elements:
+        cache = POICache(ttl=3600)
+        started = time.process_time()
+        cache.store(tags, *CENTER, RADIUS_M, make_elements(count))
+        store_ms = (time.process_time() - started) * 1000
+
+        def serve():
+            timings = []
+            for i in range(args.requests):
+                request = RouteGenerationRequest(
+                    location="Tel Aviv", interests=INTERESTS[i % len(INTERESTS)], radius_km=RADIUS_M / 1000,
+                    num_routes=3, num_pois=4 + i % 4, travel_mode="walking",
+                )
+                started = time.process_time()
+                filter_pois(cache.lookup(tags, *CENTER, RADIUS_M), request, tags)
+                timings.append((time.process_time() - started) * 1000)
+            return timings
+
+        total = serve()
+        thin = overpass_service.thin_pois_by_min_distance
+        overpass_service.thin_pois_by_min_distance = lambda pois, min_dist_m: pois
+        try:
+            ranking = serve()
+        finally:
+            overpass_service.thin_pois_by_min_distance = thin
+        print(f"elements={count:<6d} store={store_ms:7.1f}ms  per request: "
+              f"median={statistics.median(total):7.2f}ms  "
+              f"without thinning median={statistics.median(ranking):6.2f}ms max={max(ranking):6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
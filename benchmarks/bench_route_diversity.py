@@ -0,0 +1,111 @@
+"""
+Route diversity and ORS calls: original random-start selection vs. the
+farthest-point diverse selector.
+
+    python benchmarks/bench_route_diversity.py --trials 200
+"""
+import argparse
+import random
+import statistics
+import time
+
+from bench_utils import use_service
+
+use_service("maps_service")
+
+from geopy.distance import geodesic  # noqa: E402
+
+from app.services.route_selection import (  # noqa: E402
+    MAX_ROUTE_SIMILARITY,
+    distance_matrix,
+    jaccard,
+    route_diversity,
+    select_diverse_routes,
+)
+
+CATEGORIES = ["museum", "cafe", "park", "gallery", "bar", "restaurant"]
+
+
+def make_pool(rng, size):
+    return [
+        (32.05 + rng.random() / 30, 34.75 + rng.random() / 30, {rng.choice(CATEGORIES)})
+        for _ in range(size)
+    ]
+
+
+def legacy_select(pool, num_routes, num_pois, rng):
+    """Selection loop as it was: unseeded random start, fresh pool copy per route."""
+    routes = []
+    for _ in range(num_routes):
+        remaining = list(range(len(pool)))
+        selected, used_cats = [], set()
+        for _ in range(num_pois):
+            if not remaining:
+                break
+            if not selected:
+                idx = rng.choice(remaining)
+            else:
+                last = pool[selected[-1]]
+                diverse = [i for i in remaining if not used_cats.intersection(pool[i][2])]
+                if len(diverse) < 3:
+                    diverse = remaining
+                idx = min(diverse, key=lambda i: geodesic(last[:2], pool[i][:2]).meters)
+            selected.append(idx)
+            used_cats.update(pool[idx][2])
+            remaining.remove(idx)
+        routes.append(selected)
+    return routes
+
+
+def count_near_duplicates(routes):
+    kept = []
+    dupes = 0
+    for route in routes:
+        if any(jaccard(set(route), set(k)) >= MAX_ROUTE_SIMILARITY for k in kept):
+            dupes += 1
+        else:
+            kept.append(route)
+    return dupes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--num-routes", type=int, default=3)
+    parser.add_argument("--num-pois", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    legacy_div, new_div = [], []
+    legacy_dupes = legacy_calls = new_calls = 0
+    legacy_time = new_time = 0.0
+    for trial in range(args.trials):
+        pool = make_pool(rng, rng.randint(args.num_pois, 40))
+
+        started = time.perf_counter()
+        old = legacy_select(pool, args.num_routes, args.num_pois, rng)
+        legacy_time += time.perf_counter() - started
+        legacy_calls += len(old)
+        legacy_dupes += count_near_duplicates(old)
+        legacy_div.append(route_diversity(old))
+
+        started = time.perf_counter()
+        matrix = distance_matrix([(lat, lon) for lat, lon, _ in pool])
+        new = select_diverse_routes(
+            matrix, [cats for _, _, cats in pool], args.num_routes, args.num_pois, seed=trial
+        )
+        new_time += time.perf_counter() - started
+        new_calls += len(new.routes)
+        if new.diversity is not None:
+            new_div.append(new.diversity)
+
+    print(f"trials: {args.trials}, {args.num_routes} routes x {args.num_pois} POIs, pools of {args.num_pois}-40")
+    print(f"legacy:  diversity {statistics.mean(legacy_div):.3f}, near-duplicate routes {legacy_dupes}, "
+          f"ORS calls {legacy_calls}, selection {legacy_time / args.trials * 1000:.2f} ms/request")
+    print(f"diverse: diversity {statistics.mean(new_div):.3f}, near-duplicate routes 0, "
+          f"ORS calls {new_calls}, selection {new_time / args.trials * 1000:.2f} ms/request")
+    print(f"ORS calls saved per request: {(legacy_calls - new_calls) / args.trials:.2f}")
+
+
+if __name__ == "__main__":
+    main()
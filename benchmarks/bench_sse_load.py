@@ -0,0 +1,174 @@
+"""
+SSE load test for /route-progress: opens thousands of concurrent streams
+against the stub stack, keeps them open for a while, then drops them all and
+checks that upstream work stops and the backend's memory and file
+descriptors settle.
+
+    python benchmarks/bench_sse_load.py --clients 2000 --hold 20 --max-concurrent 8
+
+Reports the backend's peak/final RSS and open fds, queue depth seen over
+SSE, completed plans and upstream calls made after every client had left.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from bench_utils import percentiles
+from run_e2e import BASE_REQUEST, RESULTS_DIR, Stack
+from stubs import parse_latency
+
+
+def process_usage(pid: int) -> Dict[str, float]:
+    with open(f"/proc/{pid}/status") as f:
+        rss_kb = int(re.search(r"VmRSS:\s+(\d+)", f.read()).group(1))
+    return {"rss_mb": round(rss_kb / 1024, 1), "fds": len(os.listdir(f"/proc/{pid}/fd"))}
+
+
+def plan_gauges(metrics: str) -> Dict[str, float]:
+    values = {}
+    for name in ("travel_plans_running", "travel_plans_queued", "travel_plan_streams"):
+        match = re.search(rf"^{name} (\S+)$", metrics, re.M)
+        values[name] = float(match.group(1)) if match else None
+    return values
+
+
+class Client:
+    def __init__(self):
+        self.queued_positions: List[int] = []
+        self.first_event_s = None
+        self.outcome = "open"
+
+
+async def sse_client(http: httpx.AsyncClient, i: int, client: Client) -> None:
+    # A distinct radius per client so the plan cache can't coalesce them
+    params = {**BASE_REQUEST, "radius_km": BASE_REQUEST["radius_km"] + i / 100}
+    started = time.perf_counter()
+    event = None
+    async with http.stream("GET", "/route-progress", params=params) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                if client.first_event_s is None:
+                    client.first_event_s = time.perf_counter() - started
+                if event == "queued":
+                    client.queued_positions.append(int(line[5:].strip()))
+                elif event in ("complete", "error"):
+                    client.outcome = event
+                    return
+
+
+async def sample_backend(stack: Stack, samples: List[dict], stop: asyncio.Event) -> None:
+    pid = stack.procs["backend"].pid
+    async with httpx.AsyncClient(base_url=stack.urls["backend"], timeout=5) as http:
+        while not stop.is_set():
+            sample = {"t": time.monotonic(), **process_usage(pid)}
+            with contextlib.suppress(httpx.HTTPError):
+                sample.update(plan_gauges((await http.get("/metrics")).text))
+            samples.append(sample)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), 0.5)
+
+
+async def run(stack: Stack, args) -> dict:
+    pid = stack.procs["backend"].pid
+    upstream = httpx.AsyncClient(base_url=stack.urls["stubs"])
+    baseline = process_usage(pid)
+
+    samples: List[dict] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_backend(stack, samples, stop))
+
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=0)
+    clients = [Client() for _ in range(args.clients)]
+    async with httpx.AsyncClient(
+        base_url=stack.urls["backend"], limits=limits, timeout=httpx.Timeout(None)
+    ) as http:
+        tasks = []
+        for i, client in enumerate(clients):
+            tasks.append(asyncio.create_task(sse_client(http, i, client)))
+            if args.ramp and i % 100 == 99:
+                await asyncio.sleep(args.ramp)
+        await asyncio.wait(tasks, timeout=args.hold)
+        held = process_usage(pid)
+
+        # Every client closes its tab at once
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    left_at = time.monotonic()
+    await asyncio.sleep(args.settle)
+    calls_after_settle = (await upstream.get("/stats")).json()
+    await asyncio.sleep(args.settle)
+    calls_later = (await upstream.get("/stats")).json()
+    stop.set()
+    await sampler
+    await upstream.aclose()
+    final = process_usage(pid)
+
+    queued = [c.queued_positions[0] for c in clients if c.queued_positions]
+    first_event = [c.first_event_s * 1000 for c in clients if c.first_event_s is not None]
+    after_leave = [s for s in samples if s["t"] >= left_at + args.settle]
+    return {
+        "clients": args.clients,
+        "completed": sum(c.outcome == "complete" for c in clients),
+        "errors": sum(c.outcome == "error" for c in clients),
+        "dropped_while_open": sum(c.outcome == "open" for c in clients),
+        "queued_clients": len(queued),
+        "max_queue_position": max(queued, default=0),
+        "first_event_ms": {k: round(v, 1) for k, v in percentiles(first_event).items()},
+        "backend": {
+            "baseline": baseline,
+            "while_held": held,
+            "peak_rss_mb": max(s["rss_mb"] for s in samples),
+            "peak_fds": max(s["fds"] for s in samples),
+            "peak_running": max((s.get("travel_plans_running") or 0) for s in samples),
+            "peak_queued": max((s.get("travel_plans_queued") or 0) for s in samples),
+            "after_clients_left": after_leave[-1] if after_leave else final,
+            "final": final,
+        },
+        # Should not move once everyone has gone: cancelled plans stop calling upstream
+        "upstream_calls_after_settle": calls_after_settle,
+        "upstream_calls_later": calls_later,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--hold", type=float, default=20, help="seconds to keep the streams open")
+    parser.add_argument("--settle", type=float, default=3, help="seconds to wait after disconnecting")
+    parser.add_argument("--ramp", type=float, default=0.05, help="pause after every 100 connects")
+    parser.add_argument("--max-concurrent", type=int, default=8)
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=SECONDS")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "sse_load.json")
+    args = parser.parse_args()
+
+    env = {
+        "PLAN_MAX_CONCURRENT": str(args.max_concurrent),
+        "PLAN_MAX_QUEUED": str(args.clients),
+    }
+    stack = Stack(parse_latency(args.latency), 0.1, args.output.parent / "logs", env=env)
+    try:
+        stack.start()
+        report = asyncio.run(run(stack, args))
+    finally:
+        stack.stop()
+    report["max_concurrent"] = args.max_concurrent
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Import-time profile and cold start of each service.
+
+For every service: the `python -X importtime` cost of importing its app,
+split by top-level package, and the time from spawning uvicorn to the first
+200 from /health (median of --runs). Point --repo at another checkout (e.g. a
+`git worktree` of the previous commit) to get the "before" numbers.
+
+    python benchmarks/bench_startup.py --runs 5
+    git worktree add /tmp/before HEAD~1 && python benchmarks/bench_startup.py --repo /tmp/before
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+from bench_utils import REPO_DIR
+from run_e2e import RESULTS_DIR, free_port
+
+SERVICES = {
+    "llm_service": ("app.main", "app.main:app"),
+    "maps_service": ("app.main", "app.main:app"),
+    "backend": ("main", "main:app"),
+}
+ENV = {"ORS_API_KEY": "bench-key", "GROQ_API_KEY": "bench-key"}
+
+
+def service_env(repo: Path, service: str) -> dict:
+    return {**os.environ, **ENV, "PYTHONPATH": os.pathsep.join([str(repo / service), str(repo)])}
+
+
+def import_profile(repo: Path, service: str, top: int) -> dict:
+    module, _ = SERVICES[service]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=repo / service, env=service_env(repo, service), capture_output=True, text=True, check=True,
+    )
+    by_package = defaultdict(int)
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        by_package[name.split(".")[0]] += int(self_us)
+        if name == module:
+            total_us = int(cumulative_us)
+    heaviest = sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    return {"total_ms": round(total_us / 1000, 1), "packages_ms": {k: round(v / 1000, 1) for k, v in heaviest}}
+
+
+def cold_start(repo: Path, service: str, timeout: float = 30) -> float:
+    _, app = SERVICES[service]
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=repo / service, env=service_env(repo, service), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"{service} did not start within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", type=Path, default=REPO_DIR)
+    parser.add_argument("--services", nargs="+", default=list(SERVICES), choices=list(SERVICES))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=6, help="heaviest packages to list")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "startup.json")
+    args = parser.parse_args()
+
+    report = {}
+    for service in args.services:
+        profile = import_profile(args.repo, service, args.top)
+        starts = [cold_start(args.repo, service) for _ in range(args.runs)]
+        report[service] = {**profile, "cold_start_ms": round(statistics.median(starts) * 1000, 1)}
+        packages = ", ".join(f"{k} {v:.0f}" for k, v in profile["packages_ms"].items())
+        print(f"{service:<13} import={profile['total_ms']:7.1f}ms  cold start={report[service]['cold_start_ms']:7.1f}ms")
+        print(f"{'':13} heaviest (self ms): {packages}")
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Each service is deployed with its own root on PYTHONPATH plus the shared
+`models` package, so benchmarks put the same directories on sys.path.
+"""
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+
+def use_service(service: str, repo: Path = REPO_DIR) -> None:
+    for path in (repo / service, repo):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+    os.environ.setdefault("ORS_API_KEY", "bench-key")
+    os.environ.setdefault("GROQ_API_KEY", "bench-key")
+
+
+def time_calls(func: Callable[[], object], repeat: int = 5) -> List[float]:
+    """
+    Call `func` `repeat` times and return the wall-clock durations in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """
+    p50/p95/p99 of `samples` (same unit as the input).
+    """
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    if len(samples) == 1:
+        return {"p50": samples[0], "p95": samples[0], "p99": samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
@@ -0,0 +1,105 @@
+"""
+Cold versus warm /pois/ latency on a replay of distinct requests.
+
+Runs the stub stack twice: once cold, and once with maps_service warming the
+replayed locations up front (WARMUP_REGIONS_FILE). The warm run only starts
+replaying once /ready reports 200, as a load balancer would. Every replayed
+request differs in location or radius, so neither run is helped by the
+per-query cache; only the warm regions make the difference.
+
+    python benchmarks/bench_warmup.py --requests 200 --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from run_e2e import BASE_REQUEST, RESULTS_DIR, Recorder, Stack, drive, pois_once
+from stubs import parse_latency
+
+LOCATIONS = ["Tel Aviv", "Jaffa", "Ramat Gan", "Givatayim", "Bnei Brak", "Holon"]
+WARM_KEYS = "tourism,amenity,leisure"
+
+
+def replay_requests(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    radii = [round(1 + i * 0.05, 2) for i in range(count)]
+    rng.shuffle(radii)
+    return [{**BASE_REQUEST, "location": LOCATIONS[i % len(LOCATIONS)], "radius_km": r} for i, r in enumerate(radii)]
+
+
+async def replay(stack: Stack, requests: list, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=stack.urls["maps_service"], timeout=120) as maps:
+        # Tag generation is cached per interests string in both runs; keep it out of the numbers
+        await maps.post("/pois/", json={**BASE_REQUEST, "location": "warm-up probe"})
+        before = httpx.get(stack.urls["stubs"] + "/stats").json()
+        rec = Recorder()
+        wall = await drive(len(requests), concurrency, lambda i: pois_once(maps, requests[i], rec))
+        after = httpx.get(stack.urls["stubs"] + "/stats").json()
+    summary = rec.summary(wall)
+    summary["upstream_calls"] = {name: after[name] - before[name] for name in after}
+    return summary
+
+
+def run(mode: str, requests: list, args, tmp: Path) -> dict:
+    env = {}
+    if mode == "warm":
+        regions = tmp / "regions.json"
+        max_radius = max(r["radius_km"] for r in requests)
+        regions.write_text(json.dumps(
+            [{"name": loc, "location": loc, "radius_km": max_radius + 1} for loc in LOCATIONS]
+        ))
+        env = {
+            "WARMUP_REGIONS_FILE": str(regions),
+            "WARMUP_TAG_KEYS": args.keys,
+            "WARMUP_INTERVAL_S": "0",
+            "WARMUP_NOMINATIM_INTERVAL_S": str(args.nominatim_interval),
+        }
+    stub_args = ["--overpass-elements", str(args.overpass_elements)]
+    stack = Stack(parse_latency(args.latency), 0.1, args.output.parent / "logs", env, stub_args)
+    try:
+        stack.start()
+        started = time.perf_counter()
+        stack._wait_ready("maps_service", stack.urls["maps_service"] + "/ready", timeout=args.ready_timeout)
+        ready_s = time.perf_counter() - started
+        summary = asyncio.run(replay(stack, requests, args.concurrency))
+        summary["time_to_ready_s"] = round(ready_s, 2)
+        return summary
+    finally:
+        stack.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=SECONDS")
+    parser.add_argument("--overpass-elements", type=int, default=600)
+    parser.add_argument("--keys", default=WARM_KEYS, help="WARMUP_TAG_KEYS for the warm run")
+    parser.add_argument("--nominatim-interval", type=float, default=1.0)
+    parser.add_argument("--ready-timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "warmup.json")
+    args = parser.parse_args()
+
+    requests = replay_requests(args.requests, args.seed)
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("cold", "warm"):
+            summary = report[mode] = run(mode, requests, args, Path(tmp))
+            lat = summary["latency_ms"]
+            print(f"{mode:<5} ready={summary['time_to_ready_s']:.1f}s n={summary['count']} err={summary['errors']} "
+                  f"p50={lat['p50']:.0f}ms p95={lat['p95']:.0f}ms p99={lat['p99']:.0f}ms "
+                  f"upstream={summary['upstream_calls']}")
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Plan throughput versus number of worker processes.
+
+For each worker count, starts the stub stack with the backend on a SQLite job
+broker (no in-process workers), launches that many `backend/worker.py`
+processes and pushes distinct /route-progress plans through at a fixed client
+concurrency.
+
+    python benchmarks/bench_worker_scaling.py --workers 1 2 4 --requests 40
+
+Plan time should be dominated by upstream latency rather than local CPU for
+the numbers to mean anything; --overpass-elements trims the stub response.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+import httpx
+
+from run_e2e import RESULTS_DIR, Recorder, Stack, drive, request_variant, route_progress_once
+from stubs import parse_latency
+
+
+async def push_plans(stack: Stack, requests: int, concurrency: int, timeout: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=stack.urls["backend"], limits=limits, timeout=httpx.Timeout(timeout)
+    ) as backend:
+        rec = Recorder()
+        wall = await drive(
+            requests, concurrency, lambda i: route_progress_once(backend, request_variant(i, True), rec)
+        )
+    return rec.summary(wall)
+
+
+def run_with_workers(workers: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            "JOB_BROKER_URL": f"sqlite:///{tmp}/jobs.db",
+            "PLAN_LOCAL_WORKERS": "0",
+            "PLAN_MAX_QUEUED": str(args.requests),
+        }
+        stub_args = ["--overpass-elements", str(args.overpass_elements)]
+        stack = Stack(parse_latency(args.latency), 0.1, args.output.parent / "logs", env, stub_args)
+        try:
+            stack.start()
+            stack.start_workers(workers, args.worker_concurrency)
+            return asyncio.run(push_plans(stack, args.requests, args.concurrency, args.timeout))
+        finally:
+            stack.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--worker-concurrency", type=int, default=1, help="plans per worker process")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent SSE clients")
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=SECONDS")
+    parser.add_argument("--overpass-elements", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "worker_scaling.json")
+    args = parser.parse_args()
+
+    report = {}
+    for workers in args.workers:
+        summary = run_with_workers(workers, args)
+        report[workers] = summary
+        lat = summary["latency_ms"]
+        print(f"workers={workers:<3d} n={summary['count']:<4d} err={summary['errors']:<3d} "
+              f"{summary['throughput_rps']:.2f} plans/s  p50={lat['p50']:.0f}ms p95={lat['p95']:.0f}ms")
+
+    base = report[args.workers[0]]["throughput_rps"] / args.workers[0]
+    for workers, summary in report.items():
+        summary["scaling_efficiency"] = round(summary["throughput_rps"] / (base * workers), 3) if base else None
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({str(k): v for k, v in report.items()}, indent=2))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare two run_e2e.py result files.
+
+    python benchmarks/compare.py benchmarks/results/e2e-abc123.json benchmarks/results/e2e-def456.json
+"""
+import argparse
+import json
+from pathlib import Path
+
+METRICS = [
+    ("latency_ms", "p50"),
+    ("latency_ms", "p95"),
+    ("latency_ms", "p99"),
+    ("throughput_rps", None),
+    ("errors", None),
+]
+
+
+def metric(summary: dict, group: str, key):
+    value = summary.get(group)
+    return value.get(key) if key is not None and isinstance(value, dict) else value
+
+
+def change(old, new) -> str:
+    if not old:
+        return ""
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    args = parser.parse_args()
+
+    base = json.loads(args.baseline.read_text())
+    cand = json.loads(args.candidate.read_text())
+    print(f"baseline:  {base['meta'].get('revision')}  ({args.baseline})")
+    print(f"candidate: {cand['meta'].get('revision')}  ({args.candidate})")
+    for scenario in sorted(set(base["scenarios"]) | set(cand["scenarios"])):
+        old = base["scenarios"].get(scenario)
+        new = cand["scenarios"].get(scenario)
+        print(f"\n{scenario}")
+        if old is None or new is None:
+            print("  only present in", "candidate" if old is None else "baseline")
+            continue
+        for group, key in METRICS:
+            a, b = metric(old, group, key), metric(new, group, key)
+            label = f"{group}.{key}" if key else group
+            print(f"  {label:22s} {a:>10} -> {b:>10}  {change(a, b)}")
+        for stage in sorted(set(old["stages_ms"]) & set(new["stages_ms"])):
+            a, b = old["stages_ms"][stage]["p50"], new["stages_ms"][stage]["p50"]
+            print(f"  stage {stage[:30]:30s} p50 {a:>9} -> {b:>9}  {change(a, b)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+End-to-end benchmark: starts the upstream stubs plus llm_service, maps_service
+and backend as local processes, drives them at a fixed concurrency and writes
+latency percentiles, throughput and per-stage timings to a JSON file.
+
+    python benchmarks/run_e2e.py --requests 100 --concurrency 10 \\
+        --latency overpass=1.0 --output benchmarks/results/main.json
+
+Compare two runs with benchmarks/compare.py.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench_utils import REPO_DIR, percentiles
+from stubs import parse_latency
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+BASE_REQUEST = {
+    "location": "Tel Aviv",
+    "interests": "museum, art, culture",
+    "radius_km": 3,
+    "num_routes": 3,
+    "num_pois": 4,
+    "travel_mode": "walking",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Stack:
+    """
+    The stub upstreams and the three services, each in its own process.
+    """
+
+    def __init__(
+        self,
+        latency: Dict[str, float],
+        jitter: float,
+        log_dir: Path,
+        env: Optional[Dict[str, str]] = None,
+        stub_args: Optional[List[str]] = None,
+        repo: Path = REPO_DIR,
+    ):
+        self.repo = repo
+        self.latency = latency
+        self.jitter = jitter
+        self.log_dir = log_dir
+        self.env = env or {}
+        self.stub_args = stub_args or []
+        self.procs: Dict[str, subprocess.Popen] = {}
+        self.urls: Dict[str, str] = {}
+
+    def _spawn(
+        self, name: str, args: List[str], cwd: Path, env: Dict[str, str], listen: bool = True
+    ) -> Optional[str]:
+        port = free_port()
+        log = open(self.log_dir / f"{name}.log", "w")
+        proc = subprocess.Popen(
+            [sys.executable, *args, *(["--port", str(port)] if listen else [])],
+            cwd=cwd,
+            env={**os.environ, **env},
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        self.procs[name] = proc
+        if not listen:
+            return None
+        self.urls[name] = f"http://127.0.0.1:{port}"
+        return self.urls[name]
+
+    def _env(self, service_dir: Path, extra_env: Dict[str, str]) -> Dict[str, str]:
+        return {
+            "PYTHONPATH": os.pathsep.join([str(service_dir), str(self.repo)]),
+            "ORS_API_KEY": "bench-key",
+            "GROQ_API_KEY": "bench-key",
+            # Every simulated client connects from 127.0.0.1
+            "PLAN_MAX_PER_CLIENT": "100000",
+            **self.env,
+            **extra_env,
+        }
+
+    def _service(self, name: str, app: str, extra_env: Dict[str, str]) -> str:
+        service_dir = self.repo / name
+        return self._spawn(
+            name,
+            ["-m", "uvicorn", app, "--host", "127.0.0.1", "--log-level", "warning", "--timeout-keep-alive", "75"],
+            service_dir,
+            self._env(service_dir, extra_env),
+        )
+
+    def start_workers(self, count: int, concurrency: int) -> None:
+        """
+        Plan worker processes for a shared broker (set JOB_BROKER_URL in `env`).
+        """
+        service_dir = self.repo / "backend"
+        env = self._env(service_dir, {"MAPS_SERVICE_URL": self.urls["maps_service"]})
+        for i in range(count):
+            self._spawn(f"worker{i}", ["worker.py", "--concurrency", str(concurrency)],
+                        service_dir, env, listen=False)
+
+    def start(self) -> None:
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        stub_args = [str(Path(__file__).parent / "stubs.py"), "--jitter", str(self.jitter), *self.stub_args]
+        for name, seconds in self.latency.items():
+            stub_args += ["--latency", f"{name}={seconds}"]
+        stubs = self._spawn("stubs", stub_args, REPO_DIR, {})
+        llm = self._service("llm_service", "app.main:app", {"GROQ_BASE_URL": f"{stubs}/openai/v1"})
+        maps = self._service(
+            "maps_service",
+            "app.main:app",
+            {
+                "NOMINATIM_URL": f"{stubs}/search",
+                "OVERPASS_API_URL": f"{stubs}/api/interpreter",
+                "ORS_BASE_URL": stubs,
+                "LLM_SERVICE_URL": llm,
+            },
+        )
+        self._service(
+            "backend",
+            "main:app",
+            {"MAPS_SERVICE_URL": maps, "NOMINATIM_URL": f"{stubs}/search"},
+        )
+        for name, url in self.urls.items():
+            self._wait_ready(name, url + ("/stats" if name == "stubs" else "/health"))
+
+    def _wait_ready(self, name: str, url: str, timeout: float = 30) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with contextlib.suppress(httpx.HTTPError):
+                if httpx.get(url, timeout=1).status_code == 200:
+                    return
+            time.sleep(0.2)
+        raise RuntimeError(f"{name} did not become ready; see {self.log_dir / name}.log")
+
+    def stop(self) -> None:
+        for proc in self.procs.values():
+            proc.terminate()
+        for proc in self.procs.values():
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                proc.wait(timeout=10)
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    timings = {}
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, _, rest = entry.partition(";")
+        if rest.startswith("dur="):
+            timings[name] = float(rest[4:])
+    return timings
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.errors: List[str] = []
+
+    def summary(self, wall_time: float) -> dict:
+        latency_ms = [x * 1000 for x in self.latencies]
+        return {
+            "count": len(self.latencies),
+            "errors": len(self.errors),
+            "error_samples": self.errors[:5],
+            "wall_time_s": round(wall_time, 3),
+            "throughput_rps": round(len(self.latencies) / wall_time, 3) if wall_time else 0,
+            "latency_ms": {
+                **{k: round(v, 2) for k, v in percentiles(latency_ms).items()},
+                "mean": round(sum(latency_ms) / len(latency_ms), 2) if latency_ms else 0,
+                "max": round(max(latency_ms), 2) if latency_ms else 0,
+            },
+            "stages_ms": {
+                name: {k: round(v, 2) for k, v in percentiles(samples).items()}
+                for name, samples in sorted(self.stages.items())
+            },
+        }
+
+
+async def route_progress_once(client: httpx.AsyncClient, params: dict, rec: Recorder) -> None:
+    started = time.perf_counter()
+    marks = []
+    event = None
+    async with client.stream("GET", "/route-progress", params=params) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                marks.append((event, line[5:].strip(), time.perf_counter()))
+                if event in ("complete", "error"):
+                    break
+    if not marks or marks[-1][0] != "complete":
+        rec.errors.append(marks[-1][1] if marks else f"HTTP {response.status_code}")
+        return
+    rec.latencies.append(marks[-1][2] - started)
+    # A stage lasts until the next event arrives
+    for (kind, name, at), (_, _, next_at) in zip(marks, marks[1:]):
+        if kind == "stage":
+            rec.stages[name].append((next_at - at) * 1000)
+
+
+async def pois_once(client: httpx.AsyncClient, payload: dict, rec: Recorder) -> None:
+    started = time.perf_counter()
+    response = await client.post("/pois/", json=payload)
+    if response.status_code != 200:
+        rec.errors.append(f"HTTP {response.status_code}: {response.text[:200]}")
+        return
+    rec.latencies.append(time.perf_counter() - started)
+    for name, ms in parse_server_timing(response.headers.get("Server-Timing", "")).items():
+        rec.stages[name].append(ms)
+
+
+async def routes_once(client: httpx.AsyncClient, payload: dict, rec: Recorder) -> None:
+    started = time.perf_counter()
+    response = await client.post("/routes/optimized", json=payload)
+    if response.status_code != 200:
+        rec.errors.append(f"HTTP {response.status_code}: {response.text[:200]}")
+        return
+    rec.latencies.append(time.perf_counter() - started)
+
+
+async def replan_once(client: httpx.AsyncClient, route_id: str, i: int, rec: Recorder) -> None:
+    # Alternate the edits a user would make after looking at a plan
+    body = [{"num_pois": 5}, {"travel_mode": "cycling"}, {"num_pois": 3}, {"travel_mode": "walking"}][i % 4]
+    started = time.perf_counter()
+    response = await client.post(f"/routes/{route_id}/replan", json=body)
+    if response.status_code != 200:
+        rec.errors.append(f"HTTP {response.status_code}: {response.text[:200]}")
+        return
+    rec.latencies.append(time.perf_counter() - started)
+
+
+async def create_plan(client: httpx.AsyncClient, params: dict) -> str:
+    async with client.stream("GET", "/route-progress", params=params) as response:
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:") and event in ("complete", "error"):
+                if event == "error":
+                    raise RuntimeError(line[5:].strip())
+                return line[5:].strip()
+    raise RuntimeError(f"route-progress ended without a route ID (HTTP {response.status_code})")
+
+
+async def drive(total: int, concurrency: int, make_call) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await make_call(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - started
+
+
+def request_variant(i: int, distinct: bool) -> dict:
+    # A distinct radius per request keeps the backend plan cache from answering
+    return {**BASE_REQUEST, "radius_km": BASE_REQUEST["radius_km"] + i / 100} if distinct else BASE_REQUEST
+
+
+async def run_scenarios(stack: Stack, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    results = {}
+    async with httpx.AsyncClient(base_url=stack.urls["maps_service"], limits=limits, timeout=timeout) as maps:
+        if "maps_pois" in args.scenarios:
+            rec = Recorder()
+            wall = await drive(args.requests, args.concurrency,
+                               lambda i: pois_once(maps, request_variant(i, args.distinct), rec))
+            results["maps_pois"] = rec.summary(wall)
+
+        if "maps_routes" in args.scenarios:
+            seed = await maps.post("/pois/", json=BASE_REQUEST)
+            seed.raise_for_status()
+            payload = {"request": BASE_REQUEST, "pois": seed.json()}
+            rec = Recorder()
+            wall = await drive(args.requests, args.concurrency, lambda i: routes_once(maps, payload, rec))
+            results["maps_routes"] = rec.summary(wall)
+
+    async with httpx.AsyncClient(base_url=stack.urls["backend"], limits=limits, timeout=timeout) as backend:
+        if "route_progress" in args.scenarios:
+            rec = Recorder()
+            wall = await drive(
+                args.requests,
+                args.concurrency,
+                lambda i: route_progress_once(backend, request_variant(i, args.distinct), rec),
+            )
+            results["route_progress"] = rec.summary(wall)
+
+        if "replan" in args.scenarios:
+            route_id = await create_plan(backend, BASE_REQUEST)
+            rec = Recorder()
+            wall = await drive(args.requests, args.concurrency,
+                               lambda i: replan_once(backend, route_id, i, rec))
+            results["replan"] = rec.summary(wall)
+    return results
+
+
+def git_revision() -> Optional[str]:
+    with contextlib.suppress(Exception):
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True
+        ).strip()
+    return None
+
+
+SCENARIOS = ("maps_pois", "maps_routes", "route_progress", "replan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenario", dest="scenarios", action="append", choices=SCENARIOS,
+                        help="run only these scenarios (repeatable); default all")
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=SECONDS",
+                        help="stub upstream delay, e.g. overpass=1.0 (repeatable)")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--same-request", dest="distinct", action="store_false",
+                        help="send identical plans, so backend caching is exercised")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    args.scenarios = args.scenarios or list(SCENARIOS)
+
+    revision = git_revision()
+    output = args.output or RESULTS_DIR / f"e2e-{revision or 'worktree'}.json"
+    latency = parse_latency(args.latency)
+    stack = Stack(latency, args.jitter, output.parent / "logs")
+    try:
+        stack.start()
+        scenarios = asyncio.run(run_scenarios(stack, args))
+        upstream_calls = httpx.get(stack.urls["stubs"] + "/stats").json()
+    finally:
+        stack.stop()
+
+    report = {
+        "meta": {
+            "revision": revision,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "distinct_requests": args.distinct,
+            "upstream_latency_s": latency,
+            "jitter": args.jitter,
+            "upstream_calls": upstream_calls,
+        },
+        "scenarios": scenarios,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    for name, summary in scenarios.items():
+        lat = summary["latency_ms"]
+        print(f"{name:15s} n={summary['count']:<4d} err={summary['errors']:<3d} "
+              f"p50={lat['p50']:.0f}ms p95={lat['p95']:.0f}ms p99={lat['p99']:.0f}ms "
+              f"{summary['throughput_rps']:.2f} req/s")
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
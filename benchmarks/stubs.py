@@ -0,0 +1,149 @@
+"""
+Local stand-ins for every external upstream, replaying the JSON fixtures in
+benchmarks/fixtures with a configurable delay:
+
+    Nominatim   GET  /search
+    Overpass    POST /api/interpreter
+    Groq        POST /openai/v1/chat/completions
+    ORS         POST /v2/directions/{profile}/geojson
+
+    python benchmarks/stubs.py --port 9100 --latency overpass=1.0 --latency llm=0.4
+"""
+import argparse
+import asyncio
+import copy
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+DEFAULT_LATENCY = {
+    "nominatim": 0.15,
+    "overpass": 0.8,
+    "llm": 0.5,
+    "ors": 0.3,
+}
+
+
+def parse_latency(values) -> Dict[str, float]:
+    """
+    Turn ["overpass=1.0", "llm=0.2"] into a full latency map.
+    """
+    latency = dict(DEFAULT_LATENCY)
+    for item in values or []:
+        name, _, seconds = item.partition("=")
+        if name not in latency:
+            raise ValueError(f"Unknown upstream '{name}', expected one of {sorted(latency)}")
+        latency[name] = float(seconds)
+    return latency
+
+
+def load_fixture(name: str):
+    with open(FIXTURES_DIR / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def create_stub_app(
+    latency: Optional[Dict[str, float]] = None,
+    jitter: float = 0.0,
+    seed: int = 0,
+    overpass_elements: Optional[int] = None,
+) -> FastAPI:
+    latency = {**DEFAULT_LATENCY, **(latency or {})}
+    rng = random.Random(seed)
+    nominatim = load_fixture("nominatim_search.json")
+    overpass = load_fixture("overpass_interpreter.json")
+    if overpass_elements is not None:
+        overpass["elements"] = overpass["elements"][:overpass_elements]
+    groq_tags = load_fixture("groq_tags.json")
+    ors_template = load_fixture("ors_directions.json")
+    app = FastAPI(title="Upstream stubs")
+    app.state.calls = {name: 0 for name in latency}
+
+    async def delay(upstream: str) -> None:
+        app.state.calls[upstream] += 1
+        seconds = latency[upstream]
+        if jitter:
+            seconds *= 1 + rng.uniform(-jitter, jitter)
+        await asyncio.sleep(max(seconds, 0))
+
+    @app.get("/search")
+    async def search(q: str = ""):
+        await delay("nominatim")
+        return nominatim
+
+    @app.post("/api/interpreter")
+    async def interpreter():
+        await delay("overpass")
+        return overpass
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await delay("llm")
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(groq_tags)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.post("/v2/directions/{profile}/geojson")
+    async def directions(profile: str, request: Request):
+        body = await request.json()
+        await delay("ors")
+        coords = body.get("coordinates") or []
+        # Straight segments between the waypoints, 4 points per leg
+        line, way_points = [], []
+        for (lon1, lat1), (lon2, lat2) in zip(coords, coords[1:]):
+            way_points.append(len(line))
+            line.extend(
+                [lon1 + (lon2 - lon1) * t / 4, lat1 + (lat2 - lat1) * t / 4] for t in range(4)
+            )
+        if coords:
+            way_points.append(len(line))
+            line.append(list(coords[-1]))
+        response = copy.deepcopy(ors_template)
+        feature = response["features"][0]
+        feature["geometry"]["coordinates"] = line
+        feature["properties"]["way_points"] = way_points
+        return JSONResponse(response)
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.calls
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=SECONDS")
+    parser.add_argument("--jitter", type=float, default=0.0, help="relative jitter, e.g. 0.2")
+    parser.add_argument("--overpass-elements", type=int, default=None,
+                        help="serve only the first N Overpass elements (less CPU per plan)")
+    args = parser.parse_args()
+    app = create_stub_app(parse_latency(args.latency), args.jitter,
+                          overpass_elements=args.overpass_elements)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
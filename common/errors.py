@@ -0,0 +1,20 @@
+"""
+Errors a service reports on behalf of its own upstreams.
+
+A 502/503 from one of our services usually means something behind it failed
+(Groq, Overpass, Nominatim, another of our services), not the service itself.
+Such answers carry UPSTREAM_ERROR_HEADER naming that upstream, so callers
+neither retry them (the service has already done so) nor count them against
+the service's circuit breaker (see common.http).
+
+    raise upstream_error(503, "Failed to fetch POIs from Overpass.", upstream="overpass")
+"""
+from fastapi import HTTPException
+
+UPSTREAM_ERROR_HEADER = "X-Upstream-Error"
+
+
+def upstream_error(status_code: int, detail: str, upstream: str) -> HTTPException:
+    return HTTPException(
+        status_code=status_code, detail=detail, headers={UPSTREAM_ERROR_HEADER: upstream}
+    )
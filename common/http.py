@@ -0,0 +1,298 @@
+"""
+Pooled HTTP clients for calls to other services and upstream APIs.
+
+One client per downstream keeps its connections alive in a pool instead of
+opening a TCP connection for every call. Each downstream has one circuit
+breaker, shared by its sync and async clients. Idempotent calls are retried
+with jittered exponential backoff. Failures a downstream reports for its own
+upstreams (see common.errors) are neither retried nor held against it. Pool
+size and policies come from the environment (HTTP_POOL_SIZE, HTTP_RETRIES,
+HTTP_BREAKER_FAILURES, ...).
+
+    llm = ServiceClient("llm_service", settings.llm_service_url)
+    response = llm.request("POST", "/generate-tags", json=body, idempotent=True, timeout=10)
+
+    maps = AsyncServiceClient("maps_service", MAPS_SERVICE_URL)
+    response = await maps.request("GET", "/sessions/abc", timeout=20)
+    await maps.aclose()  # on shutdown
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+import requests
+from prometheus_client import Gauge
+from requests.adapters import HTTPAdapter
+
+from common.errors import UPSTREAM_ERROR_HEADER
+from common.telemetry import trace_headers
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "64"))  # connections kept alive per downstream
+KEEPALIVE_S = float(os.getenv("HTTP_KEEPALIVE_S", "30"))  # idle expiry; below the servers' keep-alive
+RETRIES = int(os.getenv("HTTP_RETRIES", "2"))  # extra attempts, idempotent calls only
+BACKOFF_BASE_S = float(os.getenv("HTTP_BACKOFF_BASE_S", "0.1"))
+BACKOFF_CAP_S = float(os.getenv("HTTP_BACKOFF_CAP_S", "2"))
+BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))  # consecutive, to open
+BREAKER_RESET_S = float(os.getenv("HTTP_BREAKER_RESET_S", "30"))  # open time before a trial call
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Answers that count against the downstream's breaker. Only a gateway timeout:
+# our services answer 502/503 on purpose (an upstream is down, a request went
+# over its CPU budget), and counting those would cut off a healthy service
+BREAKER_STATUSES = frozenset({504})
+# Gateway errors are retried; 503 is not, repeating the call only adds load
+RETRY_STATUSES = frozenset({502, 504})
+
+CIRCUIT_OPEN = Gauge(
+    "travel_downstream_circuit_open",
+    "1 while calls to the downstream are short-circuited",
+    ["downstream"],
+)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, downstream: str, retry_in_s: float):
+        super().__init__(f"{downstream} is unavailable (circuit open, retry in {retry_in_s:.0f}s)")
+        self.downstream = downstream
+        self.retry_in_s = retry_in_s
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, so callers fail fast
+    instead of tying up threads and connections on a dead downstream. Once
+    `reset_timeout_s` has passed, one trial call is let through per period:
+    a success closes the circuit and a failure keeps it open.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURES,
+        reset_timeout_s: float = BREAKER_RESET_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> None:
+        if self._opened_at is None:
+            return
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = self._clock() - self._opened_at
+            if waited < self.reset_timeout_s:
+                raise CircuitOpenError(self.name, self.reset_timeout_s - waited)
+            # This call is the trial; everyone else waits for another period
+            self._opened_at = self._clock()
+
+    def record_success(self) -> None:
+        if not self._failures and self._opened_at is None:
+            return
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit for %s closed", self.name)
+                CIRCUIT_OPEN.labels(self.name).set(0)
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures < self.failure_threshold:
+                return
+            if self._opened_at is None:
+                logger.warning(
+                    "Circuit for %s opened after %d consecutive failures", self.name, self._failures
+                )
+                CIRCUIT_OPEN.labels(self.name).set(1)
+            self._opened_at = self._clock()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(downstream: str) -> CircuitBreaker:
+    """
+    The process-wide breaker of a downstream service.
+    """
+    breaker = _breakers.get(downstream)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(downstream, CircuitBreaker(downstream))
+    return breaker
+
+
+def backoff_delays(
+    base_s: float = BACKOFF_BASE_S, cap_s: float = BACKOFF_CAP_S, rng: Callable[[], float] = random.random
+) -> Iterator[float]:
+    """
+    "Full jitter" backoff: a uniform delay up to an exponentially growing
+    ceiling, so clients that failed together don't retry together.
+    """
+    attempt = 0
+    while True:
+        yield rng() * min(cap_s, base_s * 2 ** attempt)
+        attempt += 1
+
+
+class _Downstream:
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        pool_size: int = POOL_SIZE,
+        retries: int = RETRIES,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.retries = retries
+        self.breaker = breaker or breaker_for(name)
+
+    def _attempts(self, method: str, idempotent: Optional[bool]) -> int:
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        return 1 + self.retries if idempotent else 1
+
+    def _record_response(self, response) -> bool:
+        """
+        Update the breaker with an answer; True if the call should be retried.
+        """
+        # The downstream answered; what failed was one of its upstreams
+        if UPSTREAM_ERROR_HEADER in response.headers:
+            self.breaker.record_success()
+            return False
+        if response.status_code in BREAKER_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response.status_code in RETRY_STATUSES
+
+    def _log_retry(self, method: str, path: str, reason, delay: float) -> None:
+        logger.warning(
+            "%s %s%s failed (%s); retrying in %.2fs", method, self.name, path, reason, delay
+        )
+
+
+class ServiceClient(_Downstream):
+    """
+    Blocking client over a pooled `requests.Session`; safe to share between threads.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = requests.Session()
+        # pool_block=False: a burst beyond the pool still gets connections,
+        # they just aren't kept afterwards
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(
+        self, method: str, path: str = "", *, idempotent: Optional[bool] = None, **kwargs
+    ) -> requests.Response:
+        method = method.upper()
+        attempts = self._attempts(method, idempotent)
+        kwargs["headers"] = {**trace_headers(), **(kwargs.get("headers") or {})}
+        delays = backoff_delays(BACKOFF_BASE_S, BACKOFF_CAP_S)
+        for attempt in range(1, attempts + 1):
+            self.breaker.before_call()
+            try:
+                response = self.session.request(method, self.base_url + path, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.breaker.record_failure()
+                # A read timeout means the downstream is still busy with the
+                # call; sending it again would only add to its load
+                if attempt == attempts or isinstance(e, requests.ReadTimeout):
+                    raise
+                reason = e
+            else:
+                if not self._record_response(response) or attempt == attempts:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            delay = next(delays)
+            self._log_retry(method, path, reason, delay)
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncServiceClient(_Downstream):
+    """
+    Async client over a pooled `httpx.AsyncClient`, created on first use in
+    the running event loop.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._http = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _client(self):
+        # httpx is only a dependency of the services that make async calls
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._loop is not loop:
+            # A pool is bound to the loop that opened its connections
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=KEEPALIVE_S,
+                ),
+            )
+            self._loop = loop
+        return self._http
+
+    async def request(self, method: str, path: str = "", *, idempotent: Optional[bool] = None, **kwargs):
+        import httpx
+
+        method = method.upper()
+        attempts = self._attempts(method, idempotent)
+        kwargs["headers"] = {**trace_headers(), **(kwargs.get("headers") or {})}
+        client = self._client()
+        delays = backoff_delays(BACKOFF_BASE_S, BACKOFF_CAP_S)
+        for attempt in range(1, attempts + 1):
+            self.breaker.before_call()
+            try:
+                response = await client.request(method, self.base_url + path, **kwargs)
+            except httpx.PoolTimeout:
+                raise  # our own pool is exhausted, which says nothing about the downstream
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                if attempt == attempts or isinstance(e, httpx.ReadTimeout):
+                    raise
+                reason = e
+            else:
+                if not self._record_response(response) or attempt == attempts:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            delay = next(delays)
+            self._log_retry(method, path, reason, delay)
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        http, self._http, self._loop = self._http, None, None
+        if http is not None:
+            await http.aclose()
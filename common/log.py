@@ -0,0 +1,131 @@
+"""
+Process-wide logging setup shared by all services.
+
+Records are handed to a queue and written by a background listener thread,
+so request threads never block on log I/O. Level and format come from the
+environment (LOG_LEVEL, LOG_FORMAT=text|json). Each record carries the
+service name and the current request ID.
+
+    configure_logging("maps_service")
+    logger = logging.getLogger(__name__)
+    logger.debug("Overpass returned %d elements", len(elements))
+
+    if logger.isEnabledFor(logging.DEBUG) and sample("route_pois", every=100):
+        logger.debug("Route POIs: %s", [p.name for p in selected])
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterator, Optional, TextIO
+
+from common.telemetry import current_request_id
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(service)s %(name)s [%(request_id)s] %(message)s"
+
+_listener: Optional[QueueListener] = None
+_counters: Dict[str, Iterator[int]] = {}
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamp records with the service name and the request ID of the caller.
+    """
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.service = self.service
+        record.request_id = current_request_id() or "-"
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "service": getattr(record, "service", None),
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now (they may change after the call returns) but
+        # leave formatting and I/O to the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def sample(key: str, every: int) -> bool:
+    """
+    True for the first event of `key` and then for every `every`-th one.
+    Used to thin out high-volume log lines.
+    """
+    counter = _counters.get(key)
+    if counter is None:
+        counter = _counters.setdefault(key, itertools.count())
+    return next(counter) % every == 0
+
+
+def configure_logging(
+    service: str,
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    stream: Optional[TextIO] = None,
+) -> None:
+    """
+    Route all logging through a queue to one background writer.
+    Safe to call more than once; the last call wins.
+    """
+    global _listener
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+
+    handler = _DeferredQueueHandler(log_queue)
+    handler.addFilter(ContextFilter(service))
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    # urllib3 logs every connection at DEBUG; keep it quiet unless asked for
+    logging.getLogger("urllib3").setLevel(max(root.level, logging.INFO))
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records; registered with atexit.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,170 @@
+"""
+Timing, Prometheus metrics and request-ID propagation shared by all services.
+
+    app = FastAPI(...)
+    setup_telemetry(app, "maps_service")
+
+    @timed("geocode")
+    def geocode_location(...): ...
+
+    requests.post(url, json=payload, headers=trace_headers())
+"""
+import functools
+import inspect
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Most stages are upstream round trips between a few ms and tens of seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "travel_stage_duration_seconds",
+    "Time spent in one pipeline stage",
+    ["service", "stage"],
+    buckets=BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "travel_http_request_duration_seconds",
+    "Time to serve an HTTP request, including streamed bodies",
+    ["service", "method", "route", "status"],
+    buckets=BUCKETS,
+)
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_service_name = "unknown"
+_stage_children: Dict[str, Histogram] = {}
+
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+def trace_headers() -> Dict[str, str]:
+    """
+    Headers to attach to outgoing inter-service calls so the trace continues.
+    """
+    request_id = request_id_var.get()
+    return {REQUEST_ID_HEADER: request_id} if request_id else {}
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children[stage] = STAGE_SECONDS.labels(_service_name, stage)
+    child.observe(seconds)
+
+
+class timed:
+    """
+    Record the duration of a stage; works as a decorator on sync or async
+    functions and as a `with` block. Failed calls are recorded too.
+    """
+
+    __slots__ = ("stage", "_started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._started = 0.0
+
+    def __enter__(self) -> "timed":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        observe_stage(self.stage, time.perf_counter() - self._started)
+
+    def __call__(self, func):
+        stage = self.stage
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    observe_stage(stage, time.perf_counter() - started)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe_stage(stage, time.perf_counter() - started)
+
+        return wrapper
+
+
+class TelemetryMiddleware:
+    """
+    Plain ASGI middleware (so SSE streams pass through untouched) that assigns
+    or adopts the request ID and records request latency per route template.
+    """
+
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.labels(
+                self.service,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(time.perf_counter() - started)
+            request_id_var.reset(token)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+def setup_telemetry(app, service: str) -> None:
+    """
+    Install the request-ID/latency middleware and expose `/metrics`.
+    """
+    global _service_name
+    _service_name = service
+    _stage_children.clear()
+    app.add_middleware(TelemetryMiddleware, service=service)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
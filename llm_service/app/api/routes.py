@@ -1,6 +1,7 @@
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
 from app.services.groq_client import call_groq_for_tags
+from common.errors import upstream_error
 from models.tag_request import TagRequest
 
 router = APIRouter()
@@ -9,8 +10,8 @@ router = APIRouter()
 @router.post("/generate-tags")
 async def generate_tags(req: TagRequest):
     try:
-        tags = call_groq_for_tags(req.interests, req.valid_tags)
+        tags = call_groq_for_tags(req.interests, req.valid_tags, req.version)
         return tags
     except Exception as e:
         logging.error(f"🧠 Groq tag generation failed: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=502, detail="Tag generation service error.")
+        raise upstream_error(502, "Tag generation service error.", upstream="groq")
@@ -1,7 +1,25 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from app.api.routes import router
+from app.services.groq_client import get_client
+from common.log import configure_logging
+from common.telemetry import setup_telemetry
 
-app = FastAPI(title="LLM Service")
+configure_logging("llm_service")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the Groq client in the background so /health answers right away
+    startup = asyncio.ensure_future(asyncio.to_thread(get_client))
+    yield
+    with suppress(Exception):
+        await startup
+
+
+app = FastAPI(title="LLM Service", lifespan=lifespan)
+setup_telemetry(app, "llm_service")
 
 app.include_router(router)
 
@@ -1,15 +1,33 @@
 import json
 import logging
 import re
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
 from fastapi import HTTPException
-from openai import OpenAI
 from app.config import settings
+from common.telemetry import timed
 
-# Setup Groq API client
-client = OpenAI(
-    base_url="https://api.groq.com/openai/v1",
-    api_key=settings.groq_api_key,
-)
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+# Groq API client; importing `openai` takes most of this service's startup,
+# so it is created on first use (or by the lifespan, in the background)
+_client: Optional["OpenAI"] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> "OpenAI":
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                _client = OpenAI(
+                    base_url=settings.groq_base_url,
+                    api_key=settings.groq_api_key,
+                )
+    return _client
 
 # --- Constants ---
 SYSTEM_PROMPT = "You are a travel assistant AI. Only respond with a JSON array."
@@ -32,22 +50,39 @@ User interests: {user_interests}
 """.strip()
 
 
-# --- Main Groq Call ---
-def call_groq_for_tags(user_interests: str, valid_tags: dict) -> list[dict]:
-    """Generate Overpass tags from user interests using Groq LLM."""
+# Prompt tag lists by reference version; the reference rarely changes
+_tag_lists: Dict[str, str] = {}
+MAX_TAG_LISTS = 8
 
+
+def format_tag_list(valid_tags: dict, version: Optional[str] = None) -> str:
+    if version is not None and version in _tag_lists:
+        return _tag_lists[version]
     formatted_tags = [
         f"{key}={val}" for key, values in valid_tags.items() for val in values
     ]
-    readable_tag_list = "\n- ".join(formatted_tags)
+    tag_list = json.dumps("\n- ".join(formatted_tags), indent=2)
+    if version is not None:
+        if len(_tag_lists) >= MAX_TAG_LISTS:
+            _tag_lists.clear()
+        _tag_lists[version] = tag_list
+    return tag_list
+
+
+# --- Main Groq Call ---
+@timed("groq_completion")
+def call_groq_for_tags(
+    user_interests: str, valid_tags: dict, version: Optional[str] = None
+) -> list[dict]:
+    """Generate Overpass tags from user interests using Groq LLM."""
 
     prompt = USER_PROMPT_TEMPLATE.format(
-        valid_tags=json.dumps(readable_tag_list, indent=2),
+        valid_tags=format_tag_list(valid_tags, version),
         user_interests=user_interests,
     )
 
     try:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="llama3-8b-8192",
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
@@ -68,7 +103,7 @@ def call_groq_for_tags(user_interests: str, valid_tags: dict) -> list[dict]:
             if not match:
                 raise ValueError("No JSON array found in LLM response.")
             parsed = json.loads(match.group(0))
-            logging.debug("Groq parsed tags from LLM response:\n{parsed}")
+            logging.debug("Groq parsed tags from LLM response: %s", parsed)
         return [
             tag
             for tag in parsed
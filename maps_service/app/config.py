@@ -2,6 +2,25 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     ors_api_key: str
+    # Upstream endpoints; overridable so benchmarks can point at local stubs
+    ors_base_url: str = "https://api.openrouteservice.org"
+    nominatim_url: str = "https://nominatim.openstreetmap.org/search"
+    overpass_api_url: str = "https://overpass-api.de/api/interpreter"
+    llm_service_url: str = "http://llm-service:8000"
+
+    # Caches and warm-up (see app/services/warmup.py)
+    geocode_cache_ttl_s: float = 7 * 24 * 3600
+    poi_cache_ttl_s: float = 24 * 3600
+    warmup_regions_file: str = ""  # empty disables warm-up; the service is ready at once
+    warmup_tag_keys: str = ""  # comma-separated; empty means every key in osm_tags_cache.json
+    warmup_interval_s: float = 6 * 3600  # 0 warms up once at startup only
+    warmup_snapshot_path: str = ""
+    warmup_overpass_concurrency: int = 2
+    warmup_nominatim_interval_s: float = 1.0  # Nominatim's usage policy: 1 request/s
+
+    # Route selection (see app/services/route_optimizer.py); 0 workers runs it in the request thread
+    optimizer_workers: int = 0
+    optimizer_cpu_budget_s: float = 5.0
 
     class Config:
         env_file = ".env"
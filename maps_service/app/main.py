@@ -1,23 +1,76 @@
+import asyncio
 import logging
-from fastapi import FastAPI
-from typing import List, Tuple, Dict
+import threading
+import time
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request, Response
+from pydantic import BaseModel, Field
+from typing import List, Optional, Tuple, Dict
 
 from app.services.maps.geocoding import geocode_location
 from app.services.maps.overpass_service import (
+    fetch_poi_features,
+    filter_pois,
     get_overpass_tags_from_interests,
-    get_pois_from_overpass,
 )
 from app.services.generate_optimized_routes import generate_optimized_routes
-
+from app.services.route_optimizer import OptimizationCancelled, route_optimizer
+from app.services.maps.route_service import get_ors_client
+from app.services.maps.tag_reference import get_tag_reference
+from app.services.pipeline import Stage, run_pipeline
+from app.services import replanning
+from app.services.warmup import run_schedule, warmup_state
+from app.config import settings
+from common.log import configure_logging
+from common.telemetry import setup_telemetry
 from models.route_request import RouteGenerationRequest
 from models.llm_suggestion import LLMPOISuggestion
 
+configure_logging("maps_service")
+logger = logging.getLogger(__name__)
+
+
+async def initialize() -> None:
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        asyncio.to_thread(get_ors_client),
+        asyncio.to_thread(get_tag_reference),
+        asyncio.to_thread(route_optimizer.start),
+        return_exceptions=True,
+    )
+    for name, result in zip(("ORS client", "tag reference", "route optimizer"), results):
+        if isinstance(result, BaseException):
+            logger.error("Startup: %s failed to initialize: %s", name, result)
+    logger.info("Startup initialization finished in %.2fs", time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy clients and the optimizer pool come up in the background so /health
+    # answers right away; a request arriving first initializes what it needs itself
+    startup = asyncio.ensure_future(initialize())
+    warmup = None
+    if settings.warmup_regions_file:
+        warmup = asyncio.create_task(
+            run_schedule(settings.warmup_regions_file, settings.warmup_interval_s)
+        )
+    yield
+    if warmup is not None:
+        warmup.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup
+    with suppress(Exception):
+        await startup
+    await asyncio.to_thread(route_optimizer.shutdown)
+
 
 app = FastAPI(
     title="Maps & Routing API",
     description="Geocoding, POI-matching and route-generation endpoints",
     version="0.1.0",
+    lifespan=lifespan,
 )
+setup_telemetry(app, "maps_service")
 
 
 @app.get("/geocode/", response_model=Tuple[float, float])
@@ -30,24 +83,101 @@ async def geocode(location: str):
 
 
 @app.post("/pois/", response_model=List[LLMPOISuggestion])
-async def pois(request: RouteGenerationRequest):
+async def pois(request: RouteGenerationRequest, response: Response):
     """
     Given interests, location, radius, num_routes etc. return a list of POIs.
+    Tag generation and geocoding don't depend on each other, so they run
+    concurrently; stage timings are returned in the `Server-Timing` header.
     """
-    tags = get_overpass_tags_from_interests(request.interests)
-    logging.debug(f"Generated tags from interests: {tags}")
-    pois = get_pois_from_overpass(request,tags)
-    return pois
+    radius_m = int(request.radius_km * 1000)
+    result = await run_pipeline(
+        [
+            Stage("tags", lambda: get_overpass_tags_from_interests(request.interests)),
+            Stage("geocode", lambda: geocode_location(request.location)),
+            Stage(
+                "overpass",
+                lambda tags, center: fetch_poi_features(tags, *center, radius_m),
+                depends_on=("tags", "geocode"),
+            ),
+            Stage(
+                "filter",
+                lambda features, tags: filter_pois(features, request, tags),
+                depends_on=("overpass", "tags"),
+            ),
+        ]
+    )
+    logger.debug("Generated tags from interests: %s", result.results["tags"])
+    response.headers["Server-Timing"] = result.server_timing()
+    return result.results["filter"]
+
+
+# How often /routes/optimized checks whether its client is still connected
+DISCONNECT_POLL_S = 0.25
 
 
 @app.post("/routes/optimized")
-async def routes(request: Dict):
+async def routes(request: Dict, http_request: Request):
     """
     Generate optimized routes based on request parameters and POIs.
+    If the client goes away, route selection and the remaining ORS calls are cancelled.
     """
     route_request = RouteGenerationRequest(**request["request"])
     pois = [LLMPOISuggestion(**poi) for poi in request["pois"]]
-    return generate_optimized_routes(route_request, pois)
+    cancel = threading.Event()
+    # ORS calls block; keep them off the event loop so plans route concurrently
+    plan = asyncio.ensure_future(
+        asyncio.to_thread(generate_optimized_routes, route_request, pois, cancel)
+    )
+    try:
+        while True:
+            done, _ = await asyncio.wait({plan}, timeout=DISCONNECT_POLL_S)
+            if done:
+                return plan.result()
+            if await http_request.is_disconnected():
+                logger.info("Client left; cancelling route optimization")
+                cancel.set()
+                break
+    finally:
+        cancel.set()
+    with suppress(OptimizationCancelled):
+        await plan
+    return Response(status_code=499)
+
+
+class ReplanRequest(BaseModel):
+    num_pois: Optional[int] = Field(None, ge=1)
+    travel_mode: Optional[str] = None
+
+
+class StopRequest(BaseModel):
+    poi_id: str
+
+
+@app.post("/sessions/{session_id}/replan")
+async def replan(session_id: str, body: ReplanRequest):
+    """
+    Re-plan a generated session with a new num_pois and/or travel_mode,
+    reusing its candidate POIs and already routed legs.
+    """
+    return await asyncio.to_thread(
+        replanning.replan, session_id, num_pois=body.num_pois, travel_mode=body.travel_mode
+    )
+
+
+@app.post("/sessions/{session_id}/routes/{route_index}/stops")
+async def add_stop(session_id: str, route_index: int, body: StopRequest):
+    """
+    Insert a candidate POI into one route at its cheapest position.
+    """
+    return await asyncio.to_thread(replanning.add_stop, session_id, route_index, body.poi_id)
+
+
+@app.delete("/sessions/{session_id}/routes/{route_index}/stops/{poi_id}")
+async def remove_stop(session_id: str, route_index: int, poi_id: str):
+    """
+    Remove a POI from one route.
+    """
+    return await asyncio.to_thread(replanning.remove_stop, session_id, route_index, poi_id)
 
 
 @app.get("/health")
@@ -56,3 +186,13 @@ async def health_check():
     Health check endpoint
     """
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def ready(response: Response):
+    """
+    Readiness: 503 until the first warm-up pass over the hot regions is done.
+    """
+    if not warmup_state.ready:
+        response.status_code = 503
+    return warmup_state.as_dict()
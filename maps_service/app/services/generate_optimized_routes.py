@@ -1,20 +1,35 @@
 import logging
-import random
-from typing import List
+import threading
+from typing import List, Optional
 
 from fastapi import HTTPException
-from app.services.maps.route_service import get_real_route
+from app.services.plan_sessions import (
+    PlanSession,
+    plan_sessions,
+    route_feature,
+    route_path,
+)
+from app.services.route_optimizer import (
+    OptimizationBudgetExceeded,
+    OptimizationCancelled,
+    route_optimizer,
+)
+from common.log import sample
+from common.telemetry import timed
 from models.llm_suggestion import LLMPOISuggestion
 from models.route_request import RouteGenerationRequest
-from geopy.distance import geodesic
+
+logger = logging.getLogger(__name__)
 
 
 def generate_optimized_routes(
-    request: RouteGenerationRequest, pois: List[LLMPOISuggestion]
+    request: RouteGenerationRequest,
+    pois: List[LLMPOISuggestion],
+    cancel: Optional[threading.Event] = None,
 ):
     num_routes = request.num_routes
     num_pois = request.num_pois
-    logging.debug(f"Trying to build {num_routes} routes from {len(pois)} POIs")
+    logger.debug("Trying to build %d routes from %d POIs", num_routes, len(pois))
 
     if len(pois) < num_pois:
         raise HTTPException(
@@ -22,79 +37,58 @@ def generate_optimized_routes(
             detail=f"Only {len(pois)} POIs found, but {num_pois} required.",
         )
 
-    TRAVEL_MODE_MAPPING = {
-        "walking": "foot-walking",
-        "driving": "driving-car",
-        "cycling": "cycling-regular",
-    }
-    ors_profile = TRAVEL_MODE_MAPPING.get(request.travel_mode, "foot-walking")
+    # Select diverse POI sequences up front; request.seed keeps cached plans reproducible
+    try:
+        with timed("route_selection"):
+            selection, matrix = route_optimizer.select(
+                [(p.latitude, p.longitude) for p in pois],
+                [p.categories for p in pois],
+                num_routes=num_routes,
+                num_pois=num_pois,
+                seed=request.seed,
+                cancel=cancel,
+            )
+    except OptimizationBudgetExceeded as e:
+        logger.warning("%s (%d POIs, %d routes)", e, len(pois), num_routes)
+        raise HTTPException(
+            status_code=503,
+            detail="Route optimization took too long; try fewer routes or POIs.",
+        )
 
+    # The session keeps the pool, matrix and routed legs for later re-planning
+    session = PlanSession(request=request, pois=pois, matrix=matrix)
     routes = []
-
-    # Build each route
-    for _ in range(num_routes):
-        pool = pois.copy()
-        selected = []
-        used_cats = set()
-
-        # Select diverse POIs
-        for _ in range(num_pois):
-            if not pool:
-                break
-            if not selected:
-                poi = random.choice(pool)
-            else:
-                last = selected[-1]
-                # Prefer POIs introducing new categories
-                diverse = [p for p in pool if not used_cats.intersection(p.categories)]
-                if len(diverse) < 3:
-                    diverse = pool
-
-                if diverse:
-                    poi = min(
-                        diverse,
-                        key=lambda p: geodesic(
-                            (last.latitude, last.longitude), (p.latitude, p.longitude)
-                        ).meters,
-                    )
-                else:
-                    poi = min(
-                        pool,
-                        key=lambda p: geodesic(
-                            (last.latitude, last.longitude), (p.latitude, p.longitude)
-                        ).meters,
-                    )
-            selected.append(poi)
-            used_cats.update(poi.categories)
-            pool.remove(poi)
-            logging.debug(f"Route selected POIs: {[p.name for p in selected]}")
-            logging.debug(f"Route had categories: {used_cats}")
+    ors_calls = 0
+    for indices in selection.routes:
+        if logger.isEnabledFor(logging.DEBUG) and sample("route_selected_pois", every=20):
+            logger.debug("Route selected POIs: %s", [pois[i].name for i in indices])
 
         # Skip too-short routes
-        if len(selected) < 2:
+        if len(indices) < 2:
             continue
 
-        coords = [(p.longitude, p.latitude) for p in selected]
-        # Generate real-world path
-        try:
-            path = get_real_route(coords, profile=ors_profile)
-        except Exception as e:
-            logging.error(f"Routing error: {e}")
-            continue
+        # Nobody is waiting for the plan any more; don't spend ORS calls on it
+        if cancel is not None and cancel.is_set():
+            raise OptimizationCancelled()
 
-        routes.append(
-            {
-                "feature": {
-                    "type": "Feature",
-                    "geometry": {"type": "LineString", "coordinates": path},
-                },
-                "pois": [p.dict() for p in selected],
-            }
-        )
+        # Generate real-world path
+        path, calls = route_path(session, indices)
+        ors_calls += calls
+        session.routes.append(indices)
+        routes.append(route_feature(session, indices, path))
 
     if not routes:
         raise HTTPException(
             status_code=400, detail="Could not generate any valid routes."
         )
+    plan_sessions.add(session)
 
-    return {"routes": routes}
+    # Every requested route used to cost one ORS call, duplicates included
+    stats = {
+        "diversity": selection.diversity,
+        "duplicates_rejected": selection.duplicates_rejected,
+        "ors_calls": ors_calls,
+        "ors_calls_saved": max(num_routes - ors_calls, 0),
+    }
+    logger.debug("Route generation stats: %s", stats)
+    return {"routes": routes, "stats": stats, "session_id": session.session_id}
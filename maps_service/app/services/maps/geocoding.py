@@ -1,33 +1,50 @@
 from fastapi import HTTPException
 import requests
 import logging
+from app.config import settings
+from app.services.maps.poi_cache import geocode_cache
+from common.errors import upstream_error
+from common.http import CircuitOpenError, ServiceClient
+from common.telemetry import timed
+
+logger = logging.getLogger(__name__)
+
+nominatim_client = ServiceClient("nominatim", settings.nominatim_url)
 
-# Configure logging (you can also use Python's logging module for more robust logging)
-logging.basicConfig(level=logging.DEBUG)
 
 def geocode_location(location_text: str) -> tuple[float, float]:
-    url = "https://nominatim.openstreetmap.org/search"
+    """
+    Cached geocoding; warm-up pre-populates the cache for hot regions.
+    """
+    coord = geocode_cache.get(location_text)
+    if coord is None:
+        coord = geocode_remote(location_text)
+        geocode_cache.put(location_text, coord)
+    return coord
+
+
+@timed("geocode")
+def geocode_remote(location_text: str) -> tuple[float, float]:
     params = {"q": location_text, "format": "json", "limit": 1}
     headers = {"User-Agent": "poi-matcher"}
 
     try:
-        logging.debug(f"Sending request to {url} with params: {params}")
-        res = requests.get(url, params=params, headers=headers, timeout=5)
+        logger.debug("Geocoding %r via %s", location_text, nominatim_client.base_url)
+        res = nominatim_client.request("GET", params=params, headers=headers, timeout=5)
         res.raise_for_status()
         results = res.json()
-        logging.debug(f"Response JSON: {results}")
 
         if not results:
             raise HTTPException(status_code=422, detail=f"Could not geocode location: '{location_text}'")
 
         lat = float(results[0]["lat"])
         lon = float(results[0]["lon"])
-        logging.debug(f"Extracted coordinates: ({lat}, {lon})")
+        logger.debug("Geocoded %r to (%s, %s)", location_text, lat, lon)
         return lat, lon
 
-    except requests.RequestException as e:
-        logging.error(f"Request error: {str(e)}")
-        raise HTTPException(status_code=503, detail=f"Geocoding service unavailable: {str(e)}")
+    except (requests.RequestException, CircuitOpenError) as e:
+        logger.error("Geocoding request error: %s", e)
+        raise upstream_error(503, f"Geocoding service unavailable: {str(e)}", upstream="nominatim")
     except Exception as e:
-        logging.error(f"Unexpected error during geocoding: {str(e)}")
+        logger.error("Unexpected error during geocoding: %s", e)
         raise HTTPException(status_code=500, detail=f"Unexpected error during geocoding: {str(e)}")
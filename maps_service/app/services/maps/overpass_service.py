@@ -1,71 +1,92 @@
+import heapq
 import logging
 import json
-from pathlib import Path
-import requests
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
 from functools import lru_cache
 from itertools import groupby
-from typing import List, Dict, Optional
+from typing import Any, FrozenSet, List, Dict, Tuple
 
 from fastapi import APIRouter, HTTPException
 from geopy.distance import geodesic
 
 from models.route_request import RouteGenerationRequest
-from models.overpass import OverpassElement, OverpassQueryParams, OverpassTag
+from models.overpass import OverpassQueryParams, OverpassTag
 from models.llm_suggestion import LLMPOISuggestion
 
-from app.services.maps.geocoding import geocode_location
+from app.config import settings
+from common.errors import upstream_error
+from common.http import ServiceClient
+from common.telemetry import timed
+from app.services.maps.poi_cache import poi_cache
+from app.services.maps.poi_features import POIFeatures
+from app.services.maps.tag_reference import TagReference, get_tag_reference
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Configuration
-OVERPASS_API_URL = "https://overpass-api.de/api/interpreter"
+OVERPASS_API_URL = settings.overpass_api_url
+
+overpass_client = ServiceClient("overpass", OVERPASS_API_URL)
+llm_client = ServiceClient("llm_service", settings.llm_service_url)
+
 MIN_TAGS = 3  # minimum tags required from LLM
 MAX_TAGS_PER_KEY = 3  # maximum values per key
-OSM_TAGS_CACHE_FILE = Path(__file__).parent / "osm_tags_cache.json"
+# Candidate sampling: keep at most num_routes * num_pois * CANDIDATES_PER_STOP POIs,
+# CANDIDATES_PER_CELL per grid cell
+CANDIDATES_PER_STOP = 4
+CANDIDATES_PER_CELL = 2
 
+METERS_PER_DEGREE = 111_320
 
-def load_osm_tag_reference() -> Dict[str, List[str]]:
-    try:
-        with open(OSM_TAGS_CACHE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logging.error(f"Failed to load OSM tags cache: {e}")
-        raise HTTPException(
-            status_code=500, detail="OSM tag reference missing or invalid."
+
+def split_interests(interests: str) -> List[str]:
+    """
+    Split the comma-separated interests string into lowercase terms.
+    """
+    return [term.strip().lower() for term in interests.split(",") if term.strip()]
+
+
+class POIMatcher:
+    """
+    Per-request matcher: the tag lookup and the interest regex are built once
+    and then reused for every Overpass element.
+    """
+
+    def __init__(self, overpass_tags: List[OverpassTag], interests: str):
+        values: Dict[str, set] = {}
+        for tag in overpass_tags:
+            values.setdefault(tag.key, set()).add(tag.value)
+        self.valid_values: Dict[str, FrozenSet[str]] = {
+            key: frozenset(vals) for key, vals in values.items()
+        }
+        terms = sorted(set(split_interests(interests)), key=len, reverse=True)
+        self.interest_pattern = (
+            re.compile("|".join(map(re.escape, terms)), re.IGNORECASE) if terms else None
         )
 
+    def categorize(self, features: POIFeatures) -> Tuple[str, int]:
+        """
+        The POI's category under this request's tags, and how many of those
+        tags it carries.
+        """
+        valid_values = self.valid_values
+        category, matches = None, 0
+        for k, v in features.category_tags:
+            if v in valid_values.get(k, ()):
+                matches += 1
+                if category is None:
+                    category = v
+        return (features.fallback_category if category is None else category), matches
 
-def extract_address(tags: dict) -> Optional[str]:
-    if "addr:full" in tags:
-        return tags["addr:full"]
-    parts = []
-    for field in ("addr:street", "street", "addr:housenumber", "addr:city"):
-        if tags.get(field):
-            parts.append(tags[field])
-    if parts:
-        return ", ".join(parts)
-    for key in ("location", "place", "road", "addr:place", "addr:neighbourhood"):
-        if tags.get(key):
-            return tags[key]
-    if "brand" in tags:
-        return f"Near {tags['brand']}"
-    return None
-
-
-def extract_primary_category(tags: dict, overpass_tags: List[OverpassTag]) -> str:
-    valid_set = {(t.key, t.value) for t in overpass_tags}
-    for k, v in tags.items():
-        if (k, v) in valid_set:
-            return v
-    for key in ("amenity", "shop", "tourism", "cuisine", "leisure"):
-        if key in tags:
-            return tags[key]
-    for k, v in tags.items():
-        if isinstance(v, str) and k != "name":
-            return v
-    return "unknown"
+    def mentions_interest(self, text: str) -> bool:
+        return self.interest_pattern is not None and self.interest_pattern.search(text) is not None
 
 
+@timed("thinning")
 def thin_pois_by_min_distance(
     pois: List[LLMPOISuggestion], min_dist_m: float
 ) -> List[LLMPOISuggestion]:
@@ -93,12 +114,12 @@ def thin_pois_by_min_distance(
 
 @lru_cache(maxsize=500)
 def get_overpass_tags_from_interests(interests: str) -> List[OverpassTag]:
-    valid_ref = load_osm_tag_reference()
+    reference = get_tag_reference()
     try:
-        raw = call_llm_service_for_tags(interests, valid_ref)
+        raw = call_llm_service_for_tags(interests, reference)
     except Exception as e:
-        logging.error(f"LLM tag generation error: {e}")
-        raise HTTPException(status_code=502, detail="Tag generation service error.")
+        logger.error("LLM tag generation error: %s", e)
+        raise upstream_error(502, "Tag generation service error.", upstream="llm_service")
 
     if not isinstance(raw, list) or not raw:
         raise HTTPException(
@@ -111,7 +132,7 @@ def get_overpass_tags_from_interests(interests: str) -> List[OverpassTag]:
             continue
         k = item.get("key")
         v = item.get("value")
-        if k and v and k in valid_ref and v in valid_ref[k]:
+        if k and v and reference.is_valid(k, v):
             corrected.append(OverpassTag(key=k, value=v))
     if len(corrected) < MIN_TAGS:
         raise HTTPException(
@@ -128,84 +149,183 @@ def get_overpass_tags_from_interests(interests: str) -> List[OverpassTag]:
     return pruned
 
 
-def get_pois_from_overpass(
-    request: RouteGenerationRequest, tags: List[OverpassTag], debug: bool = False
-) -> List[LLMPOISuggestion]:
+def fetch_poi_features(
+    tags: List[OverpassTag], lat: float, lon: float, radius_m: int
+) -> List[POIFeatures]:
+    """
+    Features of the Overpass elements for the given tags around (lat, lon),
+    served from the POI cache (exact repeats or a warmed region) when possible.
+    """
+    with timed("poi_cache"):
+        features = poi_cache.lookup(tags, lat, lon, radius_m)
+    if features is None:
+        elements = query_overpass(tags, lat, lon, radius_m)
+        features = poi_cache.store(tags, lat, lon, radius_m, elements)
+    return features
+
+
+@timed("overpass_fetch")
+def query_overpass(
+    tags: List[OverpassTag], lat: float, lon: float, radius_m: int, timeout: float = 15
+) -> List[Dict[str, Any]]:
     """
-    Fetch, filter, thin and return POIs based on user request.
+    Run the Overpass query for the given tags around (lat, lon).
+    Elements are returned as raw JSON dicts; most of them get filtered out,
+    so building an `OverpassElement` for each one is wasted work.
     """
-    # Geocode user location
-    lat, lon = geocode_location(request.location)
-    # Calculate radius in meters
-    radius_m = int(request.radius_km * 1000)
-    # Build Overpass query
     qp = OverpassQueryParams(tags=tags, lat=lat, lon=lon, radius_m=radius_m)
     query = qp.to_query()
-    logging.debug(f"Overpass query:\n{query}\n")
-    # Execute Overpass
+    logger.debug("Overpass query for %d tags within %d m", len(tags), radius_m)
     try:
-        resp = requests.post(OVERPASS_API_URL, data=query, timeout=15)
+        resp = overpass_client.request("POST", data=query, timeout=timeout)
         resp.raise_for_status()
-        elements = [OverpassElement(**e) for e in resp.json().get("elements", [])]
+        return resp.json().get("elements", [])
     except Exception as e:
-        logging.error(f"Overpass request failed: {e}")
-        raise HTTPException(
-            status_code=503, detail="Failed to fetch POIs from Overpass."
+        logger.error("Overpass request failed: %s", e)
+        raise upstream_error(503, "Failed to fetch POIs from Overpass.", upstream="overpass")
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """
+    A POI that matched the request, with what ranking it needs.
+    """
+
+    features: POIFeatures
+    category: str
+    tag_matches: int  # requested tags the element carries
+
+    def to_suggestion(self) -> LLMPOISuggestion:
+        f = self.features
+        return LLMPOISuggestion(
+            id=f.id,
+            name=f.name,
+            description=f.description,
+            latitude=f.latitude,
+            longitude=f.longitude,
+            address=f.address,
+            categories=[self.category],
         )
-    # Filter elements by interests in description and matching tags
-    pois: List[LLMPOISuggestion] = []
-    for el in elements:
-        tags_el = el.tags or {}
-        name = tags_el.get("name")
-        if not name and not debug:
+
+
+@timed("parse")
+def match_features(
+    features: List[POIFeatures], matcher: POIMatcher, debug: bool = False
+) -> List[Candidate]:
+    """
+    Keep named, addressed POIs whose description mentions one of the
+    interests or that carry one of the requested Overpass tags.
+    """
+    matched: List[Candidate] = []
+    for f in features:
+        if not f.name and not debug:
             continue
-        category = extract_primary_category(tags_el, tags)
-        if not category and not debug:
+        if not f.addressable:
             continue
-        lat_el = el.lat if el.type == "node" else (el.center or {}).get("lat")
-        lon_el = el.lon if el.type == "node" else (el.center or {}).get("lon")
-        if lat_el is None or lon_el is None:
+        category, tag_matches = matcher.categorize(f)
+        if not category and not debug:
             continue
-        address = extract_address(tags_el)
-        if not address or address.startswith("Near "):
+        if not (tag_matches or matcher.mentions_interest(f.description)):
             continue
-        desc = tags_el.get("description") or tags_el.get("note") or f"{name} - {address}"
+        matched.append(Candidate(f, category, tag_matches))
+    return matched
 
-        # Check if description contains any interest or tags match
-        if not (
-            any(interest.lower() in desc.lower() for interest in request.interests)
-            or any(tag.key in tags_el and tags_el[tag.key] == tag.value for tag in tags)
-        ):
-            continue
 
-        pois.append(
-            LLMPOISuggestion(
-                id=str(el.id),
-                name=name,
-                description=desc,
-                latitude=lat_el,
-                longitude=lon_el,
-                address=address,
-                categories=[category],
-            )
-        )
-    # Step 2: Greedy thin by minimum spacing
+def quality_scores(candidates: List[Candidate]) -> List[float]:
+    """
+    Score each candidate: its precomputed completeness and popularity, one
+    point per requested tag it carries, and up to one for how rare its
+    category is among the candidates.
+    """
+    category_counts = Counter(c.category for c in candidates)
+    total = len(candidates)
+    return [
+        1.0 - category_counts[c.category] / total + c.features.quality + c.tag_matches
+        for c in candidates
+    ]
+
+
+@timed("sampling")
+def sample_candidates(candidates: List[Candidate], request: RouteGenerationRequest) -> List[Candidate]:
+    """
+    Rank the candidates best-first, bounded at num_routes * num_pois *
+    CANDIDATES_PER_STOP. Over the bound, POIs are bucketed into a grid over
+    the search area, sized so the cells hold about that many POIs at
+    CANDIDATES_PER_CELL each (and no smaller than the thinning distance);
+    the best-scored POIs of each occupied cell are kept.
+    """
+    if not candidates:
+        return []
+    scores = quality_scores(candidates)
+    budget = request.num_routes * request.num_pois * CANDIDATES_PER_STOP
+    kept: List[int] = list(range(len(candidates)))
+    if len(candidates) > budget:
+        radius_m = request.radius_km * 1000
+        cells_per_side = max(1, math.isqrt(budget // CANDIDATES_PER_CELL))
+        cell_m = max(2 * radius_m / cells_per_side, radius_m / request.num_pois)
+        # Equirectangular projection around the candidates' mean latitude
+        lat0 = math.radians(sum(c.features.latitude for c in candidates) / len(candidates))
+        cell_lat = cell_m / METERS_PER_DEGREE
+        cell_lon = cell_m / (METERS_PER_DEGREE * max(math.cos(lat0), 1e-6))
+
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, c in enumerate(candidates):
+            cell = (math.floor(c.features.latitude / cell_lat), math.floor(c.features.longitude / cell_lon))
+            cells.setdefault(cell, []).append(i)
+        # Spread any budget left by empty cells over the occupied ones
+        per_cell = max(CANDIDATES_PER_CELL, budget // len(cells))
+        kept = [
+            i
+            for members in cells.values()
+            for i in heapq.nlargest(per_cell, members, key=scores.__getitem__)
+        ]
+        logger.debug("Sampled %d of %d POIs over %d cells", min(len(kept), budget), len(candidates), len(cells))
+    # Best first; ties keep Overpass order
+    kept.sort(key=lambda i: (-scores[i], i))
+    return [candidates[i] for i in kept[:budget]]
+
+
+def filter_pois(
+    features: List[POIFeatures],
+    request: RouteGenerationRequest,
+    tags: List[OverpassTag],
+    debug: bool = False,
+) -> List[LLMPOISuggestion]:
+    """
+    Narrow the POI features down to named, addressed POIs that match the
+    request, cap the candidate set per area and thin them out. POIs come out
+    best-first, so thinning keeps the better of two neighbours and route
+    selection starts from the top of the list.
+    """
+    matcher = POIMatcher(tags, request.interests)
+    candidates = sample_candidates(match_features(features, matcher, debug), request)
+    pois = [c.to_suggestion() for c in candidates]
+    # Greedy thin by minimum spacing
     if request.num_pois > 0:
         min_dist = (request.radius_km * 1000) / request.num_pois
         pois = thin_pois_by_min_distance(pois, min_dist)
-        logging.debug(f"After greedy thinning: {len(pois)} POIs")
+        logger.debug("After greedy thinning: %d POIs", len(pois))
     return pois
 
 
-def call_llm_service_for_tags(interests: str, valid_tags: dict) -> List[Dict[str, str]]:
+@timed("tag_generation")
+def call_llm_service_for_tags(interests: str, reference: TagReference) -> List[Dict[str, str]]:
+    # The reference is serialized once; only the interests are encoded per call
+    body = '{"interests": %s, "version": "%s", "valid_tags": %s}' % (
+        json.dumps(interests), reference.version, reference.payload_json
+    )
     try:
-        res = requests.post(
-            "http://llm-service:8000/generate-tags",  # service name in docker-compose
-            json={"interests": interests, "valid_tags": valid_tags},
+        # Tags depend only on the request body, so the call is safe to retry
+        res = llm_client.request(
+            "POST",
+            "/generate-tags",
+            data=body.encode(),
+            headers={"Content-Type": "application/json"},
+            idempotent=True,
             timeout=10,
         )
         res.raise_for_status()
         return res.json()
     except Exception as e:
-        logging.error(f"Failed to call LLM service: {e}")
-        raise HTTPException(status_code=502, detail="LLM service unreachable.")
+        logger.error("Failed to call LLM service: %s", e)
+        raise upstream_error(502, "LLM service unreachable.", upstream="llm_service")
@@ -0,0 +1,242 @@
+import gzip
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.services.maps.poi_features import (
+    Coord,
+    ElementKey,
+    POIFeatures,
+    build_features,
+    element_coord,
+    index_features,
+)
+from app.services.geo import haversine_m
+from models.overpass import OverpassTag
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_location(location: str) -> str:
+    return " ".join(location.lower().split())
+
+
+class GeocodeCache:
+    """
+    Location text -> (lat, lon), with a TTL. Populated by requests and by warm-up.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10_000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[Coord, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, location: str) -> Optional[Coord]:
+        key = normalize_location(location)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            coord, stored_at = entry
+            if self._clock() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return coord
+
+    def put(self, location: str, coord: Coord) -> None:
+        key = normalize_location(location)
+        with self._lock:
+            self._entries[key] = (coord, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def items(self) -> List[Tuple[str, Coord]]:
+        with self._lock:
+            return [(key, coord) for key, (coord, _) in self._entries.items()]
+
+
+@dataclass
+class WarmRegion:
+    """
+    Every element within `radius_m` of the center carrying any reference value
+    of one of `keys`, so any request inside the circle for those keys can be
+    answered locally. `features` is filled in when the region is cached.
+    """
+
+    name: str
+    lat: float
+    lon: float
+    radius_m: int
+    elements: Dict[ElementKey, Dict[str, Any]] = field(default_factory=dict)
+    keys: FrozenSet[str] = frozenset()
+    fetched_at: float = field(default_factory=time.time)
+    features: Dict[ElementKey, POIFeatures] = field(default_factory=dict)
+
+    def covers(self, lat: float, lon: float, radius_m: int, keys: Iterable[str]) -> bool:
+        return self.keys.issuperset(keys) and (
+            haversine_m(self.lat, self.lon, lat, lon) + radius_m <= self.radius_m
+        )
+
+
+def _tag_patterns(tags: List[OverpassTag]) -> Dict[str, "re.Pattern[str]"]:
+    # Same (unanchored) regex the Overpass query uses: ["key"~"v1|v2"]
+    grouped: Dict[str, set] = {}
+    for tag in tags:
+        grouped.setdefault(tag.key, set()).add(tag.value)
+    return {key: re.compile("|".join(sorted(values))) for key, values in grouped.items()}
+
+
+def select_elements(
+    elements: Iterable[Dict[str, Any]], tags: List[OverpassTag], lat: float, lon: float, radius_m: int
+) -> List[Dict[str, Any]]:
+    """
+    Local equivalent of the Overpass tag/around query over a superset of elements.
+    Ways and relations are placed at their center (Overpass uses any of their nodes).
+    """
+    patterns = _tag_patterns(tags)
+    selected = []
+    for el in elements:
+        el_tags = el.get("tags") or {}
+        if not any(
+            key in el_tags and pattern.search(el_tags[key]) for key, pattern in patterns.items()
+        ):
+            continue
+        coord = element_coord(el)
+        if coord is not None and haversine_m(lat, lon, *coord) <= radius_m:
+            selected.append(el)
+    return selected
+
+
+def _query_key(tags: List[OverpassTag], lat: float, lon: float, radius_m: int) -> str:
+    pairs = sorted({(t.key, t.value) for t in tags})
+    return json.dumps([pairs, round(lat, 5), round(lon, 5), radius_m])
+
+
+class POICache:
+    """
+    Overpass results as POI features, from two sources:
+    exact query results stored as requests arrive (TTL, LRU), and warm
+    regions pre-fetched per tag key, which answer any request inside them.
+    Features are derived once, on the way in.
+    """
+
+    def __init__(self, ttl: float, max_queries: int = 1_000):
+        self.ttl = ttl
+        self.max_queries = max_queries
+        # Stored as tuples so no caller can change a cached result
+        self._queries: "OrderedDict[str, Tuple[Tuple[POIFeatures, ...], float]]" = OrderedDict()
+        self.regions: Dict[str, WarmRegion] = {}
+        self._lock = threading.Lock()
+
+    def lookup(
+        self, tags: List[OverpassTag], lat: float, lon: float, radius_m: int
+    ) -> Optional[List[POIFeatures]]:
+        key = _query_key(tags, lat, lon, radius_m)
+        now = time.time()
+        with self._lock:
+            entry = self._queries.get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._queries.move_to_end(key)
+                return list(entry[0])
+            keys = {t.key for t in tags}
+            region = next(
+                (
+                    r
+                    for r in self.regions.values()
+                    if now - r.fetched_at <= self.ttl and r.covers(lat, lon, radius_m, keys)
+                ),
+                None,
+            )
+        if region is None:
+            return None
+        selected = select_elements(region.elements.values(), tags, lat, lon, radius_m)
+        return [region.features[(el["type"], el["id"])] for el in selected]
+
+    def store(
+        self, tags: List[OverpassTag], lat: float, lon: float, radius_m: int, elements: List[Dict[str, Any]]
+    ) -> List[POIFeatures]:
+        """
+        Cache the features of a query's elements and return them.
+        """
+        key = _query_key(tags, lat, lon, radius_m)
+        features = build_features(elements)
+        with self._lock:
+            self._queries[key] = (tuple(features), time.time())
+            self._queries.move_to_end(key)
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        return features
+
+    def put_region(self, region: WarmRegion) -> None:
+        region.features = index_features(region.elements)
+        # Swapped in whole so lookups never see a half-refreshed region
+        with self._lock:
+            self.regions[region.name] = region
+
+
+geocode_cache = GeocodeCache(ttl=settings.geocode_cache_ttl_s)
+poi_cache = POICache(ttl=settings.poi_cache_ttl_s)
+
+
+def save_snapshot(path: str) -> None:
+    """
+    Write the geocode cache and warm regions to a gzipped JSON file.
+    """
+    snapshot = {
+        "geocode": geocode_cache.items(),
+        "regions": [
+            {
+                "name": r.name,
+                "lat": r.lat,
+                "lon": r.lon,
+                "radius_m": r.radius_m,
+                "keys": sorted(r.keys),
+                "fetched_at": r.fetched_at,
+                "elements": list(r.elements.values()),
+            }
+            for r in list(poi_cache.regions.values())
+        ],
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+
+
+def load_snapshot(path: str) -> List[str]:
+    """
+    Load a snapshot written by `save_snapshot`; expired regions are skipped.
+    Returns the names of the regions loaded.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    for location, coord in snapshot.get("geocode", []):
+        geocode_cache.put(location, tuple(coord))
+    loaded = []
+    for r in snapshot.get("regions", []):
+        if time.time() - r["fetched_at"] > poi_cache.ttl:
+            continue
+        poi_cache.put_region(
+            WarmRegion(
+                name=r["name"],
+                lat=r["lat"],
+                lon=r["lon"],
+                radius_m=r["radius_m"],
+                keys=frozenset(r["keys"]),
+                fetched_at=r["fetched_at"],
+                elements={(el["type"], el["id"]): el for el in r["elements"]},
+            )
+        )
+        loaded.append(r["name"])
+    return loaded
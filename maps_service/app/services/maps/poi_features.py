@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+from app.services.maps.tag_reference import get_tag_reference
+from common.telemetry import timed
+
+Coord = Tuple[float, float]
+ElementKey = Tuple[str, int]
+
+FALLBACK_CATEGORY_KEYS = ("amenity", "shop", "tourism", "cuisine", "leisure")
+# One point each for a name, a street-level address, a description and opening hours
+COMPLETENESS_TAGS = (("name",), ("addr:full", "addr:street"), ("description", "note"), ("opening_hours",))
+# Tags that mostly well-known places carry; one point each
+POPULARITY_TAGS = (("wikidata",), ("wikipedia",), ("website", "contact:website", "url"))
+
+
+@dataclass(frozen=True)
+class POIFeatures:
+    """
+    What matching and ranking need from one Overpass element, none of which
+    depends on the request. Built once when the element enters the POI cache.
+    """
+
+    id: str
+    name: Optional[str]
+    latitude: float
+    longitude: float
+    address: Optional[str]
+    description: str
+    category_tags: Tuple[Tuple[str, str], ...]  # pairs found in the tag reference, element order
+    fallback_category: str  # used when none of the request's tags is present
+    completeness: int
+    popularity: int
+
+    @property
+    def quality(self) -> int:
+        return self.completeness + self.popularity
+
+    @property
+    def addressable(self) -> bool:
+        return bool(self.address) and not self.address.startswith("Near ")
+
+
+def element_coord(el: Dict[str, Any]) -> Optional[Coord]:
+    """
+    (lat, lon) of a node, or of the center of a way or relation.
+    """
+    if el.get("type") == "node":
+        lat, lon = el.get("lat"), el.get("lon")
+    else:
+        center = el.get("center") or {}
+        lat, lon = center.get("lat"), center.get("lon")
+    return (lat, lon) if lat is not None and lon is not None else None
+
+
+def extract_address(tags: dict) -> Optional[str]:
+    if "addr:full" in tags:
+        return tags["addr:full"]
+    parts = []
+    for field in ("addr:street", "street", "addr:housenumber", "addr:city"):
+        if tags.get(field):
+            parts.append(tags[field])
+    if parts:
+        return ", ".join(parts)
+    for key in ("location", "place", "road", "addr:place", "addr:neighbourhood"):
+        if tags.get(key):
+            return tags[key]
+    if "brand" in tags:
+        return f"Near {tags['brand']}"
+    return None
+
+
+def fallback_category(tags: Dict[str, str]) -> str:
+    for key in FALLBACK_CATEGORY_KEYS:
+        if key in tags:
+            return tags[key]
+    for k, v in tags.items():
+        if isinstance(v, str) and k != "name":
+            return v
+    return "unknown"
+
+
+def element_features(
+    el: Dict[str, Any], reference: Mapping[str, FrozenSet[str]]
+) -> Optional[POIFeatures]:
+    """
+    Features of one element; None when it has no coordinates.
+    """
+    coord = element_coord(el)
+    if coord is None:
+        return None
+    tags = el.get("tags") or {}
+    name = tags.get("name")
+    address = extract_address(tags)
+    return POIFeatures(
+        id=str(el["id"]),
+        name=name,
+        latitude=coord[0],
+        longitude=coord[1],
+        address=address,
+        description=tags.get("description") or tags.get("note") or f"{name} - {address}",
+        category_tags=tuple((k, v) for k, v in tags.items() if v in reference.get(k, ())),
+        fallback_category=fallback_category(tags),
+        completeness=sum(any(key in tags for key in keys) for keys in COMPLETENESS_TAGS),
+        popularity=sum(any(tags.get(key) for key in keys) for keys in POPULARITY_TAGS),
+    )
+
+
+@timed("features")
+def build_features(elements: Iterable[Dict[str, Any]]) -> List[POIFeatures]:
+    lookup = get_tag_reference().lookup
+    features = (element_features(el, lookup) for el in elements)
+    return [f for f in features if f is not None]
+
+
+def index_features(elements: Dict[ElementKey, Dict[str, Any]]) -> Dict[ElementKey, POIFeatures]:
+    lookup = get_tag_reference().lookup
+    index = {}
+    for key, el in elements.items():
+        features = element_features(el, lookup)
+        if features is not None:
+            index[key] = features
+    return index
@@ -1,19 +1,46 @@
-import openrouteservice
-from typing import List, Tuple
+import logging
+import threading
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from app.config import settings
+from common.telemetry import timed
 
-ors_client = openrouteservice.Client(key=settings.ors_api_key)
+if TYPE_CHECKING:
+    import openrouteservice
 
+logger = logging.getLogger(__name__)
 
-def get_real_route(
+_ors_client: Optional["openrouteservice.Client"] = None
+_ors_client_lock = threading.Lock()
+
+
+def get_ors_client() -> "openrouteservice.Client":
+    """
+    Created on first use (or by the lifespan, in the background) rather than at import.
+    """
+    global _ors_client
+    if _ors_client is None:
+        with _ors_client_lock:
+            if _ors_client is None:
+                import openrouteservice
+
+                _ors_client = openrouteservice.Client(
+                    key=settings.ors_api_key, base_url=settings.ors_base_url
+                )
+    return _ors_client
+
+
+@timed("ors_route")
+def get_route_legs(
     waypoints: List[Tuple[float, float]], profile: str = "foot-walking"
-) -> List[Tuple[float, float]]:
-    try:
-        response = ors_client.directions(
-            coordinates=waypoints, profile=profile, format="geojson"
-        )
-        geometry = response["features"][0]["geometry"]["coordinates"]
-        return [(lon, lat) for lon, lat in geometry]
-    except Exception as e:
-        print("❌ Failed to get ORS route:", str(e))
-        return waypoints  # fallback
+) -> List[List[Tuple[float, float]]]:
+    """
+    Route through all waypoints with one ORS call and split the path into
+    one leg per consecutive waypoint pair. Raises if ORS fails.
+    """
+    response = get_ors_client().directions(
+        coordinates=waypoints, profile=profile, format="geojson"
+    )
+    feature = response["features"][0]
+    geometry = [(lon, lat) for lon, lat in feature["geometry"]["coordinates"]]
+    way_points = feature["properties"]["way_points"]
+    return [geometry[start : end + 1] for start, end in zip(way_points, way_points[1:])]
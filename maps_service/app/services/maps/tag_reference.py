@@ -0,0 +1,69 @@
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+OSM_TAGS_CACHE_FILE = Path(__file__).parent / "osm_tags_cache.json"
+
+
+@dataclass(frozen=True)
+class TagReference:
+    """
+    The valid OSM key/value pairs, parsed once. `version` is a hash of the
+    file contents, so anything derived from the reference can be cached on it.
+    """
+
+    values: Mapping[str, Tuple[str, ...]]  # file order, for prompts and queries
+    lookup: Mapping[str, FrozenSet[str]]
+    version: str
+    payload_json: str  # serialized once; sent to llm_service with every tag request
+
+    def is_valid(self, key: str, value: str) -> bool:
+        return value in self.lookup.get(key, ())
+
+    def keys(self) -> List[str]:
+        return list(self.values)
+
+
+def parse_tag_reference(raw: bytes) -> TagReference:
+    data: Dict[str, List[str]] = json.loads(raw)
+    values = {key: tuple(vals) for key, vals in data.items()}
+    return TagReference(
+        values=MappingProxyType(values),
+        lookup=MappingProxyType({key: frozenset(vals) for key, vals in values.items()}),
+        version=hashlib.sha256(raw).hexdigest()[:12],
+        payload_json=json.dumps(data),
+    )
+
+
+_reference: Optional[TagReference] = None
+_lock = threading.Lock()
+
+
+def get_tag_reference() -> TagReference:
+    """
+    The tag reference, read from disk on first use only.
+    """
+    global _reference
+    if _reference is None:
+        with _lock:
+            if _reference is None:
+                try:
+                    _reference = parse_tag_reference(OSM_TAGS_CACHE_FILE.read_bytes())
+                except Exception as e:
+                    logger.error("Failed to load OSM tags cache: %s", e)
+                    raise HTTPException(
+                        status_code=500, detail="OSM tag reference missing or invalid."
+                    )
+                logger.info(
+                    "Loaded OSM tag reference %s (%d keys)", _reference.version, len(_reference.values)
+                )
+    return _reference
@@ -0,0 +1,117 @@
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One step of a pipeline. `func` receives the results of `depends_on`
+    as positional arguments, in the order they are listed.
+    Plain functions run in a worker thread so blocking I/O doesn't stall the loop.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    depends_on: Sequence[str] = ()
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    name: str
+    started: float
+    finished: float
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.finished - self.started) * 1000
+
+
+@dataclass
+class PipelineResult:
+    results: Dict[str, Any]
+    timings: List[StageTiming]
+    started: float
+    finished: float
+
+    @property
+    def total_ms(self) -> float:
+        return (self.finished - self.started) * 1000
+
+    def server_timing(self) -> str:
+        """
+        Render the stage timings as a `Server-Timing` header value.
+        """
+        entries = [f"{t.name};dur={t.duration_ms:.1f}" for t in self.timings]
+        entries.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(entries)
+
+
+def _check_graph(stages: Dict[str, Stage]) -> None:
+    for stage in stages.values():
+        for dep in stage.depends_on:
+            if dep not in stages:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    # Kahn's algorithm: anything left over is part of a cycle
+    pending = {name: set(stage.depends_on) for name, stage in stages.items()}
+    while pending:
+        ready = [name for name, deps in pending.items() if not deps]
+        if not ready:
+            raise ValueError(f"Pipeline has a dependency cycle: {sorted(pending)}")
+        for name in ready:
+            del pending[name]
+        for deps in pending.values():
+            deps.difference_update(ready)
+
+
+async def run_pipeline(stages: Sequence[Stage]) -> PipelineResult:
+    """
+    Run stages as soon as their dependencies finish, so independent stages overlap.
+    The first failing stage cancels everything still running and its error is re-raised.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Stage names must be unique")
+    _check_graph(by_name)
+
+    tasks: Dict[str, asyncio.Task] = {}
+    timings: List[StageTiming] = []
+
+    async def run_stage(stage: Stage) -> Any:
+        args = [await tasks[dep] for dep in stage.depends_on]
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(stage.func):
+                return await stage.func(*args)
+            return await asyncio.to_thread(stage.func, *args)
+        finally:
+            timings.append(StageTiming(stage.name, started, time.perf_counter()))
+
+    started = time.perf_counter()
+    for stage in stages:
+        tasks[stage.name] = asyncio.create_task(run_stage(stage), name=stage.name)
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    result = PipelineResult(
+        results={name: task.result() for name, task in tasks.items()},
+        timings=sorted(timings, key=lambda t: t.started),
+        started=started,
+        finished=time.perf_counter(),
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Pipeline timings: %s", result.server_timing())
+    return result
@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+from app.services.maps.route_service import get_route_legs
+from models.llm_suggestion import LLMPOISuggestion
+from models.route_request import RouteGenerationRequest
+
+logger = logging.getLogger(__name__)
+
+# May be shorter than the backend plan cache keeps plans: it drops a plan whose session 404s
+SESSION_TTL_S = float(os.getenv("PLAN_SESSION_TTL_S", "1800"))
+MAX_SESSIONS = int(os.getenv("PLAN_SESSION_MAX", "500"))
+
+TRAVEL_MODE_MAPPING = {
+    "walking": "foot-walking",
+    "driving": "driving-car",
+    "cycling": "cycling-regular",
+}
+
+Coord = Tuple[float, float]
+LegKey = Tuple[str, int, int]
+
+
+def ors_profile(travel_mode: str) -> str:
+    return TRAVEL_MODE_MAPPING.get(travel_mode, "foot-walking")
+
+
+@dataclass
+class PlanSession:
+    """
+    The candidate pool behind one generated plan: thinned POIs, their
+    distance matrix, the chosen routes (as POI indices) and every routed leg.
+    Edits fork the session, so the plan other clients see never changes.
+    """
+
+    request: RouteGenerationRequest
+    pois: List[LLMPOISuggestion]
+    matrix: List[List[float]]
+    routes: List[List[int]] = field(default_factory=list)
+    # Shared between forks: a routed leg stays valid for every edit of the plan
+    legs: Dict[LegKey, List[Coord]] = field(default_factory=dict)
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    @property
+    def profile(self) -> str:
+        return ors_profile(self.request.travel_mode)
+
+    def fork(self, **request_updates) -> "PlanSession":
+        return replace(
+            self,
+            request=self.request.model_copy(update=request_updates),
+            routes=[list(r) for r in self.routes],
+            session_id=uuid.uuid4().hex,
+        )
+
+    def index_of(self, poi_id: str) -> Optional[int]:
+        for i, poi in enumerate(self.pois):
+            if poi.id == poi_id:
+                return i
+        return None
+
+
+def route_path(session: PlanSession, indices: List[int]) -> Tuple[List[Coord], int]:
+    """
+    Assemble the path for a route from cached legs. If any leg is missing the
+    whole route is routed in one ORS call, which is never more calls than
+    routing each gap on its own. Returns (path, ORS calls).
+    """
+    profile = session.profile
+    keys = [(profile, a, b) for a, b in zip(indices, indices[1:])]
+    legs = [session.legs.get(key) for key in keys]
+    calls = 0
+    if not all(legs):
+        calls = 1
+        coords = [(session.pois[i].longitude, session.pois[i].latitude) for i in indices]
+        try:
+            routed = get_route_legs(coords, profile=profile)
+            if len(routed) != len(keys):
+                raise ValueError(f"expected {len(keys)} legs, ORS returned {len(routed)}")
+            session.legs.update(zip(keys, routed))
+            legs = routed
+        except Exception as e:
+            # Straight lines keep the route usable; they are not cached
+            logger.warning("Failed to get ORS route: %s", e)
+            legs = [leg or [coords[k], coords[k + 1]] for k, leg in enumerate(legs)]
+
+    path: List[Coord] = []
+    for leg in legs:
+        path.extend(leg if not path else leg[1:])
+    return path, calls
+
+
+def route_feature(session: PlanSession, indices: List[int], path: List[Coord]) -> dict:
+    return {
+        "feature": {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": path},
+        },
+        "pois": [session.pois[i].model_dump() for i in indices],
+    }
+
+
+@dataclass
+class _Entry:
+    session: PlanSession
+    touched_at: float
+
+
+class SessionStore:
+    """
+    Bounded, TTL-limited in-memory store of plan sessions (least recently used first out).
+    Re-planning runs in worker threads, so access is serialized with a lock.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL_S, max_sessions: int = MAX_SESSIONS, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, session: PlanSession) -> None:
+        with self._lock:
+            self._entries[session.session_id] = _Entry(session, self._clock())
+            self._entries.move_to_end(session.session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[PlanSession]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            now = self._clock()
+            if now - entry.touched_at > self.ttl:
+                del self._entries[session_id]
+                return None
+            entry.touched_at = now
+            self._entries.move_to_end(session_id)
+            return entry.session
+
+
+plan_sessions = SessionStore()
@@ -0,0 +1,140 @@
+import logging
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+from app.services.plan_sessions import (
+    PlanSession,
+    plan_sessions,
+    route_feature,
+    route_path,
+)
+from app.services.route_selection import select_diverse_routes
+from common.telemetry import timed
+
+logger = logging.getLogger(__name__)
+
+
+def get_session(session_id: str) -> PlanSession:
+    session = plan_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=404, detail="Plan session expired; please generate the routes again."
+        )
+    return session
+
+
+def _route_indices(session: PlanSession, route_index: int) -> List[int]:
+    if not 0 <= route_index < len(session.routes):
+        raise HTTPException(status_code=404, detail=f"Route {route_index} not found.")
+    return session.routes[route_index]
+
+
+def _poi_index(session: PlanSession, poi_id: str) -> int:
+    index = session.index_of(poi_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"POI '{poi_id}' is not in the candidate set.")
+    return index
+
+
+def _render(session: PlanSession) -> dict:
+    """
+    Build the routes response from the session, routing only legs not yet cached.
+    """
+    routes = []
+    ors_calls = 0
+    for indices in session.routes:
+        path, calls = route_path(session, indices)
+        ors_calls += calls
+        routes.append(route_feature(session, indices, path))
+    plan_sessions.add(session)
+    return {
+        "routes": routes,
+        "stats": {"ors_calls": ors_calls},
+        "session_id": session.session_id,
+    }
+
+
+@timed("replan")
+def replan(
+    session_id: str, num_pois: Optional[int] = None, travel_mode: Optional[str] = None
+) -> dict:
+    """
+    Re-run selection on the cached pool (new num_pois) and/or switch the
+    travel profile. Geocoding, tag generation and Overpass are not repeated.
+    """
+    session = get_session(session_id)
+    updates = {}
+    if num_pois is not None:
+        updates["num_pois"] = num_pois
+    if travel_mode is not None:
+        updates["travel_mode"] = travel_mode
+    forked = session.fork(**updates)
+
+    if num_pois is not None and num_pois != session.request.num_pois:
+        if len(session.pois) < num_pois:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Only {len(session.pois)} POIs found, but {num_pois} required.",
+            )
+        selection = select_diverse_routes(
+            session.matrix,
+            [set(p.categories) for p in session.pois],
+            num_routes=forked.request.num_routes,
+            num_pois=num_pois,
+            seed=forked.request.seed,
+        )
+        forked.routes = [r for r in selection.routes if len(r) >= 2]
+        if not forked.routes:
+            raise HTTPException(status_code=400, detail="Could not generate any valid routes.")
+    return _render(forked)
+
+
+def _cheapest_insertion(session: PlanSession, route: List[int], poi: int) -> int:
+    """
+    Position at which inserting `poi` adds the least walking distance.
+    """
+    d = session.matrix
+    best_pos, best_cost = 0, d[poi][route[0]]
+    for pos in range(1, len(route)):
+        a, b = route[pos - 1], route[pos]
+        cost = d[a][poi] + d[poi][b] - d[a][b]
+        if cost < best_cost:
+            best_pos, best_cost = pos, cost
+    if d[route[-1]][poi] < best_cost:
+        best_pos = len(route)
+    return best_pos
+
+
+@timed("replan")
+def add_stop(session_id: str, route_index: int, poi_id: str) -> dict:
+    """
+    Insert a candidate POI where it costs the least; only the legs touching it are routed.
+    """
+    session = get_session(session_id)
+    route = _route_indices(session, route_index)
+    poi = _poi_index(session, poi_id)
+    if poi in route:
+        raise HTTPException(status_code=409, detail=f"POI '{poi_id}' is already on this route.")
+
+    forked = session.fork()
+    forked.routes[route_index].insert(_cheapest_insertion(session, route, poi), poi)
+    return _render(forked)
+
+
+@timed("replan")
+def remove_stop(session_id: str, route_index: int, poi_id: str) -> dict:
+    """
+    Drop a POI from a route; only the leg joining its neighbours is routed.
+    """
+    session = get_session(session_id)
+    route = _route_indices(session, route_index)
+    poi = _poi_index(session, poi_id)
+    if poi not in route:
+        raise HTTPException(status_code=404, detail=f"POI '{poi_id}' is not on this route.")
+    if len(route) <= 2:
+        raise HTTPException(status_code=400, detail="A route needs at least two stops.")
+
+    forked = session.fork()
+    forked.routes[route_index].remove(poi)
+    return _render(forked)
@@ -0,0 +1,243 @@
+"""
+Route selection on a pool of worker processes.
+
+Selection is CPU-bound Python; run in the request thread it holds the GIL
+and every plan shares one core. With OPTIMIZER_WORKERS > 0 it runs in a
+process pool instead. Inputs travel through one shared-memory block per task
+(coordinates, category IDs and the distance matrix the worker fills in), so
+only the block name and a few integers are pickled. Each task has a CPU-time
+budget, and setting the block's cancel flag stops it at the next step.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.geo import EARTH_RADIUS_M
+from app.services.route_selection import RouteSelection, select_diverse_routes
+
+logger = logging.getLogger(__name__)
+
+# How often a waiting request thread looks at its cancel event
+CANCEL_POLL_S = 0.05
+# Bytes reserved at the start of each block; byte 0 is the cancel flag
+HEADER_BYTES = 8
+
+
+class OptimizationCancelled(Exception):
+    pass
+
+
+class OptimizationBudgetExceeded(Exception):
+    pass
+
+
+def encode_categories(categories: Sequence[Iterable[Hashable]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-POI category sets as CSR arrays: POI i has ids[offsets[i]:offsets[i + 1]].
+    """
+    codes: Dict[Hashable, int] = {}
+    ids: List[int] = []
+    offsets = [0]
+    for cats in categories:
+        ids.extend(codes.setdefault(c, len(codes)) for c in cats)
+        offsets.append(len(ids))
+    return np.asarray(ids, dtype=np.int32), np.asarray(offsets, dtype=np.int32)
+
+
+def haversine_matrix(coords: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorized `route_selection.distance_matrix` over an (n, 2) array of (lat, lon).
+    """
+    lat = np.radians(coords[:, 0])
+    lon = np.radians(coords[:, 1])
+    dphi = lat[None, :] - lat[:, None]
+    dlmb = lon[None, :] - lon[:, None]
+    a = np.sin(dphi / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlmb / 2) ** 2
+    if out is None:
+        out = np.empty((len(coords), len(coords)))
+    np.multiply(2 * EARTH_RADIUS_M, np.arcsin(np.sqrt(np.minimum(a, 1.0))), out=out)
+    return out
+
+
+def select_routes(
+    matrix: np.ndarray,
+    cat_ids: np.ndarray,
+    cat_offsets: np.ndarray,
+    num_routes: int,
+    num_pois: int,
+    seed: Optional[int],
+    check: Callable[[], None],
+) -> RouteSelection:
+    ids = cat_ids.tolist()
+    offsets = cat_offsets.tolist()
+    categories = [set(ids[offsets[i]:offsets[i + 1]]) for i in range(len(offsets) - 1)]
+    return select_diverse_routes(
+        matrix.tolist(), categories, num_routes=num_routes, num_pois=num_pois, seed=seed, check=check
+    )
+
+
+def cpu_budget_check(budget_s: float, cancelled: Callable[[], bool]) -> Callable[[], None]:
+    deadline = time.thread_time() + budget_s
+
+    def check() -> None:
+        if cancelled():
+            raise OptimizationCancelled()
+        if time.thread_time() > deadline:
+            raise OptimizationBudgetExceeded(f"Route selection used more than {budget_s:g}s of CPU")
+
+    return check
+
+
+class SharedInputs:
+    """
+    Views over one shared-memory block laid out as
+    [header | coords f8 (n, 2) | matrix f8 (n, n) | offsets i4 (n + 1) | ids i4 (m)].
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, n: int, m: int):
+        self.shm = shm
+        buf = shm.buf
+        pos = HEADER_BYTES
+        self.flag = np.ndarray((1,), dtype=np.uint8, buffer=buf)
+        self.coords = np.ndarray((n, 2), dtype=np.float64, buffer=buf, offset=pos)
+        pos += self.coords.nbytes
+        self.matrix = np.ndarray((n, n), dtype=np.float64, buffer=buf, offset=pos)
+        pos += self.matrix.nbytes
+        self.offsets = np.ndarray((n + 1,), dtype=np.int32, buffer=buf, offset=pos)
+        pos += self.offsets.nbytes
+        self.ids = np.ndarray((m,), dtype=np.int32, buffer=buf, offset=pos)
+
+    @staticmethod
+    def size(n: int, m: int) -> int:
+        return HEADER_BYTES + 8 * (2 * n + n * n) + 4 * (n + 1 + m)
+
+    def close(self) -> None:
+        # The views export the buffer; drop them before closing the mapping
+        self.flag = self.coords = self.matrix = self.offsets = self.ids = None
+        self.shm.close()
+
+
+def _worker_select(
+    name: str, n: int, m: int, num_routes: int, num_pois: int, seed: Optional[int], budget_s: float
+) -> RouteSelection:
+    """
+    Runs in a pool process: fill in the distance matrix, then select routes.
+    """
+    # Pool processes share the parent's resource tracker, which unlinks the block if we crash
+    inputs = SharedInputs(shared_memory.SharedMemory(name=name), n, m)
+    try:
+        haversine_matrix(inputs.coords, out=inputs.matrix)
+        check = cpu_budget_check(budget_s, lambda: inputs.flag[0] != 0)
+        return select_routes(inputs.matrix, inputs.ids, inputs.offsets, num_routes, num_pois, seed, check)
+    finally:
+        inputs.close()
+
+
+def _warm_up() -> None:
+    pass
+
+
+class RouteOptimizer:
+    """
+    Route selection, inline (workers=0) or on a process pool.
+    """
+
+    def __init__(self, workers: int = 0, cpu_budget_s: float = 5.0):
+        self.workers = workers
+        self.cpu_budget_s = cpu_budget_s
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Start the pool processes now rather than on the first request.
+        """
+        if not self.workers:
+            return
+        executor = self._pool()
+        for future in [executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+        logger.info("Route optimizer started %d worker processes", self.workers)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Workers import only what selection needs; forking a threaded server is unsafe
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"))
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def select(
+        self,
+        coords: Sequence[Tuple[float, float]],
+        categories: Sequence[Iterable[Hashable]],
+        num_routes: int,
+        num_pois: int,
+        seed: Optional[int] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Tuple[RouteSelection, List[List[float]]]:
+        """
+        Select routes; returns the selection and the distance matrix.
+        Raises OptimizationBudgetExceeded past the CPU budget and
+        OptimizationCancelled once `cancel` is set.
+        """
+        cat_ids, cat_offsets = encode_categories(categories)
+        coords_np = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        if not self.workers:
+            matrix = haversine_matrix(coords_np)
+            check = cpu_budget_check(self.cpu_budget_s, lambda: cancel is not None and cancel.is_set())
+            selection = select_routes(matrix, cat_ids, cat_offsets, num_routes, num_pois, seed, check)
+            return selection, matrix.tolist()
+
+        n, m = len(coords_np), len(cat_ids)
+        shm = shared_memory.SharedMemory(create=True, size=SharedInputs.size(n, m))
+        inputs = SharedInputs(shm, n, m)
+        try:
+            inputs.flag[0] = 0
+            inputs.coords[:] = coords_np
+            inputs.offsets[:] = cat_offsets
+            inputs.ids[:] = cat_ids
+            future = self._pool().submit(
+                _worker_select, shm.name, n, m, num_routes, num_pois, seed, self.cpu_budget_s
+            )
+            selection = self._wait(future, inputs, cancel)
+            return selection, inputs.matrix.tolist()
+        finally:
+            inputs.close()
+            shm.unlink()
+
+    def _wait(
+        self, future: Future, inputs: SharedInputs, cancel: Optional[threading.Event]
+    ) -> RouteSelection:
+        try:
+            while True:
+                try:
+                    return future.result(timeout=CANCEL_POLL_S if cancel is not None else None)
+                except FutureTimeout:
+                    if cancel.is_set():
+                        inputs.flag[0] = 1
+                        future.cancel()
+                        raise OptimizationCancelled()
+        except BrokenProcessPool:
+            logger.error("Route optimizer pool broke; restarting it")
+            with self._lock:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = None
+            raise
+
+
+route_optimizer = RouteOptimizer(settings.optimizer_workers, settings.optimizer_cpu_budget_s)
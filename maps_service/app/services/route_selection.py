@@ -0,0 +1,147 @@
+import random
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Callable, Hashable, List, Optional, Sequence, Set, Tuple
+
+from app.services.geo import haversine_m
+
+# A POI already used by n accepted routes looks (1 + n * REUSE_PENALTY) times farther away
+REUSE_PENALTY = 1.0
+# Candidates whose POI sets overlap this much with an accepted route are dropped
+MAX_ROUTE_SIMILARITY = 0.6
+# How many candidate starts to try per requested route before giving up
+CANDIDATES_PER_ROUTE = 3
+# Below this many category-new POIs, fall back to the whole pool
+MIN_DIVERSE_CHOICES = 3
+
+
+def distance_matrix(coords: Sequence[Tuple[float, float]]) -> List[List[float]]:
+    """
+    Symmetric matrix of great-circle distances in meters between (lat, lon) points.
+    """
+    n = len(coords)
+    matrix = [[0.0] * n for _ in range(n)]
+    for i, j in combinations(range(n), 2):
+        d = haversine_m(*coords[i], *coords[j])
+        matrix[i][j] = matrix[j][i] = d
+    return matrix
+
+
+def farthest_point_order(matrix: List[List[float]], first: int, count: int) -> List[int]:
+    """
+    Pick up to `count` points, each next one as far as possible from those before it.
+    """
+    n = len(matrix)
+    order = [first]
+    nearest = list(matrix[first])
+    remaining = set(range(n)) - {first}
+    while remaining and len(order) < count:
+        nxt = max(remaining, key=lambda i: (nearest[i], -i))
+        order.append(nxt)
+        remaining.discard(nxt)
+        row = matrix[nxt]
+        for i in remaining:
+            if row[i] < nearest[i]:
+                nearest[i] = row[i]
+    return order
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    union = a | b
+    return len(a & b) / len(union) if union else 1.0
+
+
+def build_route(
+    start: int,
+    matrix: List[List[float]],
+    categories: Sequence[Set[Hashable]],
+    num_pois: int,
+    usage: Sequence[int],
+    check: Optional[Callable[[], None]] = None,
+) -> List[int]:
+    """
+    Greedy nearest-neighbour walk from `start` that prefers POIs introducing
+    new categories and penalizes POIs already used by other routes.
+    `check` is called before each step and may raise to abort the walk.
+    """
+    selected = [start]
+    used_cats = set(categories[start])
+    pool = set(range(len(matrix))) - {start}
+    while pool and len(selected) < num_pois:
+        if check is not None:
+            check()
+        diverse = [i for i in pool if not used_cats.intersection(categories[i])]
+        if len(diverse) < MIN_DIVERSE_CHOICES:
+            diverse = list(pool)
+        row = matrix[selected[-1]]
+        nxt = min(diverse, key=lambda i: (row[i] * (1 + REUSE_PENALTY * usage[i]), i))
+        selected.append(nxt)
+        used_cats.update(categories[nxt])
+        pool.discard(nxt)
+    return selected
+
+
+@dataclass
+class RouteSelection:
+    routes: List[List[int]]
+    candidates_tried: int = 0
+    duplicates_rejected: int = 0
+    diversity: Optional[float] = None
+
+
+def route_diversity(routes: Sequence[Sequence[int]]) -> Optional[float]:
+    """
+    Mean pairwise Jaccard distance between the POI sets of the routes;
+    1.0 means no shared POIs, 0.0 means identical routes.
+    """
+    if len(routes) < 2:
+        return None
+    sets = [set(r) for r in routes]
+    pairs = list(combinations(sets, 2))
+    return sum(1 - jaccard(a, b) for a, b in pairs) / len(pairs)
+
+
+def select_diverse_routes(
+    matrix: List[List[float]],
+    categories: Sequence[Set[Hashable]],
+    num_routes: int,
+    num_pois: int,
+    seed: Optional[int] = None,
+    max_similarity: float = MAX_ROUTE_SIMILARITY,
+    check: Optional[Callable[[], None]] = None,
+) -> RouteSelection:
+    """
+    Pick up to `num_routes` routes of `num_pois` POIs each (as indices into the matrix).
+
+    POIs are expected best-first (see `overpass_service.sample_candidates`):
+    the first start is drawn, seeded, from the top num_routes *
+    CANDIDATES_PER_ROUTE of them, and the other starts are spread out from
+    it with farthest-point sampling. Near-duplicate candidates are rejected
+    here, before any routing call is spent on them.
+    """
+    n = len(matrix)
+    selection = RouteSelection(routes=[])
+    if n == 0:
+        return selection
+
+    rng = random.Random(seed)
+    candidate_starts = num_routes * CANDIDATES_PER_ROUTE
+    starts = farthest_point_order(matrix, rng.randrange(min(n, candidate_starts)), candidate_starts)
+    usage = [0] * n
+    accepted_sets: List[Set[int]] = []
+    for start in starts:
+        if len(selection.routes) >= num_routes:
+            break
+        selection.candidates_tried += 1
+        route = build_route(start, matrix, categories, num_pois, usage, check)
+        route_set = set(route)
+        if any(jaccard(route_set, other) >= max_similarity for other in accepted_sets):
+            selection.duplicates_rejected += 1
+            continue
+        selection.routes.append(route)
+        accepted_sets.append(route_set)
+        for i in route:
+            usage[i] += 1
+
+    selection.diversity = route_diversity(selection.routes)
+    return selection
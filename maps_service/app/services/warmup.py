@@ -0,0 +1,276 @@
+"""
+Warm-up: pre-populate the geocode and POI caches for hot regions.
+
+Each region (a center and a radius) is fetched from Overpass once per tag key,
+with every reference value of that key from `osm_tags_cache.json`, so any
+/pois/ request that falls inside the region is answered without an upstream
+call. Runs at startup and then every WARMUP_INTERVAL_S in the service, or
+offline to produce a snapshot the service loads at startup:
+
+    python -m app.services.warmup --regions app/warmup_regions.json --snapshot /data/poi_snapshot.json.gz
+
+Regions file: a JSON list of {"name", "location" or "lat"/"lon", "radius_km"}.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.maps.geocoding import geocode_location
+from app.services.maps.overpass_service import query_overpass
+from app.services.maps.poi_cache import WarmRegion, load_snapshot, poi_cache, save_snapshot
+from app.services.maps.tag_reference import TagReference, get_tag_reference
+from models.overpass import OverpassTag
+
+logger = logging.getLogger(__name__)
+
+# Warm-up queries cover a whole key over a large area; give Overpass longer than a request does
+WARMUP_OVERPASS_TIMEOUT_S = 90
+
+
+@dataclass
+class Region:
+    name: str
+    radius_m: int
+    location: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+
+def load_regions(path: str) -> List[Region]:
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    regions = []
+    for item in raw:
+        if item.get("location") is None and (item.get("lat") is None or item.get("lon") is None):
+            raise ValueError(f"Region {item.get('name')!r} needs a location or lat/lon")
+        regions.append(
+            Region(
+                name=item.get("name") or item["location"],
+                radius_m=int(float(item["radius_km"]) * 1000),
+                location=item.get("location"),
+                lat=item.get("lat"),
+                lon=item.get("lon"),
+            )
+        )
+    return regions
+
+
+def warmup_keys(reference: TagReference, wanted_keys: str = "") -> List[str]:
+    """
+    Tag keys to warm: `wanted_keys` (comma-separated) if set, else every key in the reference.
+    """
+    wanted = [k.strip() for k in wanted_keys.split(",") if k.strip()]
+    unknown = set(wanted) - set(reference.values)
+    if unknown:
+        logger.warning("Ignoring warm-up tag keys not in the reference: %s", sorted(unknown))
+    return [k for k in wanted if k in reference.values] or reference.keys()
+
+
+class WarmupState:
+    """
+    What /ready reports. The service is ready once the first warm-up pass has
+    finished (regions that failed are served cold) or when warm-up is disabled.
+    """
+
+    def __init__(self):
+        self.status = "disabled"  # disabled | cold | warming | warm
+        self.regions_total = 0
+        self.regions_warm = 0
+        self.failed_queries = 0
+        self.last_completed_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "disabled" or self.last_completed_at is not None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "regions_total": self.regions_total,
+            "regions_warm": self.regions_warm,
+            "failed_queries": self.failed_queries,
+            "last_completed_at": self.last_completed_at,
+        }
+
+
+warmup_state = WarmupState()
+
+
+class _RateLimiter:
+    """
+    At most one call per `interval` seconds (Nominatim's usage policy).
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._last = 0.0
+
+    async def __aenter__(self):
+        await self._lock.acquire()
+        wait = self._last + self.interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc):
+        self._last = time.monotonic()
+        self._lock.release()
+
+
+async def warm_region(
+    region: Region,
+    keys: List[str],
+    reference: TagReference,
+    geocode_limit: _RateLimiter,
+    overpass_slots: asyncio.Semaphore,
+) -> Optional[WarmRegion]:
+    """
+    Fetch one region, one Overpass query per key. Keys whose query fails are
+    left out of the region, so requests using them still go upstream.
+    """
+    lat, lon = region.lat, region.lon
+    if lat is None or lon is None:
+        try:
+            async with geocode_limit:
+                lat, lon = await asyncio.to_thread(geocode_location, region.location)
+        except Exception as e:
+            logger.warning("Warm-up: could not geocode %s: %s", region.name, e)
+            warmup_state.failed_queries += 1
+            return None
+
+    async def fetch_key(key: str):
+        tags = [OverpassTag(key=key, value=value) for value in reference.values[key]]
+        async with overpass_slots:
+            return await asyncio.to_thread(
+                query_overpass, tags, lat, lon, region.radius_m, WARMUP_OVERPASS_TIMEOUT_S
+            )
+
+    results = await asyncio.gather(*(fetch_key(key) for key in keys), return_exceptions=True)
+    warm = WarmRegion(name=region.name, lat=lat, lon=lon, radius_m=region.radius_m)
+    warmed_keys = []
+    for key, result in zip(keys, results):
+        if isinstance(result, Exception):
+            logger.warning("Warm-up: %s/%s failed: %s", region.name, key, result)
+            warmup_state.failed_queries += 1
+            continue
+        warmed_keys.append(key)
+        for el in result:
+            warm.elements[(el["type"], el["id"])] = el
+    if not warmed_keys:
+        return None
+    warm.keys = frozenset(warmed_keys)
+    return warm
+
+
+async def warm_up(regions: List[Region], wanted_keys: Optional[str] = None) -> int:
+    """
+    Warm every region concurrently under the upstream rate limits.
+    Returns the number of regions now warm.
+    """
+    reference = get_tag_reference()
+    keys = warmup_keys(reference, settings.warmup_tag_keys if wanted_keys is None else wanted_keys)
+    geocode_limit = _RateLimiter(settings.warmup_nominatim_interval_s)
+    overpass_slots = asyncio.Semaphore(settings.warmup_overpass_concurrency)
+
+    warmup_state.status = "warming"
+    warmup_state.regions_total = len(regions)
+    warmup_state.failed_queries = 0
+    started = time.perf_counter()
+
+    async def one(region: Region) -> bool:
+        warm = await warm_region(region, keys, reference, geocode_limit, overpass_slots)
+        if warm is None:
+            return False
+        poi_cache.put_region(warm)
+        logger.info(
+            "Warm-up: %s ready (%d elements, %d keys)", region.name, len(warm.elements), len(warm.keys)
+        )
+        return True
+
+    warmed = sum(await asyncio.gather(*(one(region) for region in regions)))
+    warmup_state.regions_warm = warmed
+    warmup_state.status = "warm"
+    warmup_state.last_completed_at = time.time()
+    logger.info(
+        "🔥 Warm-up finished: %d/%d regions, %d failed queries in %.1fs",
+        warmed, len(regions), warmup_state.failed_queries, time.perf_counter() - started,
+    )
+    if settings.warmup_snapshot_path:
+        await asyncio.to_thread(save_snapshot, settings.warmup_snapshot_path)
+    return warmed
+
+
+def restore_snapshot(regions: List[Region]) -> Optional[float]:
+    """
+    Load the configured snapshot. If it holds every region, the service is
+    warm at once; returns when the oldest of them was fetched.
+    """
+    path = settings.warmup_snapshot_path
+    if not path:
+        return None
+    try:
+        loaded = set(load_snapshot(path))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable warm-up snapshot %s: %s", path, e)
+        return None
+    logger.info("Loaded warm-up snapshot %s with %d regions", path, len(loaded))
+    if not loaded.issuperset(r.name for r in regions):
+        return None
+    warmup_state.status = "warm"
+    warmup_state.regions_total = warmup_state.regions_warm = len(regions)
+    warmup_state.last_completed_at = time.time()
+    return min(poi_cache.regions[r.name].fetched_at for r in regions)
+
+
+async def run_schedule(regions_file: str, interval: float) -> None:
+    """
+    Background task: warm up now (unless a fresh snapshot did it already),
+    then refresh every `interval` seconds (0 = once).
+    """
+    regions = load_regions(regions_file)
+    warmup_state.status = "cold"
+    warmup_state.regions_total = len(regions)
+    fetched_at = restore_snapshot(regions)
+    delay = 0.0
+    if fetched_at is not None:
+        if not interval:
+            return
+        delay = max(0.0, fetched_at + interval - time.time())
+    while True:
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            await warm_up(regions)
+        except Exception:
+            logger.exception("❌ Warm-up pass failed")
+            if warmup_state.last_completed_at is None:
+                # Serve cold rather than never becoming ready
+                warmup_state.last_completed_at = time.time()
+        if not interval:
+            return
+        delay = interval
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--regions", default=settings.warmup_regions_file, required=not settings.warmup_regions_file)
+    parser.add_argument("--keys", default=None, help="comma-separated tag keys (default: WARMUP_TAG_KEYS or all)")
+    parser.add_argument("--snapshot", default=settings.warmup_snapshot_path, help="write the warm caches here")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    settings.warmup_snapshot_path = args.snapshot
+    asyncio.run(warm_up(load_regions(args.regions), args.keys))
+    if args.snapshot:
+        print(f"wrote {args.snapshot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+from pathlib import Path
+
+# Mirror the container layout: the service root and the shared `models`
+# package must both be importable.
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+REPO_DIR = SERVICE_DIR.parent
+for path in (SERVICE_DIR, REPO_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+os.environ.setdefault("ORS_API_KEY", "test-key")
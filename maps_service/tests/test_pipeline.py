@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.maps.poi_features import build_features
+from app.services.pipeline import Stage, run_pipeline
+from models.overpass import OverpassTag
+
+UPSTREAM_DELAY = 0.2
+
+
+def test_independent_stages_overlap():
+    def slow(value):
+        time.sleep(UPSTREAM_DELAY)
+        return value
+
+    started = time.perf_counter()
+    result = asyncio.run(
+        run_pipeline(
+            [
+                Stage("a", lambda: slow(1)),
+                Stage("b", lambda: slow(2)),
+                Stage("sum", lambda a, b: a + b, depends_on=("a", "b")),
+            ]
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    assert result.results["sum"] == 3
+    assert elapsed < UPSTREAM_DELAY * 1.75
+    timings = {t.name: t for t in result.timings}
+    assert timings["a"].started < timings["b"].finished
+    assert timings["b"].started < timings["a"].finished
+    assert timings["sum"].started >= max(timings["a"].finished, timings["b"].finished)
+
+
+def test_async_stage_receives_dependencies_in_order():
+    async def concat(first, second):
+        return first + second
+
+    result = asyncio.run(
+        run_pipeline(
+            [
+                Stage("x", lambda: "x"),
+                Stage("y", lambda: "y"),
+                Stage("xy", concat, depends_on=("y", "x")),
+            ]
+        )
+    )
+    assert result.results["xy"] == "yx"
+
+
+def test_failure_cancels_pending_stages():
+    ran = []
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError, match="upstream down"):
+        asyncio.run(
+            run_pipeline(
+                [
+                    Stage("boom", boom),
+                    Stage("after", lambda _: ran.append(True), depends_on=("boom",)),
+                ]
+            )
+        )
+    assert not ran
+
+
+def test_rejects_unknown_dependency_and_cycles():
+    with pytest.raises(ValueError, match="unknown stage"):
+        asyncio.run(run_pipeline([Stage("a", lambda _: 1, depends_on=("missing",))]))
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(
+            run_pipeline(
+                [
+                    Stage("a", lambda _: 1, depends_on=("b",)),
+                    Stage("b", lambda _: 1, depends_on=("a",)),
+                ]
+            )
+        )
+
+
+def test_pois_endpoint_overlaps_tags_and_geocode(monkeypatch):
+    tags = [
+        OverpassTag(key="tourism", value="museum"),
+        OverpassTag(key="amenity", value="cafe"),
+        OverpassTag(key="leisure", value="park"),
+    ]
+
+    def fake_tags(interests):
+        time.sleep(UPSTREAM_DELAY)
+        return tags
+
+    def fake_geocode(location):
+        time.sleep(UPSTREAM_DELAY)
+        return 32.08, 34.78
+
+    def fake_overpass(tags_arg, lat, lon, radius_m):
+        assert tags_arg == tags
+        assert (lat, lon, radius_m) == (32.08, 34.78, 3000)
+        return build_features([
+            {
+                "id": 1,
+                "type": "node",
+                "lat": 32.081,
+                "lon": 34.781,
+                "tags": {"name": "Museum A", "tourism": "museum", "addr:street": "Main"},
+            }
+        ])
+
+    monkeypatch.setattr(main, "get_overpass_tags_from_interests", fake_tags)
+    monkeypatch.setattr(main, "geocode_location", fake_geocode)
+    monkeypatch.setattr(main, "fetch_poi_features", fake_overpass)
+
+    client = TestClient(main.app)
+    started = time.perf_counter()
+    response = client.post(
+        "/pois/",
+        json={
+            "location": "Tel Aviv",
+            "interests": "museum",
+            "radius_km": 3,
+            "num_routes": 1,
+            "num_pois": 3,
+            "travel_mode": "walking",
+        },
+    )
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200, response.text
+    assert [p["name"] for p in response.json()] == ["Museum A"]
+    # Sequential execution would take at least 2 * UPSTREAM_DELAY
+    assert elapsed < UPSTREAM_DELAY * 1.75
+    server_timing = response.headers["Server-Timing"]
+    for stage in ("tags", "geocode", "overpass", "filter", "total"):
+        assert f"{stage};dur=" in server_timing
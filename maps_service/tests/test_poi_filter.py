@@ -0,0 +1,330 @@
+import random
+
+from app.services.maps.overpass_service import (
+    CANDIDATES_PER_STOP,
+    Candidate,
+    POIMatcher,
+    filter_pois,
+    match_features,
+    quality_scores,
+    sample_candidates,
+    split_interests,
+    thin_pois_by_min_distance,
+)
+from app.services.maps.poi_features import build_features, extract_address
+from app.services.route_selection import distance_matrix, select_diverse_routes
+from models.llm_suggestion import LLMPOISuggestion
+from models.overpass import OverpassTag
+from models.route_request import RouteGenerationRequest
+
+TAGS = [
+    OverpassTag(key="tourism", value="museum"),
+    OverpassTag(key="tourism", value="gallery"),
+    OverpassTag(key="amenity", value="cafe"),
+]
+INTERESTS = "Street Art, vegan food ,  history"
+
+
+def make_request(interests=INTERESTS):
+    return RouteGenerationRequest(
+        location="Tel Aviv",
+        interests=interests,
+        radius_km=3,
+        num_routes=1,
+        num_pois=3,
+        travel_mode="walking",
+    )
+
+
+def match_elements(elements, matcher):
+    return match_features(build_features(elements), matcher)
+
+
+def match_pois(elements, request, tags):
+    matcher = POIMatcher(tags, request.interests)
+    return [c.to_suggestion() for c in match_elements(elements, matcher)]
+
+
+def make_elements(count, seed=7):
+    rng = random.Random(seed)
+    values = [("tourism", "museum"), ("tourism", "gallery"), ("amenity", "cafe"),
+              ("amenity", "bar"), ("shop", "bakery"), ("leisure", "park")]
+    descriptions = [None, "Great street art tour", "VEGAN FOOD only", "quiet spot"]
+    elements = []
+    for i in range(count):
+        key, value = rng.choice(values)
+        tags = {key: value}
+        if rng.random() < 0.8:
+            tags["name"] = f"Place {i}"
+        if rng.random() < 0.7:
+            tags["addr:street"] = "Dizengoff"
+        elif rng.random() < 0.5:
+            tags["brand"] = "Aroma"
+        desc = rng.choice(descriptions)
+        if desc:
+            tags["description"] = desc
+        el = {"id": i, "type": rng.choice(["node", "way"]), "tags": tags}
+        coords = {"lat": 32 + rng.random() / 10, "lon": 34.7 + rng.random() / 10}
+        if rng.random() < 0.05:
+            pass  # element without coordinates
+        elif el["type"] == "node":
+            el.update(coords)
+        else:
+            el["center"] = coords
+        elements.append(el)
+    return elements
+
+
+def legacy_primary_category(tags, overpass_tags):
+    """The category helper the old loop used, before POIMatcher.categorize."""
+    valid_set = {(t.key, t.value) for t in overpass_tags}
+    for k, v in tags.items():
+        if (k, v) in valid_set:
+            return v
+    for key in ("amenity", "shop", "tourism", "cuisine", "leisure"):
+        if key in tags:
+            return tags[key]
+    for k, v in tags.items():
+        if isinstance(v, str) and k != "name":
+            return v
+    return "unknown"
+
+
+def reference_match(elements, request, tags):
+    """The original per-element loop, with interests split on commas."""
+    interests = split_interests(request.interests)
+    pois = []
+    for el in elements:
+        tags_el = el.get("tags") or {}
+        name = tags_el.get("name")
+        if not name:
+            continue
+        category = legacy_primary_category(tags_el, tags)
+        if not category:
+            continue
+        if el["type"] == "node":
+            lat_el, lon_el = el.get("lat"), el.get("lon")
+        else:
+            lat_el, lon_el = (el.get("center") or {}).get("lat"), (el.get("center") or {}).get("lon")
+        if lat_el is None or lon_el is None:
+            continue
+        address = extract_address(tags_el)
+        if not address or address.startswith("Near "):
+            continue
+        desc = tags_el.get("description") or tags_el.get("note") or f"{name} - {address}"
+        if not (
+            any(interest.lower() in desc.lower() for interest in interests)
+            or any(tag.key in tags_el and tags_el[tag.key] == tag.value for tag in tags)
+        ):
+            continue
+        pois.append(
+            LLMPOISuggestion(
+                id=str(el["id"]),
+                name=name,
+                description=desc,
+                latitude=lat_el,
+                longitude=lon_el,
+                address=address,
+                categories=[category],
+            )
+        )
+    return pois
+
+
+def test_match_pois_matches_reference_loop():
+    elements = make_elements(2000)
+    request = make_request()
+    assert match_pois(elements, request, TAGS) == reference_match(elements, request, TAGS)
+
+
+def test_match_pois_keeps_named_addressed_matches():
+    elements = make_elements(2000)
+    pois = match_pois(elements, make_request(), TAGS)
+    matcher = POIMatcher(TAGS, INTERESTS)
+    requested = {t.value for t in TAGS}
+
+    assert 0 < len(pois) < len(elements)
+    for poi in pois:
+        assert poi.name and poi.address and not poi.address.startswith("Near ")
+        assert poi.categories[0] in requested or matcher.mentions_interest(poi.description)
+
+
+def test_interests_are_matched_as_terms_not_characters():
+    elements = [
+        {
+            "id": 1,
+            "type": "node",
+            "lat": 32.0,
+            "lon": 34.7,
+            "tags": {"name": "Corner", "shop": "bakery", "addr:street": "Allenby",
+                     "description": "Sourdough and more"},
+        },
+        {
+            "id": 2,
+            "type": "node",
+            "lat": 32.0,
+            "lon": 34.7,
+            "tags": {"name": "Wall", "shop": "bakery", "addr:street": "Allenby",
+                     "description": "Famous STREET ART wall"},
+        },
+    ]
+    # The old loop iterated the interests string character by character,
+    # so "Sourdough and more" matched on letters like "a" or "e".
+    pois = match_pois(elements, make_request(), TAGS)
+    assert [p.id for p in pois] == ["2"]
+
+
+def test_matcher_category_precedence():
+    matcher = POIMatcher(TAGS, INTERESTS)
+
+    def categorize(tags):
+        [features] = build_features([{"id": 1, "type": "node", "lat": 32.0, "lon": 34.7, "tags": tags}])
+        return matcher.categorize(features)
+
+    assert categorize({"name": "x", "amenity": "bar", "tourism": "gallery"}) == ("gallery", 1)
+    assert categorize({"name": "x", "tourism": "museum", "amenity": "cafe"}) == ("museum", 2)
+    assert categorize({"name": "x", "amenity": "bar"}) == ("bar", 0)
+    assert categorize({"name": "x", "craft": "brewery"}) == ("brewery", 0)
+    assert categorize({"name": "x"}) == ("unknown", 0)
+    assert not POIMatcher(TAGS, " , ").mentions_interest("anything")
+
+
+def test_features_address_and_description():
+    [street, brand, bare] = build_features([
+        {"id": 1, "type": "node", "lat": 32.0, "lon": 34.7,
+         "tags": {"name": "A", "addr:street": "Allenby", "addr:housenumber": "5"}},
+        {"id": 2, "type": "way", "center": {"lat": 32.0, "lon": 34.7},
+         "tags": {"name": "B", "brand": "Aroma", "note": "corner"}},
+        {"id": 3, "type": "node", "lat": 32.0, "lon": 34.7, "tags": {"name": "C"}},
+    ])
+    assert (street.address, street.addressable, street.description) == ("Allenby, 5", True, "A - Allenby, 5")
+    assert (brand.address, brand.addressable, brand.description) == ("Near Aroma", False, "corner")
+    assert (bare.address, bare.addressable) == (None, False)
+    # Elements without coordinates have no features
+    assert build_features([{"id": 4, "type": "way", "tags": {"name": "D"}}]) == []
+
+
+def dense_elements(count, seed=3):
+    """Every element matches; a few carry a description and a second requested tag."""
+    rng = random.Random(seed)
+    elements = []
+    for i in range(count):
+        tags = {"name": f"Place {i}", "addr:street": "Dizengoff", "tourism": "museum"}
+        if i % 10 == 0:
+            tags["description"] = "A museum with a cafe"
+            tags["amenity"] = "cafe"
+        elements.append({"id": i, "type": "node", "lat": 32.05 + rng.random() / 20,
+                         "lon": 34.75 + rng.random() / 20, "tags": tags})
+    return elements
+
+
+def test_sampling_bounds_candidates_and_ranks_them_best_first():
+    request = make_request()
+    matcher = POIMatcher(TAGS, request.interests)
+    matched = match_elements(dense_elements(3000), matcher)
+
+    sampled = sample_candidates(matched, request)
+
+    budget = request.num_routes * request.num_pois * CANDIDATES_PER_STOP
+    assert 0 < len(sampled) <= budget
+    scores = quality_scores(sampled)
+    assert scores == sorted(scores, reverse=True)
+    # The richer POIs (description + extra requested tag) win their cells
+    assert sum(int(c.features.id) % 10 == 0 for c in sampled) > len(sampled) / 2
+
+
+def test_sampling_under_the_budget_only_ranks():
+    request = make_request()
+    matcher = POIMatcher(TAGS, request.interests)
+    matched = match_elements(dense_elements(5), matcher)
+
+    sampled = sample_candidates(matched, request)
+
+    assert sorted(sampled, key=lambda c: int(c.features.id)) == matched
+    assert sampled[0].features.id == "0"
+
+
+def candidates(tag_sets):
+    features = build_features(
+        {"id": i, "type": "node", "lat": 32, "lon": 34.7, "tags": tags} for i, tags in enumerate(tag_sets)
+    )
+    matcher = POIMatcher(TAGS, INTERESTS)
+    return [Candidate(f, *matcher.categorize(f)) for f in features]
+
+
+def test_quality_score_prefers_rare_categories():
+    common = {"name": "x", "addr:street": "y", "tourism": "museum"}
+    rare = {"name": "x", "addr:street": "y", "tourism": "gallery"}
+
+    scores = quality_scores(candidates([common, common, common, rare]))
+
+    assert scores[3] > scores[0] == scores[1] == scores[2]
+
+
+def test_features_are_precomputed_per_element():
+    plain = {"name": "x", "addr:street": "y", "tourism": "museum", "amenity": "bar"}
+    known = {**plain, "description": "d", "opening_hours": "9-5", "wikidata": "Q1", "website": "https://x"}
+    [f_plain, f_known] = [c.features for c in candidates([plain, known])]
+
+    assert f_plain.category_tags == (("tourism", "museum"), ("amenity", "bar"))
+    assert f_plain.fallback_category == "bar"
+    assert (f_plain.completeness, f_plain.popularity) == (2, 0)
+    assert (f_known.completeness, f_known.popularity) == (4, 2)
+    assert f_plain.description == "x - y"
+
+
+def test_thinning_keeps_the_better_of_two_neighbours():
+    plain = {"id": 1, "type": "node", "lat": 32.0800, "lon": 34.78,
+             "tags": {"name": "Plain", "addr:street": "y", "tourism": "museum"}}
+    known = {"id": 2, "type": "node", "lat": 32.0801, "lon": 34.78,
+             "tags": {"name": "Known", "addr:street": "y", "tourism": "museum",
+                      "wikidata": "Q1", "wikipedia": "he:x", "website": "https://x"}}
+
+    pois = filter_pois(build_features([plain, known]), make_request(), TAGS)
+
+    assert [p.name for p in pois] == ["Known"]
+
+
+def mixed_quality_elements(count, seed=11):
+    """A quarter of the POIs are well documented; the rest are bare."""
+    rng = random.Random(seed)
+    elements = []
+    for i in range(count):
+        tags = {"name": f"Place {i}", "addr:street": "Dizengoff", "tourism": rng.choice(["museum", "gallery"])}
+        if rng.random() < 0.25:
+            tags.update(description="A landmark", opening_hours="9-17", wikidata=f"Q{i}", website="https://x")
+        elements.append({"id": i, "type": "node", "lat": 32.05 + rng.random() / 20,
+                         "lon": 34.75 + rng.random() / 20, "tags": tags})
+    return elements
+
+
+def route_quality(pois, quality, request):
+    """Mean quality of the POIs on the selected routes."""
+    matrix = distance_matrix([(p.latitude, p.longitude) for p in pois])
+    selection = select_diverse_routes(matrix, [set(p.categories) for p in pois],
+                                      request.num_routes, request.num_pois, seed=5)
+    stops = [pois[i] for route in selection.routes for i in route]
+    return sum(quality[p.id] for p in stops) / len(stops)
+
+
+def test_ranked_thinning_gives_better_routes():
+    request = RouteGenerationRequest(location="Tel Aviv", interests="art", radius_km=3,
+                                     num_routes=3, num_pois=5, travel_mode="walking")
+    # Under the sampling budget, so ranking is the only difference
+    elements = mixed_quality_elements(50)
+    features = build_features(elements)
+    quality = {f.id: f.quality for f in features}
+    min_dist = request.radius_km * 1000 / request.num_pois
+
+    # Before: candidates thinned and selected in Overpass order
+    matched = match_elements(elements, POIMatcher(TAGS, request.interests))
+    unranked = thin_pois_by_min_distance([c.to_suggestion() for c in matched], min_dist)
+    ranked = filter_pois(features, request, TAGS)
+
+    assert route_quality(ranked, quality, request) > route_quality(unranked, quality, request)
+
+
+def test_filter_pois_on_dense_input_stays_bounded():
+    request = make_request()
+    pois = filter_pois(build_features(dense_elements(3000)), request, TAGS)
+    assert len(pois) <= request.num_routes * request.num_pois * CANDIDATES_PER_STOP
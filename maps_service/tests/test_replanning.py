@@ -0,0 +1,117 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services import generate_optimized_routes as gor
+from app.services import plan_sessions, replanning
+from app.services.plan_sessions import SessionStore
+from tests.test_route_selection import make_pois, make_request
+
+
+@pytest.fixture
+def ors(monkeypatch):
+    calls = []
+
+    def fake_legs(coords, profile):
+        calls.append((profile, len(coords) - 1))
+        return [[a, b] for a, b in zip(coords, coords[1:])]
+
+    store = SessionStore(ttl=60, max_sessions=10)
+    monkeypatch.setattr(plan_sessions, "get_route_legs", fake_legs)
+    monkeypatch.setattr(gor, "plan_sessions", store)
+    monkeypatch.setattr(replanning, "plan_sessions", store)
+    return calls
+
+
+def poi_ids(route):
+    return [p["id"] for p in route["pois"]]
+
+
+def test_remove_stop_routes_the_edited_route_in_one_call(ors):
+    plan = gor.generate_optimized_routes(make_request(num_routes=1), make_pois(20))
+    ors.clear()
+    before = poi_ids(plan["routes"][0])
+
+    result = replanning.remove_stop(plan["session_id"], 0, before[1])
+
+    assert poi_ids(result["routes"][0]) == [before[0]] + before[2:]
+    assert ors == [("foot-walking", len(before) - 2)]
+    assert result["stats"]["ors_calls"] == 1
+    assert result["session_id"] != plan["session_id"]
+
+
+def test_add_stop_routes_the_edited_route_in_one_call(ors):
+    pois = make_pois(20)
+    plan = gor.generate_optimized_routes(make_request(num_routes=1), pois)
+    ors.clear()
+    before = poi_ids(plan["routes"][0])
+    extra = next(p.id for p in pois if p.id not in before)
+
+    result = replanning.add_stop(plan["session_id"], 0, extra)
+
+    after = poi_ids(result["routes"][0])
+    assert sorted(after) == sorted(before + [extra])
+    assert [p for p in after if p != extra] == before
+    assert ors == [("foot-walking", len(after) - 1)]
+    assert result["stats"]["ors_calls"] == 1
+
+
+def test_edits_fork_the_session(ors):
+    plan = gor.generate_optimized_routes(make_request(num_routes=1), make_pois(20))
+    before = poi_ids(plan["routes"][0])
+
+    replanning.remove_stop(plan["session_id"], 0, before[1])
+    again = replanning.replan(plan["session_id"])
+
+    assert poi_ids(again["routes"][0]) == before
+    assert again["stats"]["ors_calls"] == 0
+
+
+def test_profile_switch_keeps_stops_and_reroutes(ors):
+    plan = gor.generate_optimized_routes(make_request(num_routes=2), make_pois(20))
+    ors.clear()
+
+    result = replanning.replan(plan["session_id"], travel_mode="cycling")
+
+    assert [poi_ids(r) for r in result["routes"]] == [poi_ids(r) for r in plan["routes"]]
+    assert ors == [("cycling-regular", 3)] * 2
+
+
+def test_replan_with_more_pois_reuses_the_pool(ors):
+    plan = gor.generate_optimized_routes(make_request(num_routes=2), make_pois(20))
+
+    result = replanning.replan(plan["session_id"], num_pois=6)
+    assert all(len(r["pois"]) == 6 for r in result["routes"])
+
+    with pytest.raises(HTTPException) as exc:
+        replanning.replan(plan["session_id"], num_pois=21)
+    assert exc.value.status_code == 400
+    # One stop per route: nothing routable is left
+    with pytest.raises(HTTPException) as exc:
+        replanning.replan(plan["session_id"], num_pois=1)
+    assert exc.value.status_code == 400
+
+
+def test_a_cached_leg_in_the_middle_does_not_split_the_route(ors):
+    plan = gor.generate_optimized_routes(make_request(num_routes=1, num_pois=5), make_pois(20))
+    session = replanning.get_session(plan["session_id"])
+    indices = session.routes[0]
+    forked = session.fork(travel_mode="cycling")
+    forked.legs[("cycling-regular", indices[1], indices[2])] = [(0.0, 0.0), (1.0, 1.0)]
+    ors.clear()
+
+    path, calls = plan_sessions.route_path(forked, indices)
+
+    assert calls == 1
+    assert ors == [("cycling-regular", 4)]
+    assert (0.0, 0.0) not in path
+
+
+def test_unknown_session_and_too_short_route(ors):
+    with pytest.raises(HTTPException) as exc:
+        replanning.replan("missing")
+    assert exc.value.status_code == 404
+
+    plan = gor.generate_optimized_routes(make_request(num_routes=1, num_pois=2), make_pois(20))
+    with pytest.raises(HTTPException) as exc:
+        replanning.remove_stop(plan["session_id"], 0, plan["routes"][0]["pois"][0]["id"])
+    assert exc.value.status_code == 400
@@ -0,0 +1,99 @@
+import os
+import random
+import threading
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.services import generate_optimized_routes as gor
+from app.services.route_optimizer import (
+    OptimizationBudgetExceeded,
+    OptimizationCancelled,
+    RouteOptimizer,
+    encode_categories,
+    haversine_matrix,
+)
+from app.services.route_selection import distance_matrix, select_diverse_routes
+
+CATS = ["museum", "cafe", "park", "gallery", "bar"]
+
+
+def make_pool(count, seed=5):
+    rng = random.Random(seed)
+    coords = [(32.05 + rng.random() / 20, 34.75 + rng.random() / 20) for _ in range(count)]
+    categories = [{rng.choice(CATS)} for _ in range(count)]
+    return coords, categories
+
+
+@pytest.fixture(scope="module")
+def pool():
+    optimizer = RouteOptimizer(workers=1, cpu_budget_s=30)
+    optimizer.start()
+    yield optimizer
+    optimizer.shutdown()
+
+
+def shm_blocks():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")} if os.path.isdir("/dev/shm") else set()
+
+
+def test_haversine_matrix_matches_reference():
+    coords, _ = make_pool(25)
+    np.testing.assert_allclose(haversine_matrix(np.asarray(coords)), distance_matrix(coords), rtol=1e-9, atol=1e-6)
+
+
+def test_encode_categories_as_csr():
+    ids, offsets = encode_categories([{"a"}, [], ["b", "a"]])
+    assert offsets.tolist() == [0, 1, 1, 3]
+    assert ids.tolist() == [0, 1, 0]
+
+
+def test_inline_and_pool_match_the_reference_selection(pool):
+    coords, categories = make_pool(60)
+    reference = select_diverse_routes(distance_matrix(coords), categories, 3, 5, seed=11)
+    before = shm_blocks()
+
+    inline, matrix = RouteOptimizer(workers=0).select(coords, categories, 3, 5, seed=11)
+    pooled, pooled_matrix = pool.select(coords, categories, 3, 5, seed=11)
+
+    assert inline.routes == pooled.routes == reference.routes
+    np.testing.assert_allclose(pooled_matrix, matrix)
+    assert shm_blocks() == before
+
+
+def test_cpu_budget_is_enforced(pool):
+    coords, categories = make_pool(200)
+    with pytest.raises(OptimizationBudgetExceeded):
+        RouteOptimizer(workers=0, cpu_budget_s=0).select(coords, categories, 3, 5)
+
+    pool.cpu_budget_s = 0
+    try:
+        with pytest.raises(OptimizationBudgetExceeded):
+            pool.select(coords, categories, 3, 5)
+    finally:
+        pool.cpu_budget_s = 30
+
+
+def test_cancel_stops_the_task(pool):
+    coords, categories = make_pool(1500)
+    cancel = threading.Event()
+    cancel.set()
+    before = shm_blocks()
+
+    with pytest.raises(OptimizationCancelled):
+        RouteOptimizer(workers=0).select(coords, categories, 3, 5, cancel=cancel)
+    with pytest.raises(OptimizationCancelled):
+        pool.select(coords, categories, 10, 40, cancel=cancel)
+    assert shm_blocks() == before
+    # The pool is still usable afterwards
+    assert pool.select(*make_pool(20), 2, 3, seed=1)[0].routes
+
+
+def test_budget_overrun_becomes_503(monkeypatch):
+    from tests.test_route_selection import make_pois, make_request
+
+    monkeypatch.setattr(gor, "route_optimizer", RouteOptimizer(workers=0, cpu_budget_s=0))
+    with pytest.raises(HTTPException) as exc:
+        gor.generate_optimized_routes(make_request(), make_pois(50))
+    assert exc.value.status_code == 503
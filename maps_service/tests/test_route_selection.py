@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from app.services import generate_optimized_routes as gor
+from app.services import plan_sessions
+from app.services.geo import haversine_m
+from app.services.route_selection import (
+    distance_matrix,
+    farthest_point_order,
+    route_diversity,
+    select_diverse_routes,
+)
+from models.llm_suggestion import LLMPOISuggestion
+from models.route_request import RouteGenerationRequest
+
+
+def make_pois(count, seed=3):
+    rng = random.Random(seed)
+    cats = ["museum", "cafe", "park", "gallery", "bar"]
+    return [
+        LLMPOISuggestion(
+            id=str(i),
+            name=f"POI {i}",
+            latitude=32.05 + rng.random() / 20,
+            longitude=34.75 + rng.random() / 20,
+            categories=[rng.choice(cats)],
+        )
+        for i in range(count)
+    ]
+
+
+def make_request(**overrides):
+    fields = dict(location="Tel Aviv", interests="art", radius_km=3, num_routes=3,
+                  num_pois=4, travel_mode="walking", seed=42)
+    fields.update(overrides)
+    return RouteGenerationRequest(**fields)
+
+
+def selection_for(pois, num_routes, num_pois, seed):
+    matrix = distance_matrix([(p.latitude, p.longitude) for p in pois])
+    return select_diverse_routes(
+        matrix, [set(p.categories) for p in pois], num_routes, num_pois, seed=seed
+    )
+
+
+def test_haversine_matches_known_distance():
+    # Tel Aviv -> Jerusalem is roughly 54 km
+    assert haversine_m(32.0853, 34.7818, 31.7683, 35.2137) == pytest.approx(53_900, rel=0.02)
+
+
+def test_farthest_point_order_spreads_starts():
+    coords = [(32.0, 34.0), (32.0, 34.001), (32.0, 34.1), (32.0, 34.05)]
+    order = farthest_point_order(distance_matrix(coords), 0, 3)
+    assert order == [0, 2, 3]
+
+
+def test_selection_is_reproducible_for_a_seed():
+    pois = make_pois(30)
+    first = selection_for(pois, 3, 4, seed=7)
+    assert selection_for(pois, 3, 4, seed=7).routes == first.routes
+    assert any(
+        selection_for(pois, 3, 4, seed=s).routes != first.routes for s in range(8, 12)
+    )
+
+
+def test_routes_are_distinct_and_diverse():
+    selection = selection_for(make_pois(30), 3, 4, seed=1)
+    assert len(selection.routes) == 3
+    assert all(len(r) == len(set(r)) == 4 for r in selection.routes)
+    assert selection.diversity is not None and selection.diversity > 0.5
+
+
+def test_near_duplicates_are_rejected_before_routing(monkeypatch):
+    calls = []
+
+    def fake_legs(coords, profile):
+        calls.append(coords)
+        return [[a, b] for a, b in zip(coords, coords[1:])]
+
+    monkeypatch.setattr(plan_sessions, "get_route_legs", fake_legs)
+    # Only 4 POIs for 3 routes of 4: every candidate is the same set
+    result = gor.generate_optimized_routes(make_request(), make_pois(4))
+
+    assert len(result["routes"]) == 1
+    assert len(calls) == 1
+    assert result["stats"]["ors_calls"] == 1
+    assert result["stats"]["ors_calls_saved"] == 2
+    assert result["stats"]["duplicates_rejected"] >= 2
+
+
+def test_route_diversity_metric():
+    assert route_diversity([[1, 2, 3]]) is None
+    assert route_diversity([[1, 2], [1, 2]]) == 0.0
+    assert route_diversity([[1, 2], [3, 4]]) == 1.0
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from app.services.maps import overpass_service
+from app.services.maps.tag_reference import get_tag_reference, parse_tag_reference
+
+RAW = b'{"tourism": ["museum", "gallery"], "amenity": ["cafe"]}'
+
+
+def test_reference_is_parsed_into_immutable_lookups():
+    reference = parse_tag_reference(RAW)
+
+    assert reference.is_valid("tourism", "gallery")
+    assert not reference.is_valid("tourism", "cafe")
+    assert not reference.is_valid("shop", "books")
+    assert reference.values["tourism"] == ("museum", "gallery")
+    with pytest.raises(TypeError):
+        reference.values["shop"] = ("books",)
+
+
+def test_version_follows_the_contents():
+    assert parse_tag_reference(RAW).version == parse_tag_reference(RAW).version
+    assert parse_tag_reference(RAW).version != parse_tag_reference(RAW.replace(b"cafe", b"bar")).version
+
+
+def test_reference_is_loaded_once():
+    assert get_tag_reference() is get_tag_reference()
+
+
+def test_llm_request_carries_the_serialized_reference(monkeypatch):
+    reference = parse_tag_reference(RAW)
+    sent = {}
+
+    class Response:
+        status_code = 200
+        headers = {}
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return []
+
+    def fake_request(method, url, data, headers, timeout):
+        sent.update(json.loads(data), content_type=headers["Content-Type"])
+        return Response()
+
+    monkeypatch.setattr(overpass_service.llm_client.session, "request", fake_request)
+    overpass_service.call_llm_service_for_tags('art, "quoted" & more', reference)
+
+    assert sent["interests"] == 'art, "quoted" & more'
+    assert sent["version"] == reference.version
+    assert sent["valid_tags"] == json.loads(RAW)
+    assert sent["content_type"] == "application/json"
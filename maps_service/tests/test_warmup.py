@@ -0,0 +1,151 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services import warmup
+from app.services.maps import poi_cache as pc
+from app.services.maps.poi_cache import GeocodeCache, POICache, WarmRegion, select_elements
+from app.services.maps.tag_reference import parse_tag_reference
+from models.overpass import OverpassTag
+
+CENTER = (32.08, 34.78)
+# ~0.009 degrees of latitude per km
+NEAR = {"type": "node", "id": 1, "lat": 32.081, "lon": 34.78, "tags": {"amenity": "cafe"}}
+BAR = {"type": "node", "id": 2, "lat": 32.082, "lon": 34.78, "tags": {"amenity": "sports_bar"}}
+FAR = {"type": "node", "id": 3, "lat": 32.2, "lon": 34.78, "tags": {"amenity": "cafe"}}
+WAY = {"type": "way", "id": 4, "center": {"lat": 32.079, "lon": 34.781}, "tags": {"shop": "books"}}
+PARK = {"type": "node", "id": 5, "lat": 32.08, "lon": 34.781, "tags": {"leisure": "park"}}
+
+CAFES = [OverpassTag(key="amenity", value="cafe")]
+
+
+def test_geocode_cache_normalizes_and_expires():
+    now = [0.0]
+    cache = GeocodeCache(ttl=10, clock=lambda: now[0])
+    cache.put("Tel  Aviv", (32.08, 34.78))
+
+    assert cache.get("tel aviv") == (32.08, 34.78)
+    now[0] = 11
+    assert cache.get("Tel Aviv") is None
+
+
+def test_select_elements_matches_overpass_filter():
+    tags = CAFES + [OverpassTag(key="amenity", value="bar"), OverpassTag(key="shop", value="books")]
+
+    selected = select_elements([NEAR, BAR, FAR, WAY, PARK], tags, *CENTER, 1000)
+
+    # Unanchored like Overpass' ["amenity"~"bar|cafe"]; ways are placed at their center
+    assert [el["id"] for el in selected] == [1, 2, 4]
+
+
+def test_poi_cache_answers_requests_inside_a_warm_region():
+    cache = POICache(ttl=60)
+    cache.put_region(
+        WarmRegion(
+            name="tlv", lat=CENTER[0], lon=CENTER[1], radius_m=5000,
+            elements={(el["type"], el["id"]): el for el in (NEAR, BAR, WAY, PARK)},
+            keys=frozenset({"amenity", "shop"}),
+        )
+    )
+
+    assert [f.id for f in cache.lookup(CAFES, 32.081, 34.78, 1000)] == ["1"]
+    # Sticks out of the region, or uses a key that wasn't warmed
+    assert cache.lookup(CAFES, *CENTER, 6000) is None
+    assert cache.lookup([OverpassTag(key="leisure", value="park")], *CENTER, 1000) is None
+
+
+def test_poi_cache_remembers_exact_queries():
+    cache = POICache(ttl=60)
+    stored = cache.store(CAFES, *CENTER, 1000, [NEAR])
+
+    assert cache.lookup(CAFES, *CENTER, 1000) == stored
+    assert [f.id for f in stored] == ["1"]
+    # Callers get their own list
+    cache.lookup(CAFES, *CENTER, 1000).clear()
+    stored.clear()
+    assert len(cache.lookup(CAFES, *CENTER, 1000)) == 1
+    assert cache.lookup(CAFES, *CENTER, 2000) is None
+
+
+@pytest.fixture
+def fresh_caches(monkeypatch, tmp_path):
+    cache = POICache(ttl=3600)
+    geocodes = GeocodeCache(ttl=3600)
+    state = warmup.WarmupState()
+    monkeypatch.setattr(warmup, "poi_cache", cache)
+    monkeypatch.setattr(pc, "poi_cache", cache)
+    monkeypatch.setattr(pc, "geocode_cache", geocodes)
+    monkeypatch.setattr(warmup, "warmup_state", state)
+    monkeypatch.setattr(main, "warmup_state", state)
+    monkeypatch.setattr(warmup.settings, "warmup_nominatim_interval_s", 0)
+    monkeypatch.setattr(warmup.settings, "warmup_snapshot_path", str(tmp_path / "snapshot.json.gz"))
+    reference = parse_tag_reference(b'{"amenity": ["cafe", "bar"], "shop": ["books"]}')
+    monkeypatch.setattr(warmup, "get_tag_reference", lambda: reference)
+    return cache, state
+
+
+def test_warm_up_fetches_each_key_and_skips_failed_ones(monkeypatch, fresh_caches):
+    cache, state = fresh_caches
+    queried = []
+
+    def fake_overpass(tags, lat, lon, radius_m, timeout):
+        queried.append(sorted(t.value for t in tags))
+        if tags[0].key == "shop":
+            raise RuntimeError("overpass busy")
+        return [NEAR, BAR]
+
+    monkeypatch.setattr(warmup, "geocode_location", lambda location: CENTER)
+    monkeypatch.setattr(warmup, "query_overpass", fake_overpass)
+    regions = [warmup.Region(name="tlv", location="Tel Aviv", radius_m=5000)]
+
+    assert asyncio.run(warmup.warm_up(regions, "")) == 1
+
+    assert sorted(queried) == [["bar", "cafe"], ["books"]]
+    region = cache.regions["tlv"]
+    assert region.keys == {"amenity"}
+    assert set(region.elements) == {("node", 1), ("node", 2)}
+    assert state.ready and state.failed_queries == 1
+
+
+def test_snapshot_round_trip(monkeypatch, fresh_caches):
+    cache, _ = fresh_caches
+    cache.put_region(
+        WarmRegion(name="tlv", lat=CENTER[0], lon=CENTER[1], radius_m=5000,
+                   elements={("node", 1): NEAR}, keys=frozenset({"amenity"}))
+    )
+    pc.geocode_cache.put("Tel Aviv", CENTER)
+    pc.save_snapshot(warmup.settings.warmup_snapshot_path)
+
+    restored = POICache(ttl=3600)
+    monkeypatch.setattr(pc, "poi_cache", restored)
+    assert pc.load_snapshot(warmup.settings.warmup_snapshot_path) == ["tlv"]
+    assert [f.id for f in restored.lookup(CAFES, *CENTER, 1000)] == ["1"]
+    assert pc.geocode_cache.get("tel aviv") == CENTER
+
+
+def test_load_regions(tmp_path):
+    path = tmp_path / "regions.json"
+    path.write_text(json.dumps([
+        {"location": "Tel Aviv", "radius_km": 2.5},
+        {"name": "port", "lat": 32.1, "lon": 34.77, "radius_km": 1},
+    ]))
+
+    regions = warmup.load_regions(str(path))
+
+    assert [(r.name, r.radius_m) for r in regions] == [("Tel Aviv", 2500), ("port", 1000)]
+
+
+def test_ready_waits_for_first_warm_up(fresh_caches):
+    _, state = fresh_caches
+    client = TestClient(main.app)
+
+    state.status = "warming"
+    assert client.get("/ready").status_code == 503
+
+    state.status = "warm"
+    state.last_completed_at = 1.0
+    assert client.get("/ready").json()["status"] == "warm"
+    assert client.get("/ready").status_code == 200
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -10,3 +12,6 @@ class RouteGenerationRequest(BaseModel):
     )
     num_pois: int = Field(..., ge=1, description="Number of POIs per route")
     travel_mode: str = Field(..., description="One of: walking, driving, cycling")
+    seed: Optional[int] = Field(
+        None, description="Seed for route selection; the same seed gives the same routes"
+    )
@@ -1,5 +1,9 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 class TagRequest(BaseModel):
     interests: str
     valid_tags: dict
+    # Hash of the tag reference, so the service can reuse what it derived from it
+    version: Optional[str] = None